@@ -1,38 +1,24 @@
-import subprocess
+import time
+STARTED_AT = time.perf_counter()
 import sys
 import tkinter as tk
-from tkinter import messagebox, ttk, simpledialog
-import shutil
+from tkinter import messagebox, ttk, filedialog
 import logging
-import threading
-import urllib.request
-import json
-import requests
-import re
 import os
+import bisect
+import pythonlibs_engine as engine
+from pythonlibs_engine import (
+    Job, Span, add_user_environment, apply_library_changes, compare_environment_snapshot, configure_logging, download_python_installer,
+    environment_label, export_environment_snapshot, fetch_environments, fetch_installed_libraries_with_latest, fetch_library_description,
+    fetch_library_sizes, format_progress, format_size, get_current_python_version, get_dependency_graph, get_job_scheduler, get_latest_python_version,
+    get_site_packages_watcher, get_snapshots_dir, get_span_statistics, get_trace_path, import_advisories, install_library, installer_path_for,
+    is_newer_version, load_inventory_snapshot, normalize_name, parse_version, plan_snapshot_restore, predict_upgrade_problems, record_span,
+    reset_span_statistics, restore_snapshot, run_installer, set_offline_mode, set_system_python, ui_callback, uninstall_impact, uninstall_libraries,
+    uninstall_library, update_libraries, update_library, update_pip,
+)
 
-logging.basicConfig(filename="app.log", level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
-
-def is_connected():
-    try:
-        urllib.request.urlopen('https://www.google.com', timeout=5)
-        return True
-    except Exception as e:
-        logging.error(f"Errore nella verifica della connessione: {e}")
-        return False
-
-def get_system_python():
-    python_executable = shutil.which("python") or shutil.which("python3")
-    if not python_executable:
-        root = tk.Tk()
-        root.withdraw()
-        messagebox.showerror("Errore", "Interprete Python non trovato nel sistema.")
-        root.destroy()
-        sys.exit(1)
-    logging.info(f"Interprete Python trovato: {python_executable}")
-    return python_executable
-
-SYSTEM_PYTHON = get_system_python()
+LOG_PANE_LINES = 1000
+FIRST_PAINT_BUDGET_MS = 300
 
 class InstallLibraryDialog(tk.Toplevel):
     def __init__(self, parent, title="Installa Libreria"):
@@ -91,7 +77,7 @@ class UpdatePythonDialog(tk.Toplevel):
         self.resizable(False, False)
         self.latest_version = latest_version
         self.download_url = download_url
-        self.installer_path = os.path.join(os.path.expanduser("~"), f"python-{latest_version}-installer.exe")
+        self.installer_path = installer_path_for(download_url)
         self.create_widgets()
         self.protocol("WM_DELETE_WINDOW", self.on_cancel)
         self.grab_set()
@@ -107,201 +93,500 @@ class UpdatePythonDialog(tk.Toplevel):
     def download_and_install(self):
         progress = tk.Toplevel(self)
         progress.title("Scaricamento in corso...")
-        progress.geometry("300x100")
+        progress.geometry("420x130")
         progress.resizable(False, False)
         progress_label = tk.Label(progress, text="Scaricamento...")
-        progress_label.pack(pady=20)
-        progress_bar = ttk.Progressbar(progress, orient="horizontal", length=250, mode="indeterminate")
-        progress_bar.pack(pady=10)
-        progress_bar.start(10)
-        def download_task():
-            success = download_python_installer(self.latest_version, self.installer_path)
-            progress_bar.stop()
-            if success:
+        progress_label.pack(pady=(20, 5))
+        progress_bar = ttk.Progressbar(progress, orient="horizontal", length=380, mode="determinate", maximum=100)
+        progress_bar.pack(pady=5)
+        def download_task(job):
+            return download_python_installer(self.download_url, self.installer_path, job=job)
+        def poll(job):
+            if job.finished or not progress.winfo_exists():
+                return
+            if job.progress:
+                progress_bar["value"] = job.progress["fraction"] * 100
+                progress_label.config(text=format_progress(job.progress))
+            progress.after(200, lambda: poll(job))
+        def on_downloaded(result):
+            if result["success"]:
+                progress_bar["value"] = 100
                 progress_label.config(text="Download completato!")
                 progress.after(1000, lambda: progress.destroy())
-                run_installer(self.installer_path)
+                if result["verified"] or messagebox.askyesno("Integrità non verificata", f"{result['message']}\n\nEseguire comunque l'installer?", icon="warning", parent=self):
+                    run_installer(self.installer_path)
                 self.destroy()
             else:
                 progress_label.config(text="Download fallito!")
-                progress_bar['value'] = 0
-                messagebox.showerror("Errore", "Impossibile scaricare l'installer di Python.", parent=self)
+                progress_bar["value"] = 0
+                messagebox.showerror("Errore", result["message"], parent=self)
                 progress.after(2000, lambda: progress.destroy())
-        threading.Thread(target=download_task).start()
+        job = get_job_scheduler().submit(f"Scarica Python {self.latest_version}", download_task, on_done=on_downloaded, on_cancel=progress.destroy)
+        progress.protocol("WM_DELETE_WINDOW", lambda: get_job_scheduler().cancel(job))
+        poll(job)
     def on_cancel(self):
         self.destroy()
 
-def update_pip(callback=None, disable_buttons=None, enable_buttons=None):
-    def task():
-        if disable_buttons:
-            disable_buttons()
-        try:
-            result = subprocess.run([SYSTEM_PYTHON, "-m", "pip", "install", "--upgrade", "pip"], check=True, capture_output=True, text=True)
-            logging.info("pip aggiornato con successo.")
-            if callback:
-                callback(success=True, message="pip aggiornato con successo.")
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Errore durante l'aggiornamento di pip: {e.stderr}")
-            if callback:
-                callback(success=False, message=f"Errore durante l'aggiornamento di pip:\n{e.stderr}")
-        except Exception as e:
-            logging.error(f"Errore generico durante l'aggiornamento di pip: {e}")
-            if callback:
-                callback(success=False, message=f"Errore durante l'aggiornamento di pip: {e}")
-        finally:
-            if enable_buttons:
-                enable_buttons()
-    threading.Thread(target=task).start()
-
-def fetch_installed_libraries_with_latest(callback, disable_buttons=None, enable_buttons=None):
-    def task():
-        if disable_buttons:
-            disable_buttons()
-        try:
-            if not is_connected():
-                messagebox.showerror("Errore", "Connessione a Internet non disponibile.")
-                return
-            installed_result = subprocess.run([SYSTEM_PYTHON, "-m", "pip", "list", "--format=freeze"], capture_output=True, text=True, check=True)
-            outdated_result = subprocess.run([SYSTEM_PYTHON, "-m", "pip", "list", "--outdated", "--format=json"], capture_output=True, text=True, check=True)
-            installed_libraries = {}
-            for line in installed_result.stdout.strip().splitlines():
-                if '==' in line:
-                    name, version = line.split("==")
-                    installed_libraries[name.lower()] = version
-            outdated_libraries = {}
-            outdated_data = json.loads(outdated_result.stdout)
-            for package in outdated_data:
-                name = package['name'].lower()
-                latest_version = package['latest_version']
-                outdated_libraries[name] = latest_version
-            libraries = []
-            for name, version in installed_libraries.items():
-                latest_version = outdated_libraries.get(name, version)
-                libraries.append((name, version, latest_version))
-            if callback:
-                callback(libraries=libraries)
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Errore subprocess durante il recupero delle librerie: {e}")
-            logging.error(f"Stdout: {e.stdout}")
-            logging.error(f"Stderr: {e.stderr}")
-            messagebox.showerror("Errore", f"Errore durante il recupero delle librerie:\n{e.stderr}")
-        except json.JSONDecodeError as e:
-            logging.error(f"Errore di parsing JSON: {e}")
-            messagebox.showerror("Errore", f"Errore durante il parsing dei dati:\n{e}")
-        except Exception as e:
-            logging.error(f"Errore generico durante il recupero delle librerie: {e}")
-            messagebox.showerror("Errore", f"Errore durante il recupero delle librerie: {e}")
-        finally:
-            if enable_buttons:
-                enable_buttons()
-    threading.Thread(target=task).start()
+class JobsPanel(tk.Toplevel):
+    def __init__(self, parent, scheduler):
+        super().__init__(parent)
+        self.parent = parent
+        self.scheduler = scheduler
+        self.title("Attività")
+        self.geometry("700x300")
+        self.create_widgets()
+        self.refresh()
+    def create_widgets(self):
+        frame = tk.Frame(self)
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.tree = ttk.Treeview(frame, columns=("ID", "Operazione", "Stato", "Progresso", "Durata"), show="headings")
+        for column, width in (("ID", 50), ("Operazione", 280), ("Stato", 110), ("Progresso", 90), ("Durata", 80)):
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=width, anchor="w")
+        self.tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscroll=scrollbar.set)
+        scrollbar.pack(fill=tk.Y, side=tk.RIGHT)
+        button_frame = tk.Frame(self)
+        button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        cancel_button = tk.Button(button_frame, text="Annulla Attività", command=self.on_cancel_job)
+        cancel_button.pack(side=tk.LEFT, padx=5)
+        close_button = tk.Button(button_frame, text="Chiudi", command=self.destroy)
+        close_button.pack(side=tk.RIGHT, padx=5)
+    def refresh(self):
+        if not self.winfo_exists():
+            return
+        jobs = self.scheduler.snapshot()
+        job_ids = {str(job.id) for job in jobs}
+        for item in self.tree.get_children():
+            if item not in job_ids:
+                self.tree.delete(item)
+        for job in jobs:
+            progress = f"{job.progress['fraction'] * 100:.0f}%" if job.progress else ""
+            values = (job.id, job.name, job.status, progress, f"{job.elapsed():.1f} s" if job.started_at else "")
+            item = str(job.id)
+            if self.tree.exists(item):
+                self.tree.item(item, values=values)
+            else:
+                self.tree.insert("", 0, iid=item, values=values)
+        self.after(500, self.refresh)
+    def on_cancel_job(self):
+        selected_ids = set(self.tree.selection())
+        for job in self.scheduler.snapshot():
+            if str(job.id) in selected_ids:
+                self.scheduler.cancel(job)
 
-def fetch_library_description(library_name, callback, disable_buttons=None, enable_buttons=None):
-    def task():
-        if disable_buttons:
-            disable_buttons()
-        try:
-            if not is_connected():
-                callback(description="Connessione a Internet non disponibile.")
-                return
-            result = subprocess.run([SYSTEM_PYTHON, "-m", "pip", "show", library_name], capture_output=True, text=True, check=True)
-            if result.stdout:
-                details = result.stdout.strip()
-                callback(description=details)
+class PerformancePanel(tk.Toplevel):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.parent = parent
+        self.title("Prestazioni")
+        self.geometry("760x320")
+        self.create_widgets()
+        self.refresh()
+    def create_widgets(self):
+        frame = tk.Frame(self)
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.tree = ttk.Treeview(frame, columns=("Operazione", "Chiamate", "Errori", "p50", "p95", "Max"), show="headings")
+        for column, width, anchor in (("Operazione", 300, "w"), ("Chiamate", 80, "e"), ("Errori", 70, "e"), ("p50", 90, "e"), ("p95", 90, "e"), ("Max", 90, "e")):
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=width, anchor=anchor)
+        self.tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscroll=scrollbar.set)
+        scrollbar.pack(fill=tk.Y, side=tk.RIGHT)
+        button_frame = tk.Frame(self)
+        button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        reset_button = tk.Button(button_frame, text="Azzera", command=self.on_reset)
+        reset_button.pack(side=tk.LEFT, padx=5)
+        trace_label = tk.Label(button_frame, text=f"Traccia: {get_trace_path()}", anchor="w")
+        trace_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        close_button = tk.Button(button_frame, text="Chiudi", command=self.destroy)
+        close_button.pack(side=tk.RIGHT, padx=5)
+    def refresh(self):
+        if not self.winfo_exists():
+            return
+        statistics = sorted(get_span_statistics(), key=lambda item: item["p95"], reverse=True)
+        names = {item["name"] for item in statistics}
+        for item in self.tree.get_children():
+            if item not in names:
+                self.tree.delete(item)
+        for index, item in enumerate(statistics):
+            values = (item["name"], item["count"], item["errors"], format_duration(item["p50"]), format_duration(item["p95"]), format_duration(item["max"]))
+            if self.tree.exists(item["name"]):
+                self.tree.item(item["name"], values=values)
+                self.tree.move(item["name"], "", index)
             else:
-                callback(description="Nessuna descrizione disponibile per questa libreria.")
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Errore subprocess durante il recupero della descrizione di {library_name}: {e}")
-            logging.error(f"Stdout: {e.stdout}")
-            logging.error(f"Stderr: {e.stderr}")
-            callback(description=f"Nessuna descrizione disponibile o libreria non trovata.\n{e.stderr}")
-        except Exception as e:
-            logging.error(f"Errore generico durante il recupero della descrizione di {library_name}: {e}")
-            callback(description=f"Errore durante il recupero della descrizione: {e}")
-        finally:
-            if enable_buttons:
-                enable_buttons()
-    threading.Thread(target=task).start()
+                self.tree.insert("", index, iid=item["name"], values=values)
+        self.after(1000, self.refresh)
+    def on_reset(self):
+        reset_span_statistics()
+        self.tree.delete(*self.tree.get_children())
 
-def update_library(library_name, callback=None, disable_buttons=None, enable_buttons=None):
-    def task():
-        if disable_buttons:
-            disable_buttons()
-        try:
-            subprocess.run([SYSTEM_PYTHON, "-m", "pip", "install", "--upgrade", library_name], check=True, capture_output=True, text=True)
-            logging.info(f"Libreria {library_name} aggiornata con successo.")
-            if callback:
-                callback(success=True, message=f"Libreria {library_name} aggiornata con successo.")
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Errore subprocess durante l'aggiornamento di {library_name}: {e.stderr}")
-            if callback:
-                callback(success=False, message=f"Errore durante l'aggiornamento della libreria {library_name}:\n{e.stderr}")
-        except Exception as e:
-            logging.error(f"Errore generico durante l'aggiornamento di {library_name}: {e}")
-            if callback:
-                callback(success=False, message=f"Errore durante l'aggiornamento della libreria {library_name}: {e}")
-        finally:
-            if enable_buttons:
-                enable_buttons()
-    threading.Thread(target=task).start()
+class JobProgressMonitor:
+    def __init__(self, root, scheduler, progress_bar, progress_var, log_text, interval=200):
+        self.root = root
+        self.scheduler = scheduler
+        self.progress_bar = progress_bar
+        self.progress_var = progress_var
+        self.log_text = log_text
+        self.interval = interval
+        self.seen = {}
+        self.poll()
+    def poll(self):
+        jobs = self.scheduler.snapshot()
+        for job in jobs:
+            if job.log_count > self.seen.get(job.id, 0):
+                lines, count = job.read_log(self.seen.get(job.id, 0))
+                if job.id not in self.seen:
+                    lines.insert(0, f"--- [{job.id}] {job.name} ---")
+                self.seen[job.id] = count
+                self.append_log(lines)
+        running = [job for job in jobs if job.status == Job.RUNNING and job.progress]
+        if running:
+            job = running[-1]
+            self.progress_bar["value"] = job.progress["fraction"] * 100
+            self.progress_var.set(f"[{job.id}] {job.name}: {format_progress(job.progress)}")
+        elif not any(job.status == Job.RUNNING for job in jobs):
+            finished = [job for job in jobs if job.finished and job.progress]
+            self.progress_bar["value"] = 100 if finished and finished[-1].status == Job.DONE else 0
+            self.progress_var.set(f"[{finished[-1].id}] {finished[-1].name}: {finished[-1].status} in {finished[-1].elapsed():.1f} s" if finished else "Nessuna attività in corso")
+        self.root.after(self.interval, self.poll)
+    def append_log(self, lines):
+        if not lines:
+            return
+        self.log_text.config(state=tk.NORMAL)
+        self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+        line_count = int(self.log_text.index("end-1c").split(".")[0])
+        if line_count > LOG_PANE_LINES:
+            self.log_text.delete("1.0", f"{line_count - LOG_PANE_LINES + 1}.0")
+        self.log_text.see(tk.END)
+        self.log_text.config(state=tk.DISABLED)
 
-def uninstall_library(library_name, callback=None, disable_buttons=None, enable_buttons=None):
-    def task():
-        if disable_buttons:
-            disable_buttons()
-        try:
-            if library_name.lower() in ["pip", "setuptools", "wheel"]:
-                messagebox.showerror("Errore", f"Non è possibile disinstallare la libreria '{library_name}'.")
-                return
-            subprocess.run([SYSTEM_PYTHON, "-m", "pip", "uninstall", "-y", library_name], check=True, capture_output=True, text=True)
-            logging.info(f"Libreria {library_name} disinstallata con successo.")
-            if callback:
-                callback(success=True, message=f"Libreria {library_name} disinstallata con successo.")
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Errore subprocess durante la disinstallazione di {library_name}: {e.stderr}")
-            if callback:
-                callback(success=False, message=f"Errore durante la disinstallazione della libreria {library_name}:\n{e.stderr}")
-        except Exception as e:
-            logging.error(f"Errore generico durante la disinstallazione di {library_name}: {e}")
-            if callback:
-                callback(success=False, message=f"Errore durante la disinstallazione della libreria {library_name}: {e}")
-        finally:
-            if enable_buttons:
-                enable_buttons()
-    threading.Thread(target=task).start()
+class EnvironmentMatrixWindow(tk.Toplevel):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.parent = parent
+        self.title("Matrice ambienti")
+        self.geometry("1000x500")
+        self.results = {}
+        self.status_var = tk.StringVar(value="Scansione degli ambienti in corso...")
+        self.create_widgets()
+        self.started_at = time.monotonic()
+        fetch_environments(self.on_environments, on_result=self.on_result)
+    def create_widgets(self):
+        status_label = tk.Label(self, textvariable=self.status_var, anchor="w")
+        status_label.pack(fill=tk.X, padx=10, pady=(10, 0))
+        self.frame = tk.Frame(self)
+        self.frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.tree = None
+    def on_result(self, result):
+        self.results[result["python"]] = result
+        self.status_var.set(f"Ambienti analizzati: {len(self.results)}")
+    def on_environments(self, environments):
+        if not self.winfo_exists():
+            return
+        environments = [result for result in environments if not result["error"]]
+        columns = ["Libreria"] + [f"#{index + 1}" for index in range(len(environments))]
+        tree = ttk.Treeview(self.frame, columns=columns, show="headings")
+        tree.heading("Libreria", text="Libreria")
+        tree.column("Libreria", width=200, stretch=False)
+        for index, result in enumerate(environments):
+            column = columns[index + 1]
+            tree.heading(column, text=f"#{index + 1} {result['version']}")
+            tree.column(column, width=110, stretch=False)
+        y_scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=tree.yview)
+        x_scrollbar = ttk.Scrollbar(self.frame, orient="horizontal", command=tree.xview)
+        tree.configure(yscroll=y_scrollbar.set, xscroll=x_scrollbar.set)
+        y_scrollbar.pack(fill=tk.Y, side=tk.RIGHT)
+        x_scrollbar.pack(fill=tk.X, side=tk.BOTTOM)
+        tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+        names = sorted({name for result in environments for name in result["libraries"]})
+        for name in names:
+            versions = [result["libraries"].get(name, "") for result in environments]
+            distinct = {version for version in versions if version}
+            tree.insert("", "end", values=[name] + versions, tags=("red",) if len(distinct) > 1 else ())
+        tree.tag_configure("red", foreground="red")
+        self.tree = tree
+        legend = "; ".join(f"#{index + 1} = {result['python']}" for index, result in enumerate(environments))
+        self.status_var.set(f"{len(environments)} ambienti, {len(names)} librerie, scansione in {time.monotonic() - self.started_at:.1f} s. {legend}")
 
-def install_library(callback=None, disable_buttons=None, enable_buttons=None):
-    def task(library_name):
-        if disable_buttons:
-            disable_buttons()
-        try:
-            subprocess.run([SYSTEM_PYTHON, "-m", "pip", "install", library_name], check=True, capture_output=True, text=True)
-            logging.info(f"Libreria {library_name} installata con successo.")
-            if callback:
-                callback(success=True, message=f"Libreria {library_name} installata con successo.")
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Errore subprocess durante l'installazione di {library_name}: {e.stderr}")
-            if callback:
-                callback(success=False, message=f"Errore durante l'installazione della libreria {library_name}:\n{e.stderr}")
-        except Exception as e:
-            logging.error(f"Errore generico durante l'installazione di {library_name}: {e}")
-            if callback:
-                callback(success=False, message=f"Errore durante l'installazione della libreria: {e}")
-        finally:
-            if enable_buttons:
-                enable_buttons()
+class LibraryTable:
+    COLUMNS = ("Libreria", "Versione Installata", "Ultima Versione", "Richiesto da", "Dimensione")
+    def __init__(self, tree, scrollbar=None, status_var=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.status_var = status_var
+        self.rows = {}
+        self.required_by = {}
+        self.warnings = {}
+        self.vulnerabilities = {}
+        self.only_vulnerable = False
+        self.sizes = {}
+        self.sort_keys = {}
+        self.order = []
+        self.view = []
+        self.offset = 0
+        self.visible_rows = int(tree.cget("height")) or 20
+        self.slots = []
+        self.slot_names = {}
+        self.slot_values = {}
+        self.selected = set()
+        self.stale = set()
+        self.syncing_selection = False
+        self.placeholder = None
+        self.query = ""
+        self.query_cache = ("", None)
+        self.sort_column = 0
+        self.sort_descending = False
+        self.refresh_pending = False
+        tree.bind("<<TreeviewSelect>>", self.on_select)
+        tree.bind("<Configure>", self.on_configure)
+        tree.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1, "units"))
+        tree.bind("<Button-4>", lambda event: self.scroll(-1, "units"))
+        tree.bind("<Button-5>", lambda event: self.scroll(1, "units"))
+        tree.bind("<Up>", lambda event: self.on_arrow(-1))
+        tree.bind("<Down>", lambda event: self.on_arrow(1))
+        tree.bind("<Prior>", lambda event: self.scroll(-1, "pages"))
+        tree.bind("<Next>", lambda event: self.scroll(1, "pages"))
+        for index, column in enumerate(self.COLUMNS):
+            tree.heading(column, command=lambda index=index: self.sort_by(index))
+    def row_tags(self, name):
+        installed_version, latest_version = self.rows[name]
+        if name in self.stale:
+            return ("stale",)
+        if name in self.vulnerabilities:
+            return ("vulnerable",)
+        if name in self.warnings:
+            return ("warning",)
+        if latest_version is None:
+            return ("loading",)
+        return ("red",) if installed_version != latest_version else ("black",)
+    def row_values(self, name):
+        installed_version, latest_version = self.rows[name]
+        size = self.sizes.get(name)
+        return (name, installed_version, latest_version or "...", self.format_required_by(name), "..." if size is None else format_size(size))
+    def format_required_by(self, name, limit=3):
+        dependents = self.required_by.get(name, ())
+        if len(dependents) > limit:
+            return f"{', '.join(dependents[:limit])} +{len(dependents) - limit}"
+        return ", ".join(dependents)
+    def set_row(self, name, installed_version, latest_version, stale=False):
+        row = (installed_version, latest_version)
+        was_stale = name in self.stale
+        if stale:
+            self.stale.add(name)
+        else:
+            self.stale.discard(name)
+        if name not in self.rows:
+            bisect.insort(self.order, name)
+            self.query_cache = ("", None)
+        elif self.rows[name] == row and was_stale == stale:
+            return
+        self.rows[name] = row
+        latest_key = parse_version(latest_version) if latest_version else (-1,)
+        self.sort_keys[name] = (name, parse_version(installed_version), latest_key, len(self.required_by.get(name, ())), self.sizes.get(name, -1))
+        self.schedule_refresh()
+    def remove_row(self, name):
+        if name not in self.rows:
+            return
+        del self.rows[name]
+        del self.sort_keys[name]
+        del self.order[bisect.bisect_left(self.order, name)]
+        self.selected.discard(name)
+        self.stale.discard(name)
+        self.query_cache = ("", None)
+        self.schedule_refresh()
+    def set_latest(self, name, installed_version, latest_version):
+        if name in self.rows:
+            self.set_row(name, installed_version, latest_version)
+    def apply(self, libraries, stale=False):
+        with Span("ui applicazione elenco", rows=len(libraries), stale=stale):
+            names = {library[0] for library in libraries}
+            for name in [name for name in self.rows if name not in names]:
+                self.remove_row(name)
+            for name, installed_version, latest_version in libraries:
+                if latest_version is None and name in self.stale and self.rows[name][0] == installed_version:
+                    continue
+                self.set_row(name, installed_version, latest_version, stale)
+    def set_required_by(self, required_by):
+        self.required_by = required_by
+        for name in self.rows:
+            self.sort_keys[name] = self.sort_keys[name][:3] + (len(required_by.get(name, ())),) + self.sort_keys[name][4:]
+        self.schedule_refresh()
+    def set_sizes(self, sizes):
+        self.sizes = sizes
+        for name in self.rows:
+            self.sort_keys[name] = self.sort_keys[name][:4] + (self.sizes.get(name, -1),)
+        self.schedule_refresh()
+    def set_warnings(self, problems):
+        self.warnings = {}
+        self.add_warnings(problems)
+    def add_warnings(self, problems):
+        for problem in problems:
+            self.warnings.setdefault(problem["name"], []).append(problem["message"])
+        self.schedule_refresh()
+    def set_vulnerabilities(self, vulnerabilities):
+        self.vulnerabilities = vulnerabilities
+        self.schedule_refresh()
+    def set_only_vulnerable(self, only_vulnerable):
+        self.only_vulnerable = only_vulnerable
+        self.offset = 0
+        self.refresh_view()
+    def snapshot(self):
+        return dict(self.rows)
+    def set_placeholder(self, text):
+        self.placeholder = text
+        self.render()
+    def schedule_refresh(self):
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.tree.after(30, self.refresh_view)
+    def filtered_names(self):
+        query = normalize_name(self.query.strip()) if self.query.strip() else ""
+        if not query:
+            return list(self.order)
+        cached_query, cached_names = self.query_cache
+        candidates = cached_names if cached_names is not None and cached_query and cached_query in query else self.order
+        if query.startswith("^"):
+            prefix = query[1:]
+            low = bisect.bisect_left(self.order, prefix)
+            high = bisect.bisect_left(self.order, prefix + "\uffff")
+            names = self.order[low:high]
+        else:
+            names = [name for name in candidates if query in name]
+            self.query_cache = (query, names)
+        return list(names)
+    def refresh_view(self):
+        self.refresh_pending = False
+        with Span("ui aggiornamento vista", rows=len(self.rows)) as span:
+            names = self.filtered_names()
+            if self.only_vulnerable:
+                names = [name for name in names if name in self.vulnerabilities]
+            if self.sort_column:
+                column = self.sort_column
+                names.sort(key=lambda name: self.sort_keys[name][column], reverse=self.sort_descending)
+            elif self.sort_descending:
+                names.reverse()
+            self.view = names
+            if self.status_var is not None:
+                status = f"{len(self.view)} di {len(self.rows)} librerie"
+                total_size = sum(self.sizes.get(name, 0) for name in self.rows)
+                if total_size:
+                    status = f"{status}, {format_size(total_size)}"
+                vulnerable = sum(1 for name in self.vulnerabilities if name in self.rows)
+                if vulnerable:
+                    status = f"{status}, {vulnerable} vulnerabili"
+                warnings = sum(1 for name in self.warnings if name in self.rows)
+                if warnings:
+                    status = f"{status}, {warnings} con dipendenze incompatibili"
+                self.status_var.set(f"{status} (dati non aggiornati)" if self.stale else status)
+            self.render()
+            span.set(visible=len(self.view))
+    def set_filter(self, query):
+        self.query = query
+        self.offset = 0
+        self.refresh_view()
+    def sort_by(self, column):
+        if self.sort_column == column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column = column
+            self.sort_descending = False
+        for index, heading in enumerate(self.COLUMNS):
+            arrow = (" \u25bc" if self.sort_descending else " \u25b2") if index == column else ""
+            self.tree.heading(heading, text=heading + arrow)
+        self.refresh_view()
+    def render(self):
+        count = len(self.view)
+        self.offset = max(0, min(self.offset, count - self.visible_rows))
+        window = self.view[self.offset:self.offset + self.visible_rows]
+        contents = [(self.row_values(name), self.row_tags(name)) for name in window]
+        if not contents and self.placeholder:
+            contents = [((self.placeholder, "", "", "", ""), ("loading",))]
+        while len(self.slots) < len(contents):
+            self.slots.append(self.tree.insert("", "end"))
+        while len(self.slots) > len(contents):
+            slot = self.slots.pop()
+            self.slot_values.pop(slot, None)
+            self.tree.delete(slot)
+        self.slot_names = {}
+        for index, (slot, content) in enumerate(zip(self.slots, contents)):
+            if self.slot_values.get(slot) != content:
+                self.tree.item(slot, values=content[0], tags=content[1])
+                self.slot_values[slot] = content
+            if index < len(window):
+                self.slot_names[slot] = window[index]
+        selected_slots = [slot for slot, name in self.slot_names.items() if name in self.selected]
+        if set(selected_slots) != set(self.tree.selection()):
+            self.syncing_selection = True
+            self.tree.selection_set(selected_slots)
+            self.tree.after_idle(self.end_selection_sync)
+        if self.scrollbar is not None:
+            if count:
+                self.scrollbar.set(self.offset / count, min(1.0, (self.offset + self.visible_rows) / count))
+            else:
+                self.scrollbar.set(0.0, 1.0)
+    def end_selection_sync(self):
+        self.syncing_selection = False
+    def on_select(self, event=None):
+        if self.syncing_selection:
+            return
+        self.selected = {self.slot_names[slot] for slot in self.tree.selection() if slot in self.slot_names}
+    def selected_names(self):
+        return [name for name in self.view if name in self.selected]
+    def scroll(self, amount, what="units"):
+        step = self.visible_rows if what == "pages" else 1
+        self.offset += amount * step
+        self.render()
+        return "break"
+    def yview(self, *args):
+        if args and args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.view))
+            self.render()
+        elif args and args[0] == "scroll":
+            self.scroll(int(args[1]), args[2])
+    def on_arrow(self, direction):
+        if not self.slots:
+            return None
+        edge_slot = self.slots[0] if direction < 0 else self.slots[-1]
+        if self.tree.focus() != edge_slot:
+            return None
+        previous_offset = self.offset
+        self.scroll(direction)
+        if self.offset == previous_offset:
+            return "break"
+        name = self.slot_names.get(edge_slot)
+        if name:
+            self.selected = {name}
+            self.render()
+            self.tree.focus(edge_slot)
+        return "break"
+    def on_configure(self, event):
+        row_height = 20
+        header_height = 24
+        if self.slots:
+            bbox = self.tree.bbox(self.slots[0])
+            if bbox:
+                header_height, row_height = bbox[1], bbox[3]
+        visible_rows = max(1, (event.height - header_height) // max(1, row_height))
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.render()
+
+def ask_library_name():
     dialog = InstallLibraryDialog(parent=None, title="Installa Libreria")
     dialog.wait_window()
-    library_name = dialog.library_name
-    if library_name:
-        threading.Thread(target=task, args=(library_name,)).start()
+    return dialog.library_name
 
 def show_library_details(library_name):
     details_window = tk.Toplevel()
     details_window.title(f"Dettagli di {library_name}")
-    details_window.geometry("550x400")
-    details_window.resizable(False, False)
+    details_window.geometry("700x500")
     text = tk.Text(details_window, wrap=tk.WORD)
+    scrollbar = ttk.Scrollbar(details_window, orient="vertical", command=text.yview)
+    text.configure(yscrollcommand=scrollbar.set)
+    scrollbar.pack(fill=tk.Y, side=tk.RIGHT)
     text.pack(fill=tk.BOTH, expand=True)
     add_context_menu(text)
     def set_description(description):
@@ -320,6 +605,29 @@ def add_context_menu(widget):
             menu.grab_release()
     widget.bind("<Button-3>", show_menu)
 
+def format_library_list(library_names, limit=20):
+    shown = ", ".join(library_names[:limit])
+    if len(library_names) > limit:
+        shown += f" e altre {len(library_names) - limit}"
+    return shown
+
+def format_impact(impact, limit=20):
+    if not impact:
+        return ""
+    lines = [f"  {dependent} (richiede {', '.join(dependencies)})" for dependent, dependencies in list(impact.items())[:limit]]
+    if len(impact) > limit:
+        lines.append(f"  ... e altre {len(impact) - limit}")
+    return f"\n\nAttenzione: {len(impact)} librerie installate dipendono da quelle selezionate e potrebbero non funzionare più:\n" + "\n".join(lines)
+
+def format_duration(seconds):
+    return f"{seconds * 1000:.1f} ms" if seconds < 1 else f"{seconds:.2f} s"
+
+def format_problems(problems, limit=20):
+    lines = [f"  {problem['message']}" for problem in problems[:limit]]
+    if len(problems) > limit:
+        lines.append(f"  ... e altri {len(problems) - limit}")
+    return "\n".join(lines)
+
 def copy_text(widget):
     try:
         selected_text = widget.selection_get()
@@ -348,74 +656,234 @@ def update_python_installed():
     pass
 
 def create_gui():
+    try:
+        engine.get_system_python()
+    except FileNotFoundError as e:
+        root = tk.Tk()
+        root.withdraw()
+        messagebox.showerror("Errore", str(e))
+        root.destroy()
+        sys.exit(1)
     root = tk.Tk()
     root.title("Gestione Librerie Python")
-    root.minsize(1000, 650)
-    root.geometry("1000x650")
+    root.minsize(1000, 750)
+    root.geometry("1000x750")
+    get_job_scheduler().start_dispatcher(root)
+    environment_frame = tk.Frame(root)
+    environment_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+    environment_label_widget = tk.Label(environment_frame, text="Ambiente:")
+    environment_label_widget.pack(side=tk.LEFT)
+    environment_var = tk.StringVar(value=engine.get_system_python())
+    environment_combo = ttk.Combobox(environment_frame, textvariable=environment_var, state="readonly", width=80)
+    environment_combo.pack(side=tk.LEFT, padx=5)
+    add_environment_button = tk.Button(environment_frame, text="Aggiungi...", bg="lightgray", fg="black")
+    add_environment_button.pack(side=tk.LEFT, padx=5)
+    matrix_button = tk.Button(environment_frame, text="Matrice ambienti", bg="lightgray", fg="black")
+    matrix_button.pack(side=tk.LEFT, padx=5)
+    snapshot_button = tk.Menubutton(environment_frame, text="Snapshot", bg="lightgray", fg="black", relief=tk.RAISED)
+    snapshot_button.pack(side=tk.LEFT, padx=5)
+    snapshot_menu = tk.Menu(snapshot_button, tearoff=0)
+    snapshot_button.config(menu=snapshot_menu)
+    advisories_button = tk.Menubutton(environment_frame, text="Vulnerabilità", bg="lightgray", fg="black", relief=tk.RAISED)
+    advisories_button.pack(side=tk.LEFT, padx=5)
+    advisories_menu = tk.Menu(advisories_button, tearoff=0)
+    advisories_button.config(menu=advisories_menu)
+    search_frame = tk.Frame(root)
+    search_frame.pack(fill=tk.X, padx=10, pady=(5, 0))
+    search_label = tk.Label(search_frame, text="Cerca:")
+    search_label.pack(side=tk.LEFT)
+    search_var = tk.StringVar()
+    search_entry = tk.Entry(search_frame, textvariable=search_var, width=40)
+    search_entry.pack(side=tk.LEFT, padx=5)
+    add_context_menu(search_entry)
+    only_vulnerable_var = tk.BooleanVar(value=False)
+    only_vulnerable_check = tk.Checkbutton(search_frame, text="Solo vulnerabili", variable=only_vulnerable_var)
+    only_vulnerable_check.pack(side=tk.LEFT, padx=5)
+    status_var = tk.StringVar()
+    status_label = tk.Label(search_frame, textvariable=status_var, anchor="e")
+    status_label.pack(side=tk.RIGHT)
     frame = tk.Frame(root)
     frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-    tree = ttk.Treeview(frame, columns=("Libreria", "Versione Installata", "Ultima Versione"), show="headings", height=20)
+    tree = ttk.Treeview(frame, columns=LibraryTable.COLUMNS, show="headings", height=20)
     tree.heading("Libreria", text="Libreria")
     tree.heading("Versione Installata", text="Versione Installata")
     tree.heading("Ultima Versione", text="Ultima Versione")
+    tree.heading("Richiesto da", text="Richiesto da")
+    tree.heading("Dimensione", text="Dimensione")
+    tree.column("Dimensione", width=90, anchor="e", stretch=False)
     tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
     tree.tag_configure("red", foreground="red")
     tree.tag_configure("black", foreground="black")
     tree.tag_configure("loading", foreground="blue")
-    scrollbar = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
-    tree.configure(yscroll=scrollbar.set)
+    tree.tag_configure("stale", foreground="gray")
+    tree.tag_configure("warning", foreground="darkorange")
+    tree.tag_configure("vulnerable", foreground="white", background="firebrick")
+    scrollbar = ttk.Scrollbar(frame, orient="vertical")
     scrollbar.pack(fill=tk.Y, side=tk.RIGHT)
+    library_table = LibraryTable(tree, scrollbar=scrollbar, status_var=status_var)
+    scrollbar.config(command=library_table.yview)
+    search_var.trace_add("write", lambda *args: library_table.set_filter(search_var.get()))
+    only_vulnerable_check.config(command=lambda: library_table.set_only_vulnerable(only_vulnerable_var.get()))
     button_frame = tk.Frame(root)
     button_frame.pack(fill=tk.X, padx=10, pady=10)
     update_button = tk.Button(button_frame, text="Aggiorna Libreria", bg="lightblue", fg="black")
     update_button.pack(side=tk.LEFT, padx=5)
+    update_all_button = tk.Button(button_frame, text="Aggiorna tutte le obsolete", bg="lightblue", fg="black")
+    update_all_button.pack(side=tk.LEFT, padx=5)
     uninstall_button = tk.Button(button_frame, text="Disinstalla Libreria", bg="salmon", fg="black")
     uninstall_button.pack(side=tk.LEFT, padx=5)
     install_button = tk.Button(button_frame, text="Installa Libreria", bg="lightgreen", fg="black")
     install_button.pack(side=tk.LEFT, padx=5)
     refresh_button = tk.Button(button_frame, text="Aggiorna Elenco", bg="lightgray", fg="black")
     refresh_button.pack(side=tk.LEFT, padx=5)
+    orphans_button = tk.Button(button_frame, text="Librerie orfane", bg="lightgray", fg="black")
+    orphans_button.pack(side=tk.LEFT, padx=5)
+    check_button = tk.Button(button_frame, text="Verifica dipendenze", bg="lightgray", fg="black")
+    check_button.pack(side=tk.LEFT, padx=5)
     update_pip_button = tk.Button(button_frame, text="Aggiorna pip", bg="orange", fg="black")
     update_pip_button.pack(side=tk.LEFT, padx=5)
     update_python_button = tk.Button(button_frame, text="Aggiorna Python", bg="purple", fg="white")
     update_python_button.pack(side=tk.LEFT, padx=5)
+    offline_var = tk.BooleanVar(value=engine.OFFLINE_MODE)
+    offline_check = tk.Checkbutton(button_frame, text="Offline", variable=offline_var, command=lambda: set_offline_mode(offline_var.get()))
+    offline_check.pack(side=tk.LEFT, padx=5)
+    jobs_button = tk.Button(button_frame, text="Attività", bg="lightgray", fg="black")
+    jobs_button.pack(side=tk.LEFT, padx=5)
+    performance_button = tk.Button(button_frame, text="Prestazioni", bg="lightgray", fg="black")
+    performance_button.pack(side=tk.LEFT, padx=5)
     exit_button = tk.Button(button_frame, text="Esci", command=root.quit, bg="red", fg="white")
     exit_button.pack(side=tk.RIGHT, padx=5)
+    progress_frame = tk.Frame(root)
+    progress_frame.pack(fill=tk.X, padx=10)
+    progress_bar = ttk.Progressbar(progress_frame, orient="horizontal", length=250, mode="determinate", maximum=100)
+    progress_bar.pack(side=tk.LEFT, padx=5)
+    progress_var = tk.StringVar(value="Nessuna attività in corso")
+    progress_label = tk.Label(progress_frame, textvariable=progress_var, anchor="w")
+    progress_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+    log_frame = tk.Frame(root)
+    log_frame.pack(fill=tk.X, padx=10, pady=5)
+    log_text = tk.Text(log_frame, height=6, wrap=tk.NONE, state=tk.DISABLED)
+    log_scrollbar = ttk.Scrollbar(log_frame, orient="vertical", command=log_text.yview)
+    log_text.configure(yscrollcommand=log_scrollbar.set)
+    log_scrollbar.pack(fill=tk.Y, side=tk.RIGHT)
+    log_text.pack(fill=tk.X, expand=True, side=tk.LEFT)
+    add_context_menu(log_text)
+    JobProgressMonitor(root, get_job_scheduler(), progress_bar, progress_var, log_text)
     copyright_label = tk.Label(root, text="© NuAnda Seo Consulting", fg="black", anchor="e")
     copyright_label.pack(fill=tk.X, pady=5, side=tk.BOTTOM, anchor="e")
     def on_update(tree_widget):
-        selected_item = tree_widget.selection()
-        if selected_item:
-            library_name = tree_widget.item(selected_item[0], "values")[0]
-            disable_specific_buttons(['update'])
-            update_library(library_name, callback=lambda success, message: show_callback_message(success, message, enable_buttons=lambda: enable_specific_buttons(['update'])),
-                           disable_buttons=lambda: disable_specific_buttons(['update']),
-                           enable_buttons=lambda: enable_specific_buttons(['update']))
+        library_names = library_table.selected_names()
+        if len(library_names) == 1:
+            library_name = library_names[0]
+            run_preflight(library_names, 'update', lambda: update_library(
+                library_name, callback=lambda success, message: show_callback_message(success, message, enable_buttons=lambda: enable_specific_buttons(['update']), targets=[library_name]),
+                disable_buttons=lambda: disable_specific_buttons(['update']),
+                enable_buttons=lambda: enable_specific_buttons(['update'])))
+        elif library_names:
+            run_batch_update(library_names, 'update')
+    def on_update_all():
+        library_names = [name for name, (installed_version, latest_version) in library_table.rows.items() if latest_version and installed_version != latest_version]
+        if not library_names:
+            messagebox.showinfo("Librerie Aggiornate", "Tutte le librerie sono già aggiornate.", parent=root)
+            return
+        confirm = messagebox.askyesno("Conferma Aggiornamento", f"Aggiornare {len(library_names)} librerie obsolete?\n\n{format_library_list(library_names)}", parent=root)
+        if confirm:
+            run_batch_update(library_names, 'update_all')
+    def run_batch_update(library_names, button):
+        run_preflight(library_names, button, lambda: update_libraries(
+            library_names, callback=lambda success, message: show_callback_message(success, message, enable_buttons=lambda: enable_specific_buttons([button]), targets=library_names),
+            disable_buttons=lambda: disable_specific_buttons([button]),
+            enable_buttons=lambda: enable_specific_buttons([button])))
+    def run_preflight(library_names, button, proceed):
+        disable_specific_buttons([button])
+        python = engine.get_system_python()
+        def task(job):
+            try:
+                return predict_upgrade_problems(python, library_names)
+            except Exception as e:
+                logging.error(f"Errore durante la verifica dei conflitti per {', '.join(library_names)}: {e}")
+                return []
+        def on_predicted(problems):
+            if problems:
+                library_table.add_warnings(problems)
+                confirm = messagebox.askyesno("Conflitti previsti", f"L'operazione potrebbe rendere incompatibili {len(problems)} requisiti:\n\n{format_problems(problems)}\n\nProcedere comunque?",
+                                              icon="warning", parent=root)
+                if not confirm:
+                    enable_specific_buttons([button])
+                    return
+            proceed()
+        get_job_scheduler().submit("Verifica conflitti", task, environment=python, on_done=on_predicted, on_cancel=lambda: enable_specific_buttons([button]))
+    def on_check_dependencies():
+        disable_specific_buttons(['check'])
+        get_job_scheduler().submit("Verifica dipendenze", lambda job: get_dependency_graph(engine.get_system_python()).check(), environment=engine.get_system_python(),
+                                   on_done=on_dependencies_checked, on_cancel=lambda: enable_specific_buttons(['check']))
+    def on_dependencies_checked(problems):
+        enable_specific_buttons(['check'])
+        library_table.set_warnings(problems)
+        if problems:
+            messagebox.showwarning("Verifica dipendenze", f"{len(problems)} requisiti non soddisfatti:\n\n{format_problems(problems)}", parent=root)
+        else:
+            messagebox.showinfo("Verifica dipendenze", "Tutte le dipendenze installate sono compatibili.", parent=root)
     def on_uninstall(tree_widget):
-        selected_item = tree_widget.selection()
-        if selected_item:
-            library_name = tree_widget.item(selected_item[0], "values")[0]
-            confirm = messagebox.askyesno("Conferma Disinstallazione", f"Sei sicuro di voler disinstallare '{library_name}'?")
+        library_names = library_table.selected_names()
+        if len(library_names) == 1:
+            library_name = library_names[0]
+            impact = uninstall_impact(library_names, library_table.required_by)
+            confirm = messagebox.askyesno("Conferma Disinstallazione", f"Sei sicuro di voler disinstallare '{library_name}'?{format_impact(impact)}", icon="warning" if impact else "question")
             if confirm:
                 disable_specific_buttons(['uninstall'])
-                uninstall_library(library_name, callback=lambda success, message: show_callback_message(success, message, enable_buttons=lambda: enable_specific_buttons(['uninstall'])),
+                uninstall_library(library_name, callback=lambda success, message: show_callback_message(success, message, enable_buttons=lambda: enable_specific_buttons(['uninstall']), targets=[library_name]),
                                   disable_buttons=lambda: disable_specific_buttons(['uninstall']),
                                   enable_buttons=lambda: enable_specific_buttons(['uninstall']))
+        elif library_names:
+            impact = uninstall_impact(library_names, library_table.required_by)
+            confirm = messagebox.askyesno("Conferma Disinstallazione", f"Sei sicuro di voler disinstallare {len(library_names)} librerie?\n\n{format_library_list(library_names)}{format_impact(impact)}",
+                                          icon="warning" if impact else "question")
+            if confirm:
+                disable_specific_buttons(['uninstall'])
+                uninstall_libraries(library_names, callback=lambda success, message: show_callback_message(success, message, enable_buttons=lambda: enable_specific_buttons(['uninstall']), targets=library_names),
+                                    disable_buttons=lambda: disable_specific_buttons(['uninstall']),
+                                    enable_buttons=lambda: enable_specific_buttons(['uninstall']))
     def on_install(callback):
         install_button.config(state=tk.DISABLED)
-        install_library(callback=lambda success, message: show_callback_message(success, message, enable_buttons=lambda: enable_specific_buttons(['install'])),
-                        disable_buttons=lambda: disable_specific_buttons(['install']),
-                        enable_buttons=lambda: enable_specific_buttons(['install']))
+        library_name = ask_library_name()
+        if not library_name:
+            enable_specific_buttons(['install'])
+            return
+        run_preflight([library_name], 'install', lambda: install_library(
+            library_name, callback=lambda success, message: show_callback_message(success, message, enable_buttons=lambda: enable_specific_buttons(['install']), targets=[]),
+            disable_buttons=lambda: disable_specific_buttons(['install']),
+            enable_buttons=lambda: enable_specific_buttons(['install'])))
+    def on_find_orphans():
+        disable_specific_buttons(['orphans'])
+        get_job_scheduler().submit("Ricerca librerie orfane", lambda job: get_dependency_graph(engine.get_system_python()).orphans(), environment=engine.get_system_python(),
+                                   on_done=on_orphans_found, on_cancel=lambda: enable_specific_buttons(['orphans']))
+    def on_orphans_found(library_names):
+        enable_specific_buttons(['orphans'])
+        if not library_names:
+            messagebox.showinfo("Librerie orfane", "Nessuna libreria orfana trovata.", parent=root)
+            return
+        confirm = messagebox.askyesno("Librerie orfane", f"Queste {len(library_names)} librerie sono state installate come dipendenze e nessuna libreria le richiede più:\n\n"
+                                      f"{format_library_list(library_names)}\n\nDisinstallarle?", parent=root)
+        if confirm:
+            disable_specific_buttons(['uninstall'])
+            uninstall_libraries(library_names, callback=lambda success, message: show_callback_message(success, message, enable_buttons=lambda: enable_specific_buttons(['uninstall']), targets=library_names),
+                                disable_buttons=lambda: disable_specific_buttons(['uninstall']),
+                                enable_buttons=lambda: enable_specific_buttons(['uninstall']))
     def on_refresh(tree_widget):
         populate_treeview(tree_widget)
     def on_update_pip(root_window):
         disable_specific_buttons(['update_pip'])
-        update_pip(callback=lambda success, message: show_callback_message(success, message, enable_buttons=lambda: enable_specific_buttons(['update_pip'])),
+        update_pip(callback=lambda success, message: show_callback_message(success, message, enable_buttons=lambda: enable_specific_buttons(['update_pip']), targets=['pip']),
                    disable_buttons=lambda: disable_specific_buttons(['update_pip']),
                    enable_buttons=lambda: enable_specific_buttons(['update_pip']))
     def on_update_python():
+        disable_specific_buttons(['update_python'])
+        get_job_scheduler().submit("Verifica versione Python", lambda job: get_latest_python_version(), on_done=on_latest_python_version,
+                                   on_cancel=lambda: enable_specific_buttons(['update_python']))
+    def on_latest_python_version(latest_version):
+        enable_specific_buttons(['update_python'])
         current_version = get_current_python_version()
-        latest_version = get_latest_python_version()
         if latest_version:
             if is_newer_version(current_version, latest_version):
                 if os.name == 'nt':
@@ -430,27 +898,137 @@ def create_gui():
                 messagebox.showinfo("Python Aggiornato", "Hai già l'ultima versione di Python installata.", parent=root)
         else:
             messagebox.showerror("Errore", "Impossibile determinare l'ultima versione di Python.", parent=root)
-    def show_callback_message(success, message, enable_buttons=None):
+    def show_callback_message(success, message, enable_buttons=None, targets=()):
         if success:
             messagebox.showinfo("Successo", message, parent=root)
         else:
             messagebox.showerror("Errore", message, parent=root)
-        tree.selection_remove(tree.selection())
-        populate_treeview(tree)
+        populate_treeview(tree, targets=targets)
         if enable_buttons:
             enable_buttons()
     def refresh_treeview():
         populate_treeview(tree)
-    def populate_treeview(tree_widget):
-        tree_widget.delete(*tree_widget.get_children())
-        loading_item = tree_widget.insert("", "end", values=("Caricamento...", "", ""), tags=("loading",))
+    def populate_treeview(tree_widget, targets=None):
+        environment = engine.get_system_python()
+        started_at = time.perf_counter()
+        library_table.set_placeholder("Caricamento...")
+        def for_environment(func):
+            return lambda *args, **kwargs: func(*args, **kwargs) if engine.get_system_python() == environment else None
         def callback(libraries=None):
-            tree_widget.delete(loading_item)
+            library_table.set_placeholder(None)
+            record_span("ui popolamento elenco", time.perf_counter() - started_at, rows=len(libraries or ()), targets=len(targets or ()))
             if libraries is not None:
-                for library, installed_version, latest_version in libraries:
-                    color = "red" if installed_version != latest_version else "black"
-                    tree_widget.insert("", "end", values=(library, installed_version, latest_version), tags=(color,))
-        fetch_installed_libraries_with_latest(callback, disable_buttons=None, enable_buttons=None)
+                fetch_library_sizes(for_environment(library_table.set_sizes), environment)
+        previous = library_table.snapshot() if targets is not None else None
+        def on_error(message):
+            library_table.set_placeholder(None)
+            messagebox.showerror("Errore", message, parent=root)
+        fetch_installed_libraries_with_latest(for_environment(callback), disable_buttons=lambda: disable_specific_buttons(['refresh']), enable_buttons=lambda: enable_specific_buttons(['refresh']),
+                                              on_installed=for_environment(library_table.apply), on_latest=for_environment(library_table.set_latest), previous=previous, targets=targets or (),
+                                              on_error=on_error, on_dependencies=for_environment(library_table.set_required_by),
+                                              on_problems=for_environment(library_table.set_warnings), on_vulnerabilities=for_environment(library_table.set_vulnerabilities))
+    def on_libraries_changed(changes):
+        environment = changes["python"]
+        if environment != engine.get_system_python():
+            return
+        def for_environment(func):
+            return lambda *args, **kwargs: func(*args, **kwargs) if engine.get_system_python() == environment else None
+        for name in changes["removed"]:
+            library_table.remove_row(name)
+        for name, version in dict(changes["added"], **changes["changed"]).items():
+            library_table.set_row(name, version, None)
+        apply_library_changes(changes, on_latest=for_environment(library_table.set_latest), on_dependencies=for_environment(library_table.set_required_by),
+                              on_problems=for_environment(library_table.set_warnings), on_vulnerabilities=for_environment(library_table.set_vulnerabilities))
+        fetch_library_sizes(for_environment(library_table.set_sizes), environment)
+    watched_environment = None
+    def watch_environment(python):
+        nonlocal watched_environment
+        watcher = get_site_packages_watcher()
+        if watched_environment is not None:
+            watcher.unwatch(watched_environment)
+        watched_environment = python
+        watcher.watch(python, ui_callback(on_libraries_changed))
+    environment_paths = {}
+    def on_environments_found(environments):
+        environment_paths.clear()
+        for result in environments:
+            if not result["error"]:
+                environment_paths[environment_label(result)] = result["python"]
+        environment_combo["values"] = list(environment_paths)
+        for label, python in environment_paths.items():
+            if python == engine.get_system_python():
+                environment_var.set(label)
+    def on_environment_selected(event=None):
+        python = environment_paths.get(environment_var.get())
+        if python and python != engine.get_system_python():
+            set_system_python(python)
+            library_table.apply(load_inventory_snapshot(python), stale=True)
+            populate_treeview(tree)
+            watch_environment(python)
+    def on_add_environment():
+        path = filedialog.askopenfilename(title="Seleziona l'interprete Python", parent=root)
+        if path:
+            add_user_environment(path)
+            fetch_environments(on_environments_found, scan=False)
+    def on_show_matrix():
+        EnvironmentMatrixWindow(root)
+    def on_export_snapshot():
+        path = filedialog.asksaveasfilename(title="Esporta snapshot", defaultextension=".json", filetypes=[("Snapshot JSON", "*.json")], parent=root)
+        if path:
+            disable_specific_buttons(['snapshot'])
+            export_environment_snapshot(path, callback=lambda success, message: show_snapshot_message(success, message),
+                                        disable_buttons=lambda: disable_specific_buttons(['snapshot']), enable_buttons=lambda: enable_specific_buttons(['snapshot']))
+    def on_compare_snapshot():
+        path = ask_snapshot_path("Confronta con snapshot")
+        if path:
+            disable_specific_buttons(['snapshot'])
+            compare_environment_snapshot(path, callback=lambda success, message: show_snapshot_message(success, message),
+                                         disable_buttons=lambda: disable_specific_buttons(['snapshot']), enable_buttons=lambda: enable_specific_buttons(['snapshot']))
+    def on_restore_snapshot():
+        path = ask_snapshot_path("Ripristina snapshot")
+        if path:
+            disable_specific_buttons(['snapshot'])
+            plan_snapshot_restore(path, on_restore_plan)
+    def on_restore_plan(success, message, snapshot=None, plan=None):
+        enable_specific_buttons(['snapshot'])
+        if not success:
+            messagebox.showerror("Errore", message, parent=root)
+        elif not plan["install"] and not plan["uninstall"]:
+            messagebox.showinfo("Ripristina snapshot", message, parent=root)
+        elif messagebox.askyesno("Ripristina snapshot", f"{message}\n\nProcedere con il ripristino?", parent=root):
+            disable_specific_buttons(['snapshot'])
+            restore_snapshot(snapshot, callback=lambda success, message: show_callback_message(success, message, enable_buttons=lambda: enable_specific_buttons(['snapshot']), targets=None),
+                             disable_buttons=lambda: disable_specific_buttons(['snapshot']), enable_buttons=lambda: enable_specific_buttons(['snapshot']))
+    def on_import_advisories(directory=False):
+        if directory:
+            source = filedialog.askdirectory(title="Seleziona la cartella degli avvisi OSV", parent=root)
+        else:
+            source = filedialog.askopenfilename(title="Seleziona l'archivio degli avvisi OSV", filetypes=[("Avvisi OSV", "*.zip *.json")], parent=root)
+        if source:
+            disable_specific_buttons(['advisories'])
+            import_advisories(source, callback=lambda success, message: show_callback_message(success, message, enable_buttons=lambda: enable_specific_buttons(['advisories']), targets=[]),
+                              disable_buttons=lambda: disable_specific_buttons(['advisories']), enable_buttons=lambda: enable_specific_buttons(['advisories']))
+    def ask_snapshot_path(title):
+        return filedialog.askopenfilename(title=title, initialdir=get_snapshots_dir(), filetypes=[("Snapshot JSON", "*.json")], parent=root)
+    def show_snapshot_message(success, message):
+        if success:
+            messagebox.showinfo("Snapshot", message, parent=root)
+        else:
+            messagebox.showerror("Errore", message, parent=root)
+    jobs_panel = None
+    def on_show_jobs():
+        nonlocal jobs_panel
+        if jobs_panel is not None and jobs_panel.winfo_exists():
+            jobs_panel.lift()
+        else:
+            jobs_panel = JobsPanel(root, get_job_scheduler())
+    performance_panel = None
+    def on_show_performance():
+        nonlocal performance_panel
+        if performance_panel is not None and performance_panel.winfo_exists():
+            performance_panel.lift()
+        else:
+            performance_panel = PerformancePanel(root)
     def on_double_click(event):
         item = tree.selection()
         if item:
@@ -461,44 +1039,91 @@ def create_gui():
         for btn in buttons:
             if btn == 'update':
                 update_button.config(state=tk.DISABLED)
+            elif btn == 'update_all':
+                update_all_button.config(state=tk.DISABLED)
             elif btn == 'uninstall':
                 uninstall_button.config(state=tk.DISABLED)
             elif btn == 'install':
                 install_button.config(state=tk.DISABLED)
             elif btn == 'refresh':
                 refresh_button.config(state=tk.DISABLED)
+            elif btn == 'orphans':
+                orphans_button.config(state=tk.DISABLED)
+            elif btn == 'check':
+                check_button.config(state=tk.DISABLED)
             elif btn == 'update_pip':
                 update_pip_button.config(state=tk.DISABLED)
             elif btn == 'update_python':
                 update_python_button.config(state=tk.DISABLED)
+            elif btn == 'snapshot':
+                snapshot_button.config(state=tk.DISABLED)
+            elif btn == 'advisories':
+                advisories_button.config(state=tk.DISABLED)
     def enable_specific_buttons(buttons):
         for btn in buttons:
             if btn == 'update':
                 update_button.config(state=tk.NORMAL)
+            elif btn == 'update_all':
+                update_all_button.config(state=tk.NORMAL)
             elif btn == 'uninstall':
                 uninstall_button.config(state=tk.NORMAL)
             elif btn == 'install':
                 install_button.config(state=tk.NORMAL)
             elif btn == 'refresh':
                 refresh_button.config(state=tk.NORMAL)
+            elif btn == 'orphans':
+                orphans_button.config(state=tk.NORMAL)
+            elif btn == 'check':
+                check_button.config(state=tk.NORMAL)
             elif btn == 'update_pip':
                 update_pip_button.config(state=tk.NORMAL)
             elif btn == 'update_python':
                 update_python_button.config(state=tk.NORMAL)
+            elif btn == 'snapshot':
+                snapshot_button.config(state=tk.NORMAL)
+            elif btn == 'advisories':
+                advisories_button.config(state=tk.NORMAL)
     update_button.config(command=lambda: on_update(tree))
+    update_all_button.config(command=on_update_all)
     uninstall_button.config(command=lambda: on_uninstall(tree))
     install_button.config(command=lambda: on_install(callback=refresh_treeview))
     refresh_button.config(command=lambda: on_refresh(tree))
+    orphans_button.config(command=on_find_orphans)
+    check_button.config(command=on_check_dependencies)
     update_pip_button.config(command=lambda: on_update_pip(root))
     update_python_button.config(command=lambda: on_update_python())
+    jobs_button.config(command=on_show_jobs)
+    performance_button.config(command=on_show_performance)
+    snapshot_menu.add_command(label="Esporta snapshot...", command=on_export_snapshot)
+    snapshot_menu.add_command(label="Confronta con snapshot...", command=on_compare_snapshot)
+    snapshot_menu.add_command(label="Ripristina snapshot...", command=on_restore_snapshot)
+    advisories_menu.add_command(label="Importa archivio OSV...", command=on_import_advisories)
+    advisories_menu.add_command(label="Importa cartella OSV...", command=lambda: on_import_advisories(directory=True))
+    environment_combo.bind("<<ComboboxSelected>>", on_environment_selected)
+    add_environment_button.config(command=on_add_environment)
+    matrix_button.config(command=on_show_matrix)
+    fetch_environments(on_environments_found, scan=False)
     add_treeview_context_menu(tree)
     root.bind_all("<Control-c>", lambda event: copy_selection(tree))
     root.bind_all("<Control-v>", lambda event: paste_selection(tree))
     root.bind_all("<Control-C>", lambda event: copy_selection(tree))
     root.bind_all("<Control-V>", lambda event: paste_selection(tree))
-    populate_treeview(tree)
+    library_table.apply(load_inventory_snapshot(engine.get_system_python()), stale=True)
+    library_table.refresh_view()
+    root.after_idle(lambda: report_first_paint(root))
+    root.after_idle(lambda: populate_treeview(tree))
+    root.after_idle(lambda: watch_environment(engine.get_system_python()))
     root.mainloop()
 
+def report_first_paint(root):
+    root.update_idletasks()
+    elapsed = (time.perf_counter() - STARTED_AT) * 1000
+    logging.info(f"Primo disegno dell'interfaccia in {elapsed:.0f} ms")
+    record_span("ui primo disegno", elapsed / 1000, level=logging.WARNING if elapsed > FIRST_PAINT_BUDGET_MS else logging.INFO, budget_ms=FIRST_PAINT_BUDGET_MS)
+    if elapsed > FIRST_PAINT_BUDGET_MS:
+        logging.warning(f"Primo disegno oltre il limite di {FIRST_PAINT_BUDGET_MS} ms: {elapsed:.0f} ms")
+    return elapsed
+
 def add_treeview_context_menu(tree_widget):
     menu = tk.Menu(tree_widget, tearoff=0)
     menu.add_command(label="Copia", command=lambda: copy_treeview_selection(tree_widget))
@@ -512,8 +1137,8 @@ def add_treeview_context_menu(tree_widget):
 def copy_treeview_selection(tree_widget):
     selected_item = tree_widget.selection()
     if selected_item:
-        library_name, installed_version, latest_version = tree_widget.item(selected_item[0], "values")
-        copy_text_to_clipboard(f"Libreria: {library_name}\nVersione Installata: {installed_version}\nUltima Versione: {latest_version}")
+        values = tree_widget.item(selected_item[0], "values")
+        copy_text_to_clipboard("\n".join(f"{column}: {value}" for column, value in zip(LibraryTable.COLUMNS, values)))
 
 def copy_text_to_clipboard(text):
     try:
@@ -532,56 +1157,6 @@ def copy_selection(tree_widget):
 def paste_selection(tree_widget):
     pass
 
-def get_current_python_version():
-    return sys.version.split()[0]
-
-def get_latest_python_version():
-    try:
-        response = requests.get("https://www.python.org/downloads/", timeout=10)
-        if response.status_code == 200:
-            match = re.search(r'Python (\d+\.\d+\.\d+)', response.text)
-            if match:
-                return match.group(1)
-        logging.error(f"Impossibile recuperare l'ultima versione di Python. Status Code: {response.status_code}")
-    except Exception as e:
-        logging.error(f"Errore durante il recupero dell'ultima versione di Python: {e}")
-    return None
-
-def is_newer_version(current_version, latest_version):
-    def version_tuple(v):
-        return tuple(map(int, (v.split("."))))
-    return version_tuple(latest_version) > version_tuple(current_version)
-
-def download_python_installer(version, download_path):
-    try:
-        url = f"https://www.python.org/ftp/python/{version}/python-{version}-amd64.exe"
-        response = requests.get(url, stream=True, timeout=30)
-        if response.status_code == 200:
-            with open(download_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            logging.info(f"Installer scaricato correttamente in {download_path}")
-            return True
-        else:
-            logging.error(f"Impossibile scaricare l'installer di Python. Status Code: {response.status_code}")
-    except Exception as e:
-        logging.error(f"Errore durante il download dell'installer di Python: {e}")
-    return False
-
-def run_installer(installer_path):
-    try:
-        if os.name == 'nt':
-            subprocess.Popen([installer_path], shell=True)
-        elif sys.platform == 'darwin':
-            subprocess.Popen(['open', installer_path])
-        else:
-            subprocess.Popen(['chmod', '+x', installer_path])
-            subprocess.Popen([installer_path])
-        logging.info(f"Installer avviato: {installer_path}")
-        return True
-    except Exception as e:
-        logging.error(f"Errore durante l'esecuzione dell'installer: {e}")
-    return False
-
 if __name__ == "__main__":
+    configure_logging()
     create_gui()
@@ -0,0 +1,121 @@
+import os
+import sys
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+FILENAME = "python-installer.bin"
+
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)
+from synthetic import FakeIndex
+
+class DownloadCheck:
+    def __init__(self, engine, index, url, data, directory, chunk_size):
+        self.engine = engine
+        self.index = index
+        self.url = url
+        self.data = data
+        self.destination = os.path.join(directory, FILENAME)
+        self.chunk_size = chunk_size
+        self.chunks = (len(data) + chunk_size - 1) // chunk_size
+        self.failures = []
+    def verify(self, condition, message):
+        sys.stderr.write(f"{'OK' if condition else 'ERRORE'}: {message}\n")
+        if not condition:
+            self.failures.append(message)
+        return condition
+    def download(self, job=None, expected_hash=None):
+        return self.engine.download_file(self.url, self.destination, expected_hash=expected_hash, job=job, chunk_size=self.chunk_size)
+    def completed_chunks(self):
+        state = self.engine.read_download_state(self.destination + ".part.json")
+        return len(state.get("done", [])) if state else 0
+    def check_interrupt(self, throttle):
+        scheduler = self.engine.get_job_scheduler()
+        self.index.throttle = throttle
+        job = scheduler.submit("Download interrotto", lambda job: self.download(job=job))
+        deadline = time.monotonic() + 30
+        while self.completed_chunks() < 2 and not job.finished and time.monotonic() < deadline:
+            time.sleep(0.01)
+        scheduler.cancel(job)
+        job.wait(30)
+        self.index.throttle = 0.0
+        completed = self.completed_chunks()
+        self.verify(job.status == job.CANCELLED, f"download interrotto con stato '{job.status}'")
+        self.verify(0 < completed < self.chunks, f"{completed} di {self.chunks} blocchi conservati dopo l'interruzione")
+        self.verify(not os.path.exists(self.destination) and os.path.exists(self.destination + ".part"), "file parziale conservato, destinazione non creata")
+        return completed
+    def check_resume(self, completed):
+        before = self.index.range_requests
+        self.download(expected_hash=("sha256", hashlib.sha256(self.data).hexdigest()))
+        fetched = self.index.range_requests - before - 1
+        self.verify(fetched == self.chunks - completed, f"ripresa con {fetched} blocchi scaricati su {self.chunks - completed} mancanti")
+        with open(self.destination, "rb") as f:
+            self.verify(f.read() == self.data, "contenuto ripreso identico all'originale")
+        self.verify(not os.path.exists(self.destination + ".part") and not os.path.exists(self.destination + ".part.json"), "file parziale e stato rimossi")
+    def check_mismatch(self):
+        os.remove(self.destination)
+        try:
+            self.download(expected_hash=("sha256", hashlib.sha256(self.data + b"x").hexdigest()))
+        except ValueError as e:
+            self.verify("non corrispondente" in str(e), f"hash SHA-256 errato segnalato: {e}")
+        else:
+            self.verify(False, "hash SHA-256 errato non segnalato")
+        self.verify(not os.path.exists(self.destination) and not os.path.exists(self.destination + ".part"), "nessun file lasciato dopo un hash errato")
+    def check_transient_failures(self):
+        self.index.download_failures = ["503", "reset", "503", "reset"]
+        self.download(expected_hash=("sha256", hashlib.sha256(self.data).hexdigest()))
+        self.verify(not self.index.download_failures, "risposte 503 e connessioni interrotte superate con nuovi tentativi")
+        with open(self.destination, "rb") as f:
+            self.verify(f.read() == self.data, "contenuto identico all'originale dopo i nuovi tentativi")
+    def check_published_hash(self):
+        result = self.engine.download_python_installer(self.url, self.destination)
+        self.verify(result["success"] and result["verified"], f"installer verificato con l'hash pubblicato: {result['message']}")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Verifica download a blocchi, ripresa e controllo SHA-256 su un server locale con supporto Range.")
+    parser.add_argument("--size-mb", type=float, default=8.0, help="dimensione del file scaricato in MB (predefinita: 8)")
+    parser.add_argument("--chunk-kb", type=int, default=512, help="dimensione di ciascun blocco in KB (predefinita: 512)")
+    parser.add_argument("--throttle-ms", type=float, default=20.0, help="pausa del server ogni 64 KB durante l'interruzione (predefinita: 20 ms)")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "pythonlibs-download-check"),
+                        help="cartella di lavoro per cache e file scaricati")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    workdir = os.path.abspath(args.workdir)
+    shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(os.path.join(workdir, "downloads"))
+    index = FakeIndex([]).start()
+    os.environ.update({
+        "PYLIBS_CACHE_DIR": os.path.join(workdir, "cache"),
+        "PYLIBS_TRACE_FILE": os.path.join(workdir, "trace.ndjson"),
+        "PYLIBS_CONNECTIVITY_URL": index.url,
+        "PYLIBS_HTTP_BACKOFF": "0.05",
+    })
+    os.chdir(workdir)
+    import pythonlibs_engine as engine
+    engine.configure_logging()
+    data = os.urandom(int(args.size_mb * 1024 * 1024) + 123)
+    url = index.add_download(FILENAME, data)
+    check = DownloadCheck(engine, index, url, data, os.path.join(workdir, "downloads"), args.chunk_kb * 1024)
+    try:
+        completed = check.check_interrupt(args.throttle_ms / 1000)
+        check.check_resume(completed)
+        check.check_mismatch()
+        check.check_transient_failures()
+        check.check_published_hash()
+    finally:
+        index.stop()
+    if check.failures:
+        sys.stderr.write(f"{len(check.failures)} verifiche non riuscite.\n")
+        return 1
+    sys.stderr.write("Tutte le verifiche del download sono riuscite.\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
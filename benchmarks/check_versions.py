@@ -0,0 +1,129 @@
+import os
+import sys
+import argparse
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+
+sys.path.insert(0, REPO_DIR)
+
+SPECIFIER_CASES = [
+    ("1.0+cu118", "<=1.0", True),
+    ("1.0+cu118", ">=1.0", True),
+    ("1.0+cu118", "==1.0", True),
+    ("1.0+cu118", "!=1.0", False),
+    ("1.0+cu118", ">1.0", False),
+    ("1.0+cu118", "<1.0", False),
+    ("1.0+cu118", "==1.0+cu117", False),
+    ("2.1.0+cu118", "<=2.1", True),
+    ("2.1.0+cu118", ">2.1", False),
+    ("2.1.0+cu118", ">=2.1,<2.2", True),
+    ("1.0.post1", ">1.0", False),
+    ("1.0.post1.dev1", ">1.0", False),
+    ("1.0.post2", ">1.0.post1", True),
+    ("1.0.post1+x", ">1.0.post1", False),
+    ("1.0rc1.post1", ">1.0rc1", False),
+    ("1.0rc2", ">1.0rc1", True),
+    ("1.0.post1", ">1.0rc1", True),
+    ("1.0", ">1.0.dev1", True),
+    ("1.0.dev2", ">1.0.dev1", True),
+    ("1.0.dev1+x", ">1.0.dev1", False),
+    ("1.1", ">1.0", True),
+    ("1.0rc1", "<1.0", False),
+    ("1.0.dev1", "<1.0", False),
+    ("0.9+x", "<1.0", True),
+    ("0.9", "<1.0", True),
+    ("1.0", "<1.0.post1", True),
+    ("1.0+x", "<1.0.post1", True),
+    ("1.0.post1.dev1", "<1.0.post1", False),
+    ("1.0a1", "<1.0rc1", True),
+    ("1.0rc1.dev1", "<1.0rc1", True),
+    ("1.0.dev0", "<1.0.dev1", True),
+    ("1!1.0", "~=1.0", False),
+    ("1!1.0", "~=1!1.0", True),
+    ("1!1.5", "~=1!1.0", True),
+    ("1!2.0", "~=1!1.0", False),
+    ("1.4.5", "~=1.4.2", True),
+    ("1.5", "~=1.4.2", False),
+    ("1.4.5+x", "~=1.4.2", True),
+    ("1!1.0.3", "==1.0.*", False),
+    ("1!1.0.3", "==1!1.0.*", True),
+    ("1.0.3", "==1!1.0.*", False),
+    ("1!1.0.3", "!=1.0.*", True),
+    ("1.0", "==1.0.0.*", True),
+    ("1.0.3+x", "==1.0.*", True),
+    ("1.01", "==1.1", True),
+    ("2!1.0", ">1!9.0", True),
+    ("1.0.0", "===1.0", False),
+]
+
+MARKER_ENVIRONMENT = {
+    "python_version": "3.11",
+    "python_full_version": "3.11.7",
+    "implementation_name": "cpython",
+    "implementation_version": "3.11.7",
+    "platform_python_implementation": "CPython",
+    "sys_platform": "linux",
+    "platform_system": "Linux",
+    "platform_machine": "x86_64",
+    "platform_release": "6.1.0",
+    "platform_version": "#1 SMP",
+    "os_name": "posix",
+}
+
+MARKER_CASES = [
+    ('python_version == "3.11.*"', True),
+    ('python_version != "3.11.*"', False),
+    ('python_version == "3.*"', True),
+    ('python_full_version == "3.11.*"', True),
+    ('implementation_version == "3.10.*"', False),
+    ('python_version ~= "3.10"', True),
+    ('python_version ~= "3.12"', False),
+    ('python_full_version ~= "3.11.2"', True),
+    ('python_full_version < "3.11"', False),
+    ('python_full_version > "3.11"', True),
+    ('"3.8" < python_version', True),
+    ('python_version >= "3.8" and sys_platform == "linux"', True),
+    ('python_version < "3.11" or os_name == "nt"', False),
+    ('python_version in "3.10 3.11"', True),
+]
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Verifica il confronto delle versioni PEP 440 su una tabella di casi noti.")
+    parser.add_argument("--no-packaging", action="store_true", help="non confrontare i risultati con la libreria packaging")
+    return parser
+
+def verify(failures, condition, message):
+    sys.stderr.write(f"{'OK' if condition else 'ERRORE'}: {message}\n")
+    if not condition:
+        failures.append(message)
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    import pythonlibs_engine as engine
+    specifier = None
+    if not args.no_packaging:
+        try:
+            from packaging.specifiers import SpecifierSet as specifier
+            from packaging.markers import Marker as marker
+        except ImportError:
+            sys.stderr.write("packaging non disponibile: confronto saltato.\n")
+    failures = []
+    for version, spec, expected in SPECIFIER_CASES:
+        verify(failures, engine.specifier_matches(version, spec) == expected, f"{version} {spec} -> {expected}")
+        if specifier is not None:
+            reference = specifier(spec).contains(version, prereleases=True)
+            verify(failures, reference == expected, f"{version} {spec} -> {expected} secondo packaging")
+    for condition, expected in MARKER_CASES:
+        verify(failures, engine.evaluate_marker(condition, dict(MARKER_ENVIRONMENT, extra="")) == expected, f"{condition} -> {expected}")
+        if specifier is not None:
+            reference = marker(condition).evaluate(dict(MARKER_ENVIRONMENT, extra=""))
+            verify(failures, reference == expected, f"{condition} -> {expected} secondo packaging")
+    if failures:
+        sys.stderr.write(f"{len(failures)} verifiche non riuscite.\n")
+        return 1
+    sys.stderr.write("Tutte le verifiche delle versioni sono riuscite.\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import importlib.util
+from datetime import datetime, timezone
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_SIZES = "100,1000,10000"
+DETAILS_LOOKUPS = 20
+BATCH_SIZE = 10
+BATCH_ENVIRONMENT_SIZE = 100
+DEFAULT_RATIO = 1.5
+DEFAULT_SLACK_MS = 5.0
+
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)
+from synthetic import FakeIndex, create_environment, generate_packages, install_package, remove_package, site_packages_of
+
+class HeadlessTree:
+    def __init__(self, height=25):
+        self.height = height
+        self.items = {}
+        self.order = []
+        self.selected = ()
+        self.focused = ""
+        self.pending = []
+        self.counter = 0
+    def cget(self, option):
+        return self.height
+    def bind(self, *args):
+        pass
+    def heading(self, *args, **kwargs):
+        pass
+    def insert(self, parent, index, values=(), tags=()):
+        self.counter += 1
+        item = f"I{self.counter}"
+        self.items[item] = (values, tags)
+        self.order.append(item)
+        return item
+    def item(self, item, values=None, tags=None, **kwargs):
+        if values is None:
+            return {"values": self.items[item][0]}
+        self.items[item] = (values, tags)
+    def delete(self, *items):
+        for item in items:
+            self.order.remove(item)
+            del self.items[item]
+    def selection(self):
+        return self.selected
+    def selection_set(self, items):
+        self.selected = tuple(items)
+    def focus(self, item=None):
+        if item is None:
+            return self.focused
+        self.focused = item
+    def bbox(self, item):
+        return (0, 0, 100, 20)
+    def after(self, delay, func):
+        self.pending.append(func)
+    def after_idle(self, func):
+        self.pending.append(func)
+    def update(self):
+        while self.pending:
+            self.pending.pop(0)()
+
+def load_gui():
+    spec = importlib.util.spec_from_file_location("pythonlibs_gui", os.path.join(REPO_DIR, "PythonLibs v3.py"))
+    gui = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gui)
+    return gui
+
+def create_tree(gui):
+    try:
+        root = gui.tk.Tk()
+        root.withdraw()
+        return gui.ttk.Treeview(root, columns=gui.LibraryTable.COLUMNS, show="headings", height=25), "tk"
+    except gui.tk.TclError:
+        return HeadlessTree(), "headless"
+
+def summarize(samples, **extra):
+    ordered = sorted(samples)
+    return dict({"median": statistics.median(ordered), "p95": ordered[max(0, -(-len(ordered) * 95 // 100) - 1)], "min": ordered[0], "samples": samples}, **extra)
+
+class BenchmarkRun:
+    def __init__(self, engine, index, repeat, log=None):
+        self.engine = engine
+        self.index = index
+        self.repeat = repeat
+        self.log = log or sys.stderr
+        self.results = {}
+    def record(self, name, samples, **extra):
+        self.results[name] = summarize(samples, **extra)
+        self.log.write(f"{name:<32} mediana {self.results[name]['median'] * 1000:10.1f} ms   p95 {self.results[name]['p95'] * 1000:10.1f} ms\n")
+        self.log.flush()
+    def measure(self, name, func, setup=None, repeat=None, **extra):
+        samples = []
+        for _ in range(repeat or self.repeat):
+            if setup is not None:
+                setup()
+            started_at = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - started_at)
+        self.record(name, samples, **extra)
+    def wait(self, job, outcome):
+        job.wait()
+        if job.error:
+            raise RuntimeError(f"{job.name}: {job.error}")
+        if outcome.get("error"):
+            raise RuntimeError(f"{job.name}: {outcome['error']}")
+        return outcome
+    def refresh(self, expected):
+        outcome = {}
+        def callback(libraries=None):
+            outcome["libraries"] = libraries
+        def on_error(message):
+            outcome["error"] = message
+        job = self.engine.fetch_installed_libraries_with_latest(callback, index_url=self.index.json_url, on_error=on_error)
+        libraries = self.wait(job, outcome).get("libraries") or []
+        if len(libraries) != expected:
+            raise RuntimeError(f"attese {expected} librerie, trovate {len(libraries)}")
+        return libraries
+    def run_refresh(self, size):
+        engine = self.engine
+        cache = engine.get_index_cache()
+        self.measure(f"refresh_cold[{size}]", lambda: self.refresh(size), setup=cache.clear)
+        self.measure(f"refresh_warm[{size}]", lambda: self.refresh(size))
+        ttl = engine.CACHE_TTL
+        engine.CACHE_TTL = 0
+        try:
+            self.measure(f"refresh_revalidate[{size}]", lambda: self.refresh(size))
+        finally:
+            engine.CACHE_TTL = ttl
+        return self.refresh(size)
+    def run_scan(self, size, python_executable):
+        self.engine.get_interpreter_info(python_executable)
+        self.measure(f"scan[{size}]", lambda: self.engine.scan_installed_distributions(python_executable))
+    def run_table(self, size, gui, libraries, required_by):
+        tree, backend = create_tree(gui)
+        tables = []
+        def setup():
+            tables[:] = [gui.LibraryTable(tree)]
+        def populate():
+            table = tables[0]
+            table.apply(libraries)
+            table.set_required_by(required_by)
+            table.refresh_view()
+            tree.update()
+        def filter_and_sort():
+            table = tables[0]
+            table.set_filter("pkg-001")
+            table.sort_by(2)
+            table.set_filter("")
+            tree.update()
+        self.measure(f"table_populate[{size}]", populate, setup=setup, backend=backend)
+        self.measure(f"table_filter_sort[{size}]", filter_and_sort, backend=backend)
+        if backend == "tk":
+            tree.winfo_toplevel().destroy()
+    def run_details(self, size, packages, seed):
+        names = [package["name"] for package in random.Random(seed).sample(packages, min(DETAILS_LOOKUPS, len(packages)))]
+        samples = []
+        for name in names:
+            outcome = {}
+            def callback(description=None):
+                outcome["description"] = description
+            started_at = time.perf_counter()
+            self.wait(self.engine.fetch_library_description(name, callback), outcome)
+            samples.append(time.perf_counter() - started_at)
+            if name not in (outcome.get("description") or ""):
+                raise RuntimeError(f"dettagli non trovati per {name}")
+        self.record(f"details[{size}]", samples)
+    def run_sizes(self, size, python_executable):
+        engine = self.engine
+        cache_path = engine.get_size_cache_path()
+        def compute():
+            outcome = {}
+            def on_sizes(sizes):
+                outcome["sizes"] = sizes
+            sizes = self.wait(engine.fetch_library_sizes(on_sizes, python_executable), outcome).get("sizes") or {}
+            if len(sizes) != size or not all(sizes.values()):
+                raise RuntimeError(f"dimensioni calcolate per {len(sizes)} librerie su {size}")
+        def forget_cache():
+            engine._size_cache = None
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+        def reload_cache():
+            engine._size_cache = None
+        self.measure(f"sizes_cold[{size}]", compute, setup=forget_cache)
+        if not os.path.exists(cache_path):
+            raise RuntimeError(f"cache delle dimensioni non salvata in {cache_path}")
+        self.measure(f"sizes_warm[{size}]", compute, setup=reload_cache)
+    def run_graph(self, size, python_executable, outdated):
+        engine = self.engine
+        distributions = engine.scan_installed_distributions(python_executable)
+        markers = engine.get_interpreter_info(python_executable)["markers"]
+        graphs = []
+        def build():
+            graph = engine.DependencyGraph(markers)
+            graph.sync(distributions)
+            graphs[:] = [graph]
+        self.measure(f"graph_build[{size}]", build)
+        graph = graphs[0]
+        self.measure(f"graph_check[{size}]", graph.check)
+        self.measure(f"upgrade_order[{size}]", lambda: graph.upgrade_order(outdated))
+        self.measure(f"predict_upgrade[{size}]", lambda: engine.predict_upgrade_problems(python_executable, outdated, index_url=self.index.json_url))
+        return graph.required_by_map()
+    def run_batch(self, python_executable, packages):
+        engine = self.engine
+        site_packages = site_packages_of(python_executable)
+        targets = [package for package in packages if package["latest"] != package["version"]][:BATCH_SIZE]
+        names = [package["name"] for package in targets]
+        def reset():
+            for package in targets:
+                remove_package(site_packages, package)
+                install_package(site_packages, package)
+        def run(operation):
+            outcome = {}
+            def callback(success=None, message=None):
+                if not success:
+                    outcome["error"] = message
+            self.wait(operation(names, callback), outcome)
+        self.measure(f"batch_upgrade[{BATCH_SIZE}]", lambda: run(engine.update_libraries), setup=reset)
+        self.measure(f"batch_uninstall[{BATCH_SIZE}]", lambda: run(engine.uninstall_libraries), setup=reset)
+        reset()
+
+def compare_with_baseline(results, baseline):
+    regressions = []
+    for name, result in sorted(results.items()):
+        reference = baseline.get("results", {}).get(name)
+        if reference is None or reference.get("backend") != result.get("backend"):
+            continue
+        if result["median"] > reference["limit"]:
+            regressions.append({"name": name, "median": result["median"], "baseline": reference["median"], "limit": reference["limit"]})
+    return regressions
+
+def build_baseline(document, ratio, slack):
+    results = {}
+    for name, result in document["results"].items():
+        entry = {"median": round(result["median"], 6), "limit": round(max(result["median"] * ratio, result["median"] + slack), 6)}
+        if "backend" in result:
+            entry["backend"] = result["backend"]
+        results[name] = entry
+    return dict({key: value for key, value in document.items() if key not in ("results", "spans")}, ratio=ratio, slack=slack, results=results)
+
+def read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def write_json(path, document):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark di Gestione Librerie Python su ambienti sintetici e un indice locale simulato.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"numero di librerie degli ambienti sintetici (predefinito: {DEFAULT_SIZES})")
+    parser.add_argument("--repeat", type=int, default=3, help="ripetizioni di ogni misura (predefinito: 3)")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="latenza simulata dell'indice per richiesta (predefinita: 20 ms)")
+    parser.add_argument("--seed", type=int, default=0, help="seme per la generazione degli ambienti")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "pythonlibs-benchmarks"),
+                        help="cartella per ambienti sintetici, cache e traccia (gli ambienti vengono riutilizzati tra le esecuzioni)")
+    parser.add_argument("--skip-batch", action="store_true", help="salta aggiornamento e disinstallazione con pip")
+    parser.add_argument("--output", help="file JSON in cui salvare i risultati")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="file JSON di riferimento con le soglie")
+    parser.add_argument("--update-baseline", action="store_true", help="sovrascrive il riferimento con i risultati di questa esecuzione")
+    parser.add_argument("--ratio", type=float, default=DEFAULT_RATIO, help=f"rapporto massimo rispetto al riferimento (predefinito: {DEFAULT_RATIO})")
+    parser.add_argument("--slack-ms", type=float, default=DEFAULT_SLACK_MS, help=f"margine assoluto minimo in ms (predefinito: {DEFAULT_SLACK_MS})")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    workdir = os.path.abspath(args.workdir)
+    output_path = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.baseline)
+    cache_dir = os.path.join(workdir, "cache")
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.makedirs(cache_dir)
+    index = FakeIndex([], latency=args.latency_ms / 1000).start()
+    os.environ.update({
+        "PYLIBS_CACHE_DIR": cache_dir,
+        "PYLIBS_TRACE_FILE": os.path.join(workdir, "trace.ndjson"),
+        "PYLIBS_CONNECTIVITY_URL": index.url,
+        "PIP_INDEX_URL": index.simple_url,
+        "PIP_DISABLE_PIP_VERSION_CHECK": "1",
+        "PIP_NO_INPUT": "1",
+    })
+    os.chdir(workdir)
+    import pythonlibs_engine as engine
+    engine.configure_logging()
+    gui = load_gui()
+    run = BenchmarkRun(engine, index, args.repeat)
+    try:
+        for size in sizes:
+            packages = generate_packages(size, args.seed)
+            index.packages.update((package["name"], package) for package in packages)
+            sys.stderr.write(f"Ambiente sintetico con {size} librerie...\n")
+            python_executable = create_environment(os.path.join(workdir, f"env-{size}"), packages)
+            engine.set_system_python(python_executable)
+            outdated = [package["name"] for package in packages if package["latest"] != package["version"]]
+            run.run_scan(size, python_executable)
+            libraries = run.run_refresh(size)
+            required_by = run.run_graph(size, python_executable, outdated)
+            run.run_table(size, gui, libraries, required_by)
+            run.run_details(size, packages, args.seed)
+            run.run_sizes(size, python_executable)
+        if not args.skip_batch:
+            packages = generate_packages(BATCH_ENVIRONMENT_SIZE, args.seed)
+            index.packages.update((package["name"], package) for package in packages)
+            sys.stderr.write(f"Ambiente con pip e {BATCH_ENVIRONMENT_SIZE} librerie per le operazioni di gruppo...\n")
+            python_executable = create_environment(os.path.join(workdir, "env-batch"), packages, with_pip=True)
+            engine.set_system_python(python_executable)
+            run.run_batch(python_executable, packages)
+    finally:
+        index.stop()
+    document = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {"sizes": sizes, "repeat": args.repeat, "latency_ms": args.latency_ms, "seed": args.seed, "resolver_workers": engine.RESOLVER_MAX_WORKERS},
+        "results": run.results,
+        "spans": engine.get_span_statistics(),
+    }
+    if output_path:
+        write_json(output_path, document)
+    if args.update_baseline:
+        write_json(baseline_path, build_baseline(document, args.ratio, args.slack_ms / 1000))
+        sys.stderr.write(f"Riferimento aggiornato: {baseline_path}\n")
+        return 0
+    baseline = read_json(baseline_path)
+    if baseline is None:
+        sys.stderr.write(f"Nessun riferimento in {baseline_path}: usare --update-baseline per crearlo.\n")
+        return 0
+    regressions = compare_with_baseline(run.results, baseline)
+    for regression in regressions:
+        sys.stderr.write(f"Regressione: {regression['name']} mediana {regression['median'] * 1000:.1f} ms, "
+                         f"riferimento {regression['baseline'] * 1000:.1f} ms, limite {regression['limit'] * 1000:.1f} ms\n")
+    if not regressions:
+        sys.stderr.write("Nessuna regressione rispetto al riferimento.\n")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+import os
+import io
+import sys
+import json
+import time
+import base64
+import random
+import re
+import hashlib
+import zipfile
+import threading
+import subprocess
+import http.server
+from urllib.parse import urlsplit
+
+INSTALLED_VERSION = "1.0.0"
+LATEST_VERSION = "1.1.0"
+FAN_OUT_CHOICES = (0, 1, 2, 3, 4, 5, 8)
+FAN_OUT_WEIGHTS = (30, 20, 18, 12, 8, 7, 5)
+OUTDATED_FRACTION = 0.25
+REQUESTED_FRACTION = 0.3
+DOWNLOAD_BLOCK_SIZE = 64 * 1024
+
+def package_name(index):
+    return f"synth-pkg-{index:05d}"
+
+def generate_packages(count, seed=0):
+    rng = random.Random(seed)
+    packages = []
+    popularity = [1.0 / (index + 1) for index in range(count)]
+    for index in range(count):
+        requires = []
+        if index:
+            fan_out = min(index, rng.choices(FAN_OUT_CHOICES, FAN_OUT_WEIGHTS)[0])
+            dependencies = set()
+            while len(dependencies) < fan_out:
+                dependencies.add(rng.choices(range(index), popularity[:index])[0])
+            for dependency in sorted(dependencies):
+                kind = rng.random()
+                if kind < 0.6:
+                    requires.append(f"{package_name(dependency)}>=1.0")
+                elif kind < 0.8:
+                    requires.append(f"{package_name(dependency)}<2,>=1.0")
+                elif kind < 0.9:
+                    requires.append(f'{package_name(dependency)}>=1.0; python_version >= "3.8"')
+                else:
+                    requires.append(f'{package_name(dependency)}; extra == "test"')
+        packages.append({
+            "name": package_name(index),
+            "version": INSTALLED_VERSION,
+            "latest": LATEST_VERSION if rng.random() < OUTDATED_FRACTION else INSTALLED_VERSION,
+            "requires": requires,
+            "requested": rng.random() < REQUESTED_FRACTION,
+        })
+    return packages
+
+def metadata_text(name, version, requires):
+    lines = ["Metadata-Version: 2.1", f"Name: {name}", f"Version: {version}", f"Summary: Pacchetto sintetico {name}", "License: MIT", "Requires-Python: >=3.8"]
+    if any("extra ==" in requirement for requirement in requires):
+        lines.append("Provides-Extra: test")
+    lines.extend(f"Requires-Dist: {requirement}" for requirement in requires)
+    return "\n".join(lines) + "\n\n"
+
+def record_hash(data):
+    return "sha256=" + base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b"=").decode()
+
+def distribution_files(package, version, installed=False):
+    module = package["name"].replace("-", "_")
+    dist_info = f"{module}-{version}.dist-info"
+    files = {
+        f"{module}/__init__.py": f"__version__ = \"{version}\"\n".encode(),
+        f"{dist_info}/METADATA": metadata_text(package["name"], version, package["requires"]).encode(),
+        f"{dist_info}/WHEEL": b"Wheel-Version: 1.0\nGenerator: pythonlibs-benchmark\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+    }
+    if installed:
+        files[f"{dist_info}/INSTALLER"] = b"pip\n"
+        if package["requested"]:
+            files[f"{dist_info}/REQUESTED"] = b""
+    record = "".join(f"{path},{record_hash(data)},{len(data)}\n" for path, data in files.items()) + f"{dist_info}/RECORD,,\n"
+    files[f"{dist_info}/RECORD"] = record.encode()
+    return dist_info, files
+
+def install_package(site_packages, package, version=None):
+    dist_info, files = distribution_files(package, version or package["version"], installed=True)
+    for path, data in files.items():
+        full_path = os.path.join(site_packages, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "wb") as f:
+            f.write(data)
+
+def remove_package(site_packages, package):
+    import shutil
+    module = package["name"].replace("-", "_")
+    for entry in os.listdir(site_packages):
+        if entry == module or (entry.startswith(f"{module}-") and entry.endswith(".dist-info")):
+            shutil.rmtree(os.path.join(site_packages, entry), ignore_errors=True)
+
+def build_wheel(package, version):
+    dist_info, files = distribution_files(package, version)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as wheel:
+        for path, data in files.items():
+            wheel.writestr(path, data)
+    return buffer.getvalue()
+
+def wheel_filename(package, version):
+    return f"{package['name'].replace('-', '_')}-{version}-py3-none-any.whl"
+
+def site_packages_of(python_executable):
+    return subprocess.run([python_executable, "-c", "import sysconfig; print(sysconfig.get_paths()['purelib'])"],
+                          capture_output=True, text=True, check=True).stdout.strip()
+
+def environment_python(environment_dir):
+    if os.name == 'nt':
+        return os.path.join(environment_dir, "Scripts", "python.exe")
+    return os.path.join(environment_dir, "bin", "python")
+
+def create_environment(environment_dir, packages, with_pip=False):
+    marker_path = os.path.join(environment_dir, "synthetic.json")
+    marker = {"count": len(packages), "with_pip": with_pip, "layout": 2, "digest": hashlib.sha256(json.dumps(packages, sort_keys=True).encode()).hexdigest()}
+    python_executable = environment_python(environment_dir)
+    try:
+        with open(marker_path) as f:
+            if json.load(f) == marker:
+                return python_executable
+    except (OSError, ValueError):
+        pass
+    import shutil
+    shutil.rmtree(environment_dir, ignore_errors=True)
+    subprocess.run([sys.executable, "-m", "venv", *([] if with_pip else ["--without-pip"]), environment_dir], check=True, capture_output=True)
+    site_packages = site_packages_of(python_executable)
+    for package in packages:
+        install_package(site_packages, package)
+    with open(marker_path, "w") as f:
+        json.dump(marker, f)
+    return python_executable
+
+class FakeIndexHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    def log_message(self, format, *args):
+        pass
+    def send_body(self, status, body, content_type, headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in headers:
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+    def do_GET(self):
+        index = self.server.index
+        index.count_request()
+        if index.latency:
+            time.sleep(index.latency)
+        parts = [part for part in urlsplit(self.path).path.split("/") if part]
+        if not parts:
+            self.send_body(200, b"ok", "text/plain")
+        elif len(parts) == 3 and parts[0] == "pypi" and parts[2] == "json":
+            self.send_project_json(parts[1])
+        elif len(parts) == 2 and parts[0] == "simple":
+            self.send_simple_page(parts[1])
+        elif len(parts) == 2 and parts[0] == "files":
+            self.send_wheel(parts[1])
+        elif len(parts) == 2 and parts[0] == "downloads":
+            self.send_download(parts[1])
+        else:
+            self.send_body(404, b"not found", "text/plain")
+    def send_project_json(self, name):
+        package = self.server.index.packages.get(name.lower())
+        if package is None:
+            self.send_body(404, b"{}", "application/json")
+            return
+        etag = f'"{package["name"]}-{package["latest"]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        info = {"name": package["name"], "version": package["latest"], "requires_dist": package["requires"] or None, "requires_python": ">=3.8"}
+        self.send_body(200, json.dumps({"info": info, "releases": {}}).encode(), "application/json", [("ETag", etag)])
+    def send_simple_page(self, name):
+        index = self.server.index
+        package = index.packages.get(name.lower())
+        if package is None:
+            self.send_body(404, b"not found", "text/plain")
+            return
+        links = []
+        for version in sorted({package["version"], package["latest"]}):
+            filename = wheel_filename(package, version)
+            digest = hashlib.sha256(index.wheel(filename)).hexdigest()
+            links.append(f'<a href="/files/{filename}#sha256={digest}" data-requires-python="&gt;=3.8">{filename}</a><br>')
+        body = f"<!DOCTYPE html><html><body>{''.join(links)}</body></html>".encode()
+        self.send_body(200, body, "text/html")
+    def send_wheel(self, filename):
+        data = self.server.index.wheel(filename)
+        if data is None:
+            self.send_body(404, b"not found", "text/plain")
+            return
+        self.send_body(200, data, "application/octet-stream")
+
+    def send_download(self, filename):
+        index = self.server.index
+        if filename.endswith(".sha256") and filename[:-len(".sha256")] in index.downloads:
+            digest = hashlib.sha256(index.downloads[filename[:-len(".sha256")]]).hexdigest()
+            self.send_body(200, f"{digest}  {filename[:-len('.sha256')]}\n".encode(), "text/plain")
+            return
+        data = index.downloads.get(filename)
+        if data is None:
+            self.send_body(404, b"not found", "text/plain")
+            return
+        failure = index.next_download_failure()
+        if failure == "503":
+            self.send_body(503, b"unavailable", "text/plain", [("Retry-After", "0")])
+            return
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        start, end = 0, len(data) - 1
+        if match:
+            index.count_range_request()
+            start, end = int(match.group(1)), min(int(match.group(2) or end), end)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("ETag", f'"{hashlib.sha256(data).hexdigest()[:16]}"')
+        self.end_headers()
+        if failure == "reset":
+            end = start + (end - start) // 2
+            self.close_connection = True
+        try:
+            for offset in range(start, end + 1, DOWNLOAD_BLOCK_SIZE):
+                if index.throttle:
+                    time.sleep(index.throttle)
+                self.wfile.write(data[offset:min(offset + DOWNLOAD_BLOCK_SIZE, end + 1)])
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+class FakeIndex:
+    def __init__(self, packages, latency=0.0):
+        self.packages = {package["name"]: package for package in packages}
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.wheels = {}
+        self.requests = 0
+        self.range_requests = 0
+        self.downloads = {}
+        self.download_failures = []
+        self.throttle = 0.0
+        self.server = None
+        self.thread = None
+        self.url = self.json_url = self.simple_url = None
+    def count_request(self):
+        with self.lock:
+            self.requests += 1
+    def count_range_request(self):
+        with self.lock:
+            self.range_requests += 1
+    def next_download_failure(self):
+        with self.lock:
+            return self.download_failures.pop(0) if self.download_failures else None
+    def add_download(self, filename, data):
+        self.downloads[filename] = data
+        return f"{self.url}/downloads/{filename}"
+    def wheel(self, filename):
+        with self.lock:
+            if filename in self.wheels:
+                return self.wheels[filename]
+        name, _, rest = filename.partition("-")
+        version = rest.partition("-")[0]
+        package = self.packages.get(name.replace("_", "-"))
+        if package is None or version not in (package["version"], package["latest"]):
+            return None
+        data = build_wheel(package, version)
+        with self.lock:
+            self.wheels[filename] = data
+        return data
+    def start(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeIndexHandler)
+        self.server.daemon_threads = True
+        self.server.index = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.json_url = f"{self.url}/pypi"
+        self.simple_url = f"{self.url}/simple"
+        return self
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
@@ -0,0 +1,304 @@
+import sys
+import os
+import argparse
+import json
+import subprocess
+import logging
+import pythonlibs_engine as engine
+from pythonlibs_engine import (
+    PROTECTED_LIBRARIES, apply_restore_plan, configure_logging, create_environment_snapshot, diff_snapshots, distributions_snapshot,
+    format_library_details, get_dependency_graph, import_advisory_database, load_environment_snapshot, match_installed_advisories, normalize_name,
+    predict_upgrade_problems, read_distribution_details, read_trace_statistics, resolve_latest_versions, restore_plan, run_pip, run_pip_install,
+    save_automatic_snapshot, save_environment_snapshot, scan_installed_distributions, set_offline_mode, set_system_python,
+)
+
+class Output:
+    def __init__(self, output_format, stream=None):
+        self.format = output_format
+        self.stream = stream or sys.stdout
+        self.items = []
+    def emit(self, item):
+        if self.format == "ndjson":
+            self.stream.write(json.dumps(item, ensure_ascii=False) + "\n")
+            self.stream.flush()
+        elif self.format == "text":
+            self.stream.write("\t".join("" if value is None else str(value) for value in item.values()) + "\n")
+        else:
+            self.items.append(item)
+    def close(self, document=None):
+        if self.format == "json":
+            json.dump(self.items if document is None else document, self.stream, ensure_ascii=False, indent=2)
+            self.stream.write("\n")
+
+def is_outdated(version, latest_version):
+    return latest_version is not None and latest_version != version
+
+def command_list(args, output):
+    distributions = scan_installed_distributions(engine.get_system_python())
+    installed = {name: distributions[name].version for name in sorted(distributions)}
+    if not args.latest:
+        for name, version in installed.items():
+            output.emit({"name": name, "version": version})
+        output.close()
+        return 0
+    latest_versions = resolve_latest_versions(installed, index_url=args.index_url)
+    for name, version in installed.items():
+        latest_version = latest_versions.get(name, version)
+        output.emit({"name": name, "version": version, "latest_version": latest_version, "outdated": is_outdated(version, latest_version)})
+    output.close()
+    return 0
+
+def command_outdated(args, output):
+    distributions = scan_installed_distributions(engine.get_system_python())
+    installed = {name: distribution.version for name, distribution in distributions.items()}
+    def on_result(name, version, latest_version):
+        if is_outdated(version, latest_version):
+            output.emit({"name": name, "version": version, "latest_version": latest_version})
+    resolve_latest_versions(installed, on_result=on_result, index_url=args.index_url)
+    output.close()
+    return 0
+
+def batch_results(library_names, before, after, removed=False, error=None):
+    results = []
+    for library_name in library_names:
+        name = normalize_name(library_name)
+        old, new = before.get(name), after.get(name)
+        if removed:
+            status = "removed" if old and not new else "failed" if error else "not_installed" if not old else "unchanged"
+        elif old and new and old.version != new.version:
+            status = "upgraded"
+        elif new and not old:
+            status = "installed"
+        else:
+            status = "failed" if error else "unchanged"
+        results.append({"name": name, "before": old.version if old else None, "after": new.version if new else None, "status": status})
+    return results
+
+def command_upgrade(args, output):
+    python = engine.get_system_python()
+    before = scan_installed_distributions(python)
+    library_names = list(args.names)
+    if args.all:
+        installed = {name: distribution.version for name, distribution in before.items()}
+        latest_versions = resolve_latest_versions(installed, index_url=args.index_url)
+        library_names.extend(name for name, version in installed.items() if is_outdated(version, latest_versions.get(name)))
+    if not library_names:
+        output.close({"success": True, "results": [], "error": None})
+        return 0
+    library_names = get_dependency_graph(python, before).upgrade_order(library_names)
+    if args.dry_run:
+        problems = predict_upgrade_problems(python, library_names, index_url=args.index_url)
+        for problem in problems:
+            output.emit(problem)
+        output.close({"libraries": library_names, "problems": problems})
+        return 0 if not problems else 1
+    save_automatic_snapshot(python, "prima dell'aggiornamento", before)
+    error = None
+    try:
+        run_pip_install(python, library_names, upgrade=True)
+        logging.info(f"Librerie aggiornate: {', '.join(library_names)}")
+    except subprocess.CalledProcessError as e:
+        logging.error(f"Errore subprocess durante l'aggiornamento di {', '.join(library_names)}: {e.stderr}")
+        error = e.stderr
+    results = batch_results(library_names, before, scan_installed_distributions(python), error=error)
+    for result in results:
+        output.emit(result)
+    output.close({"success": error is None, "results": results, "error": error})
+    return 0 if error is None else 1
+
+def command_uninstall(args, output):
+    python = engine.get_system_python()
+    protected = [name for name in args.names if name.lower() in PROTECTED_LIBRARIES]
+    library_names = [name for name in args.names if name.lower() not in PROTECTED_LIBRARIES]
+    results = [{"name": normalize_name(name), "before": None, "after": None, "status": "protected"} for name in protected]
+    error = None
+    impact = {}
+    if library_names:
+        before = scan_installed_distributions(python)
+        impact = get_dependency_graph(python, before).uninstall_impact(library_names)
+        for dependent, dependencies in impact.items():
+            sys.stderr.write(f"Attenzione: {dependent} richiede {', '.join(dependencies)}\n")
+        try:
+            run_pip(python, ["uninstall", "-y", *library_names])
+            logging.info(f"Librerie disinstallate: {', '.join(library_names)}")
+        except subprocess.CalledProcessError as e:
+            logging.error(f"Errore subprocess durante la disinstallazione di {', '.join(library_names)}: {e.stderr}")
+            error = e.stderr
+        results.extend(batch_results(library_names, before, scan_installed_distributions(python), removed=True, error=error))
+    for result in results:
+        output.emit(result)
+    output.close({"success": error is None and not protected, "results": results, "impact": impact, "error": error})
+    return 0 if error is None and not protected else 1
+
+def command_details(args, output):
+    distributions = scan_installed_distributions(engine.get_system_python())
+    distribution = distributions.get(normalize_name(args.name))
+    if distribution is None:
+        sys.stderr.write(f"Libreria non trovata: {args.name}\n")
+        return 1
+    details = read_distribution_details(distribution)
+    required_by = get_dependency_graph(engine.get_system_python(), distributions).dependents_of(args.name)
+    advisories = match_installed_advisories({distribution.name: distribution.version}).get(distribution.name, [])
+    if output.format == "text":
+        output.stream.write(format_library_details(details, required_by, advisories=advisories) + "\n")
+    else:
+        output.emit(dict(details, required_by=required_by, advisories=advisories))
+        output.close(dict(details, required_by=required_by, advisories=advisories))
+    return 0
+
+def command_check(args, output):
+    problems = get_dependency_graph(engine.get_system_python()).check()
+    for problem in problems:
+        output.emit(problem)
+    output.close()
+    return 0 if not problems else 1
+
+def command_orphans(args, output):
+    for name in get_dependency_graph(engine.get_system_python()).orphans():
+        output.emit({"name": name})
+    output.close()
+    return 0
+
+def command_audit(args, output):
+    distributions = scan_installed_distributions(engine.get_system_python())
+    matches = match_installed_advisories({name: distributions[name].version for name in sorted(distributions)})
+    for name, advisories in matches.items():
+        for advisory in advisories:
+            output.emit({"name": name, "version": distributions[name].version, "id": advisory["id"], "aliases": ",".join(advisory["aliases"]),
+                         "fixed": advisory["fixed"], "summary": advisory["summary"]})
+    output.close()
+    return 0 if not matches else 1
+
+def command_import_advisories(args, output):
+    advisories, packages = import_advisory_database(args.source)
+    output.emit({"source": args.source, "advisories": advisories, "packages": packages})
+    output.close()
+    return 0
+
+def command_snapshot(args, output):
+    snapshot = create_environment_snapshot(engine.get_system_python())
+    if args.output:
+        save_environment_snapshot(snapshot, args.output)
+        return 0
+    if output.format == "json":
+        output.close(snapshot)
+    else:
+        for library in snapshot["libraries"]:
+            output.emit(library)
+    return 0
+
+def load_snapshot_argument(value):
+    if os.path.isfile(value) and value.endswith(".json"):
+        return load_environment_snapshot(value)
+    return create_environment_snapshot(value)
+
+def command_diff(args, output):
+    changes = diff_snapshots(load_snapshot_argument(args.old), load_snapshot_argument(args.new or engine.get_system_python()))
+    for change in changes:
+        output.emit(change)
+    output.close()
+    return 0 if not changes else 1
+
+def command_restore(args, output):
+    python = engine.get_system_python()
+    snapshot = load_environment_snapshot(args.snapshot)
+    if args.dry_run:
+        plan = restore_plan(distributions_snapshot(scan_installed_distributions(python)), snapshot)
+        for change in plan["changes"]:
+            output.emit(change)
+        output.close(plan)
+        return 0
+    save_automatic_snapshot(python, "prima del ripristino")
+    error = None
+    try:
+        plan = apply_restore_plan(python, snapshot)
+        logging.info(f"Snapshot {args.snapshot} ripristinato")
+    except subprocess.CalledProcessError as e:
+        logging.error(f"Errore subprocess durante il ripristino dello snapshot {args.snapshot}: {e.stderr}")
+        plan, error = {"install": [], "uninstall": []}, e.stderr
+    remaining = diff_snapshots(create_environment_snapshot(python), snapshot)
+    for change in remaining:
+        output.emit(change)
+    output.close({"success": error is None, "install": plan["install"], "uninstall": plan["uninstall"], "remaining": remaining, "error": error})
+    return 0 if error is None else 1
+
+def command_perf(args, output):
+    for item in sorted(read_trace_statistics(args.trace_file), key=lambda item: item["p95"], reverse=True):
+        output.emit({"name": item["name"], "count": item["count"], "errors": item["errors"], "p50_ms": round(item["p50"] * 1000, 3),
+                     "p95_ms": round(item["p95"] * 1000, 3), "max_ms": round(item["max"] * 1000, 3)})
+    output.close()
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="pythonlibs", description="Gestione Librerie Python senza interfaccia grafica.")
+    parser.add_argument("--python", help="interprete Python su cui operare (predefinito: python o python3 nel PATH)")
+    parser.add_argument("--index-url", help="URL dell'API JSON dell'indice dei pacchetti")
+    parser.add_argument("--offline", action="store_true", help="usa solo la cache e la wheelhouse locali")
+    parser.add_argument("--format", choices=("json", "ndjson", "text"), default="json", help="formato dell'output (predefinito: json)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    list_parser = subparsers.add_parser("list", help="elenca le librerie installate")
+    list_parser.add_argument("--latest", action="store_true", help="aggiunge l'ultima versione disponibile")
+    list_parser.set_defaults(handler=command_list)
+    outdated_parser = subparsers.add_parser("outdated", help="elenca le librerie obsolete")
+    outdated_parser.set_defaults(handler=command_outdated)
+    upgrade_parser = subparsers.add_parser("upgrade", help="aggiorna le librerie indicate")
+    upgrade_parser.add_argument("names", nargs="*")
+    upgrade_parser.add_argument("--all", action="store_true", help="aggiorna tutte le librerie obsolete")
+    upgrade_parser.add_argument("--dry-run", action="store_true", help="segnala i conflitti previsti senza modificare nulla")
+    upgrade_parser.set_defaults(handler=command_upgrade)
+    uninstall_parser = subparsers.add_parser("uninstall", help="disinstalla le librerie indicate")
+    uninstall_parser.add_argument("names", nargs="+")
+    uninstall_parser.set_defaults(handler=command_uninstall)
+    details_parser = subparsers.add_parser("details", help="mostra i dettagli di una libreria installata")
+    details_parser.add_argument("name")
+    details_parser.set_defaults(handler=command_details)
+    check_parser = subparsers.add_parser("check", help="verifica che le dipendenze installate siano compatibili")
+    check_parser.set_defaults(handler=command_check)
+    orphans_parser = subparsers.add_parser("orphans", help="elenca le librerie installate come dipendenze che nessuno richiede più")
+    orphans_parser.set_defaults(handler=command_orphans)
+    audit_parser = subparsers.add_parser("audit", help="elenca le librerie installate con vulnerabilità note (codice 1 se presenti)")
+    audit_parser.set_defaults(handler=command_audit)
+    import_advisories_parser = subparsers.add_parser("import-advisories", help="importa un archivio di avvisi di sicurezza in formato OSV")
+    import_advisories_parser.add_argument("source", help="archivio ZIP, cartella o file JSON con gli avvisi OSV")
+    import_advisories_parser.set_defaults(handler=command_import_advisories)
+    snapshot_parser = subparsers.add_parser("snapshot", help="esporta l'elenco delle librerie installate")
+    snapshot_parser.add_argument("--output", help="file JSON in cui salvare lo snapshot")
+    snapshot_parser.set_defaults(handler=command_snapshot)
+    diff_parser = subparsers.add_parser("diff", help="confronta due snapshot o interpreti (codice 1 se diversi)")
+    diff_parser.add_argument("old", help="file JSON di uno snapshot oppure percorso di un interprete")
+    diff_parser.add_argument("new", nargs="?", help="come OLD (predefinito: l'interprete selezionato)")
+    diff_parser.set_defaults(handler=command_diff)
+    restore_parser = subparsers.add_parser("restore", help="riporta l'interprete allo stato di uno snapshot")
+    restore_parser.add_argument("snapshot", help="file JSON dello snapshot")
+    restore_parser.add_argument("--dry-run", action="store_true", help="mostra le modifiche necessarie senza applicarle")
+    restore_parser.set_defaults(handler=command_restore)
+    perf_parser = subparsers.add_parser("perf", help="riepiloga i tempi per operazione (p50/p95) registrati nel file di traccia")
+    perf_parser.add_argument("--trace-file", help="file di traccia NDJSON da analizzare (predefinito: trace.ndjson nella cartella cache)")
+    perf_parser.set_defaults(handler=command_perf)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    configure_logging()
+    if args.command == "upgrade" and not args.names and not args.all:
+        parser.error("indicare almeno una libreria oppure --all")
+    if args.python:
+        set_system_python(args.python)
+    if args.offline:
+        set_offline_mode(True)
+    output = Output(args.format)
+    try:
+        status = args.handler(args, output)
+    except (FileNotFoundError, ValueError) as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3074 @@
+import subprocess
+import asyncio
+import sys
+import shutil
+import logging
+import threading
+import json
+import re
+import os
+import time
+import sqlite3
+import queue
+import csv
+import hashlib
+import glob
+import math
+import locale
+import random
+from collections import namedtuple, deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+INDEX_URL = os.environ.get("PYLIBS_INDEX_URL", "https://pypi.org/pypi")
+RESOLVER_MAX_WORKERS = int(os.environ.get("PYLIBS_RESOLVER_WORKERS", "16"))
+CACHE_TTL = int(os.environ.get("PYLIBS_CACHE_TTL", "3600"))
+OFFLINE_MODE = os.environ.get("PYLIBS_OFFLINE", "0") == "1"
+PYTHON_DOWNLOADS_URL = "https://www.python.org/downloads/"
+PYTHON_RELEASE_FILES_URL = "https://www.python.org/api/v2/downloads/release_file/"
+SCHEDULER_WORKERS = int(os.environ.get("PYLIBS_SCHEDULER_WORKERS", "4"))
+DETAILS_CACHE_SIZE = int(os.environ.get("PYLIBS_DETAILS_CACHE_SIZE", "256"))
+JOB_LOG_LINES = int(os.environ.get("PYLIBS_JOB_LOG_LINES", "2000"))
+SCANNER_MAX_WORKERS = int(os.environ.get("PYLIBS_SCANNER_WORKERS", str(min(8, os.cpu_count() or 4))))
+WHEELHOUSE_ENABLED = os.environ.get("PYLIBS_WHEELHOUSE_ENABLED", "1") == "1"
+WHEELHOUSE_MAX_SIZE = int(os.environ.get("PYLIBS_WHEELHOUSE_MAX_MB", "2048")) * 1024 * 1024
+SUBPROCESS_TAIL_LINES = 200
+SUBPROCESS_LINE_LIMIT = 1024 * 1024
+MAX_PROCESSES = int(os.environ.get("PYLIBS_MAX_PROCESSES", str(max(4, os.cpu_count() or 4))))
+HTTP_MAX_CONNECTIONS = int(os.environ.get("PYLIBS_HTTP_CONNECTIONS", "32"))
+HTTP_HOST_CONNECTIONS = int(os.environ.get("PYLIBS_HTTP_HOST_CONNECTIONS", str(RESOLVER_MAX_WORKERS)))
+HTTP_RETRIES = int(os.environ.get("PYLIBS_HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.environ.get("PYLIBS_HTTP_BACKOFF", "0.5"))
+HTTP_MAX_BACKOFF = 30.0
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+ASYNC_POLL_INTERVAL = 0.1
+CONNECTIVITY_TTL = int(os.environ.get("PYLIBS_CONNECTIVITY_TTL", "60"))
+CONNECTIVITY_URL = os.environ.get("PYLIBS_CONNECTIVITY_URL", "https://www.google.com")
+DOWNLOAD_WORKERS = int(os.environ.get("PYLIBS_DOWNLOAD_WORKERS", "4"))
+DOWNLOAD_CHUNK_SIZE = int(os.environ.get("PYLIBS_DOWNLOAD_CHUNK_MB", "4")) * 1024 * 1024
+DOWNLOAD_BUFFER_SIZE = 1024 * 1024
+WATCH_INTERVAL = float(os.environ.get("PYLIBS_WATCH_INTERVAL", "2"))
+SNAPSHOT_MAX_WORKERS = int(os.environ.get("PYLIBS_SNAPSHOT_WORKERS", str(min(16, (os.cpu_count() or 4) * 2))))
+SIZE_MAX_WORKERS = int(os.environ.get("PYLIBS_SIZE_WORKERS", str(min(16, (os.cpu_count() or 4) * 2))))
+SNAPSHOT_KEEP = max(1, int(os.environ.get("PYLIBS_SNAPSHOT_KEEP", "10")))
+SNAPSHOT_FORMAT = 1
+LOG_LEVEL = os.environ.get("PYLIBS_LOG_LEVEL", "ERROR").upper()
+TRACE_LEVEL = os.environ.get("PYLIBS_TRACE_LEVEL", "INFO").upper()
+TRACE_FILE = os.environ.get("PYLIBS_TRACE_FILE")
+TRACE_MAX_BYTES = int(os.environ.get("PYLIBS_TRACE_MAX_MB", "5")) * 1024 * 1024
+TRACE_BACKUP_COUNT = int(os.environ.get("PYLIBS_TRACE_BACKUPS", "3"))
+TRACE_SAMPLES = 1000
+
+def get_cache_dir():
+    cache_dir = os.environ.get("PYLIBS_CACHE_DIR")
+    if not cache_dir:
+        if os.name == 'nt':
+            base_dir = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+        elif sys.platform == 'darwin':
+            base_dir = os.path.join(os.path.expanduser("~"), "Library", "Caches")
+        else:
+            base_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        cache_dir = os.path.join(base_dir, "gestione-librerie-python")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+def get_log_path():
+    return os.path.join(get_cache_dir(), "app.log")
+
+def configure_logging(path=None):
+    handler = logging.FileHandler(path or get_log_path(), encoding="utf-8", delay=True)
+    logging.basicConfig(handlers=[handler], level=getattr(logging, LOG_LEVEL, logging.ERROR), format='%(asctime)s - %(levelname)s - %(message)s')
+
+def get_trace_path():
+    return TRACE_FILE or os.path.join(get_cache_dir(), "trace.ndjson")
+
+_trace_logger = None
+_trace_lock = threading.Lock()
+_span_statistics = {}
+_span_statistics_lock = threading.Lock()
+
+def get_trace_logger():
+    global _trace_logger
+    with _trace_lock:
+        if _trace_logger is None:
+            from logging.handlers import RotatingFileHandler
+            logger = logging.getLogger("pythonlibs.trace")
+            logger.propagate = False
+            if TRACE_LEVEL == "OFF":
+                logger.disabled = True
+            else:
+                logger.setLevel(getattr(logging, TRACE_LEVEL, logging.INFO))
+                try:
+                    handler = RotatingFileHandler(get_trace_path(), maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUP_COUNT, encoding="utf-8")
+                    handler.setFormatter(logging.Formatter("%(message)s"))
+                    logger.addHandler(handler)
+                except OSError as e:
+                    logging.error(f"Errore durante l'apertura del file di traccia: {e}")
+                    logger.disabled = True
+            _trace_logger = logger
+        return _trace_logger
+
+def record_span(name, duration, status="ok", level=logging.INFO, **fields):
+    with _span_statistics_lock:
+        statistics = _span_statistics.get(name)
+        if statistics is None:
+            statistics = _span_statistics[name] = {"samples": deque(maxlen=TRACE_SAMPLES), "count": 0, "errors": 0}
+        statistics["samples"].append(duration)
+        statistics["count"] += 1
+        if status == "error":
+            statistics["errors"] += 1
+    if status == "error":
+        level = max(level, logging.WARNING)
+    logger = get_trace_logger()
+    if logger.isEnabledFor(level):
+        record = {"start": round(time.time() - duration, 3), "span": name, "level": logging.getLevelName(level), "duration_ms": round(duration * 1000, 3),
+                  "status": status, "thread": threading.current_thread().name}
+        record.update(fields)
+        logger.log(level, json.dumps(record, ensure_ascii=False, default=str))
+
+class Span:
+    def __init__(self, name, level=logging.INFO, **fields):
+        self.name = name
+        self.level = level
+        self.fields = fields
+        self.started_at = None
+    def set(self, **fields):
+        self.fields.update(fields)
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+    def __exit__(self, exc_type, exc, traceback):
+        status = "error" if self.fields.get("exit_code") else "ok"
+        if exc_type is not None:
+            status = "cancelled" if issubclass(exc_type, (JobCancelled, asyncio.CancelledError)) else "error"
+            self.fields.setdefault("error", f"{exc_type.__name__}: {exc}"[:500])
+            if getattr(exc, "returncode", None) is not None:
+                self.fields.setdefault("exit_code", exc.returncode)
+        record_span(self.name, time.perf_counter() - self.started_at, status, self.level, **self.fields)
+        return False
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)] if ordered else 0.0
+
+def summarize_durations(name, durations, count=None, errors=0):
+    return {"name": name, "count": len(durations) if count is None else count, "errors": errors, "p50": percentile(durations, 0.5),
+            "p95": percentile(durations, 0.95), "max": max(durations, default=0.0), "last": durations[-1] if durations else 0.0}
+
+def get_span_statistics():
+    with _span_statistics_lock:
+        items = [(name, list(statistics["samples"]), statistics["count"], statistics["errors"]) for name, statistics in _span_statistics.items()]
+    return [summarize_durations(*item) for item in sorted(items)]
+
+def reset_span_statistics():
+    with _span_statistics_lock:
+        _span_statistics.clear()
+
+def read_trace_statistics(path=None):
+    path = path or get_trace_path()
+    durations = {}
+    errors = {}
+    for candidate in [f"{path}.{index}" for index in range(TRACE_BACKUP_COUNT, 0, -1)] + [path]:
+        try:
+            with open(candidate, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        name, duration = record["span"], record["duration_ms"] / 1000
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    durations.setdefault(name, []).append(duration)
+                    if record.get("status") == "error":
+                        errors[name] = errors.get(name, 0) + 1
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            logging.error(f"Errore durante la lettura del file di traccia {candidate}: {e}")
+    return [summarize_durations(name, durations[name], errors=errors.get(name, 0)) for name in sorted(durations)]
+
+def command_label(args):
+    args = [str(arg) for arg in args]
+    if len(args) > 3 and args[1:3] == ["-m", "pip"]:
+        return f"pip {args[3]}"
+    if len(args) > 1 and args[1] == "-c":
+        return f"{os.path.basename(args[0])} -c"
+    return os.path.basename(args[0]) if args else ""
+
+def http_span_name(url):
+    from urllib.parse import urlsplit
+    return f"http {urlsplit(url).netloc}"
+
+def set_offline_mode(enabled):
+    global OFFLINE_MODE
+    OFFLINE_MODE = bool(enabled)
+    logging.info(f"Modalità offline {'attivata' if OFFLINE_MODE else 'disattivata'}.")
+
+_connectivity = {"checked_at": None, "connected": False}
+
+async def is_connected_async(max_age=None):
+    max_age = CONNECTIVITY_TTL if max_age is None else max_age
+    async with get_async_primitive("connectivity", asyncio.Lock):
+        checked_at = _connectivity["checked_at"]
+        if checked_at is not None and time.monotonic() - checked_at < max_age:
+            return _connectivity["connected"]
+        try:
+            with Span("http connettività", url=CONNECTIVITY_URL):
+                await get_http_client().get(CONNECTIVITY_URL, timeout=5, retries=0)
+            connected = True
+        except Exception as e:
+            logging.error(f"Errore nella verifica della connessione: {e}")
+            connected = False
+        _connectivity.update(checked_at=time.monotonic(), connected=connected)
+        return connected
+
+def is_connected(max_age=None):
+    return run_async(is_connected_async(max_age))
+
+def get_system_python():
+    global SYSTEM_PYTHON
+    if SYSTEM_PYTHON is None:
+        python_executable = shutil.which("python") or shutil.which("python3")
+        if not python_executable:
+            raise FileNotFoundError("Interprete Python non trovato nel sistema.")
+        logging.info(f"Interprete Python trovato: {python_executable}")
+        SYSTEM_PYTHON = python_executable
+    return SYSTEM_PYTHON
+
+SYSTEM_PYTHON = None
+
+def set_system_python(python_executable):
+    global SYSTEM_PYTHON
+    SYSTEM_PYTHON = python_executable
+    logging.info(f"Interprete Python selezionato: {python_executable}")
+
+class JobCancelled(Exception):
+    pass
+
+class Job:
+    QUEUED = "In coda"
+    RUNNING = "In esecuzione"
+    DONE = "Completato"
+    FAILED = "Fallito"
+    CANCELLED = "Annullato"
+    def __init__(self, job_id, name, func, environment=None, mutating=False, on_done=None, on_cancel=None):
+        self.id = job_id
+        self.name = name
+        self.func = func
+        self.environment = environment
+        self.mutating = mutating
+        self.on_done = on_done
+        self.on_cancel = on_cancel
+        self.status = Job.QUEUED
+        self.result = None
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.progress = None
+        self.log = deque(maxlen=JOB_LOG_LINES)
+        self.log_count = 0
+        self.log_lock = threading.Lock()
+    def add_log(self, line):
+        with self.log_lock:
+            self.log.append(line)
+            self.log_count += 1
+    def read_log(self, since=0):
+        with self.log_lock:
+            new_lines = min(self.log_count - since, len(self.log))
+            return list(self.log)[len(self.log) - new_lines:] if new_lines > 0 else [], self.log_count
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+    @property
+    def finished(self):
+        return self.status in (Job.DONE, Job.FAILED, Job.CANCELLED)
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+    def wait(self, timeout=None):
+        return self.done_event.wait(timeout)
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+class JobScheduler:
+    def __init__(self, max_workers=SCHEDULER_WORKERS, history=200):
+        self.condition = threading.Condition()
+        self.pending = deque()
+        self.busy_environments = set()
+        self.mutations = {}
+        self.jobs = deque(maxlen=history)
+        self.ui_queue = queue.Queue()
+        self.ui_root = None
+        self.next_id = 1
+        self.workers = []
+        for index in range(max(1, max_workers)):
+            worker = threading.Thread(target=self.worker_loop, name=f"job-worker-{index}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+    def submit(self, name, func, environment=None, mutating=False, on_done=None, on_cancel=None):
+        with self.condition:
+            job = Job(self.next_id, name, func, environment, mutating, on_done, on_cancel)
+            self.next_id += 1
+            self.pending.append(job)
+            self.jobs.append(job)
+            self.condition.notify_all()
+        return job
+    def cancel(self, job):
+        with self.condition:
+            if job.finished:
+                return False
+            job.cancel_event.set()
+            if job.status == Job.QUEUED:
+                self.pending.remove(job)
+                job.status = Job.CANCELLED
+                job.finished_at = time.monotonic()
+                job.done_event.set()
+                if job.on_cancel:
+                    self.post(job.on_cancel)
+                return True
+        return True
+    def cancel_all(self):
+        for job in list(self.jobs):
+            self.cancel(job)
+    def take_job(self):
+        for job in self.pending:
+            if not job.mutating or job.environment not in self.busy_environments:
+                self.pending.remove(job)
+                if job.mutating:
+                    self.busy_environments.add(job.environment)
+                job.status = Job.RUNNING
+                job.started_at = time.monotonic()
+                return job
+        return None
+    def worker_loop(self):
+        while True:
+            with self.condition:
+                job = self.take_job()
+                while job is None:
+                    self.condition.wait()
+                    job = self.take_job()
+            try:
+                job.result = job.func(job)
+                job.status = Job.CANCELLED if job.cancelled else Job.DONE
+            except JobCancelled:
+                job.status = Job.CANCELLED
+            except Exception as e:
+                logging.error(f"Errore durante l'esecuzione del job '{job.name}': {e}")
+                job.error = e
+                job.status = Job.FAILED
+            finally:
+                job.finished_at = time.monotonic()
+                with self.condition:
+                    if job.mutating:
+                        self.busy_environments.discard(job.environment)
+                        self.mutations[job.environment] = self.mutations.get(job.environment, 0) + 1
+                    self.condition.notify_all()
+            if job.status == Job.DONE and job.on_done:
+                self.post(job.on_done, job.result)
+            elif job.status == Job.CANCELLED and job.on_cancel:
+                self.post(job.on_cancel)
+            job.done_event.set()
+    def snapshot(self):
+        with self.condition:
+            return list(self.jobs)
+    def is_busy(self, environment):
+        with self.condition:
+            return environment in self.busy_environments
+    def mutation_count(self, environment):
+        with self.condition:
+            return self.mutations.get(environment, 0)
+    def post(self, func, *args, **kwargs):
+        if self.ui_root is None:
+            func(*args, **kwargs)
+        else:
+            self.ui_queue.put((func, args, kwargs))
+    def start_dispatcher(self, root, interval=30, budget=0.02):
+        self.ui_root = root
+        def dispatch():
+            deadline = time.monotonic() + budget
+            while time.monotonic() < deadline:
+                try:
+                    func, args, kwargs = self.ui_queue.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    func(*args, **kwargs)
+                except Exception as e:
+                    logging.error(f"Errore durante l'aggiornamento dell'interfaccia: {e}")
+            root.after(interval, dispatch)
+        root.after(interval, dispatch)
+
+_job_scheduler = None
+_job_scheduler_lock = threading.Lock()
+
+def get_job_scheduler():
+    global _job_scheduler
+    with _job_scheduler_lock:
+        if _job_scheduler is None:
+            _job_scheduler = JobScheduler()
+        return _job_scheduler
+
+def run_on_ui(func, *args, **kwargs):
+    get_job_scheduler().post(func, *args, **kwargs)
+
+def ui_callback(func):
+    if func is None:
+        return None
+    return lambda *args, **kwargs: run_on_ui(func, *args, **kwargs)
+
+_event_loop = None
+_event_loop_thread = None
+_event_loop_lock = threading.Lock()
+_async_primitives = {}
+
+def get_event_loop():
+    global _event_loop, _event_loop_thread
+    with _event_loop_lock:
+        if _event_loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=run_event_loop, args=(loop,), name="pythonlibs-asyncio", daemon=True)
+            thread.start()
+            _event_loop, _event_loop_thread = loop, thread
+        return _event_loop
+
+def run_event_loop(loop):
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+def get_async_primitive(name, factory):
+    primitive = _async_primitives.get(name)
+    if primitive is None:
+        primitive = _async_primitives[name] = factory()
+    return primitive
+
+async def run_with_job(coroutine, job):
+    task = asyncio.ensure_future(coroutine)
+    while not task.done():
+        await asyncio.wait([task], timeout=ASYNC_POLL_INTERVAL)
+        if job.cancelled and not task.done():
+            task.cancel()
+    if task.cancelled():
+        raise JobCancelled()
+    return task.result()
+
+def run_async(coroutine, job=None):
+    loop = get_event_loop()
+    if threading.current_thread() is _event_loop_thread:
+        coroutine.close()
+        raise RuntimeError("Operazione sincrona richiamata dal ciclo asyncio.")
+    if job is not None:
+        job.check_cancelled()
+        coroutine = run_with_job(coroutine, job)
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+def decode_output(data):
+    return data.decode(locale.getpreferredencoding(False), errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+
+async def stop_process(process):
+    if process.returncode is None:
+        try:
+            process.terminate()
+        except ProcessLookupError:
+            pass
+        try:
+            await asyncio.wait_for(asyncio.shield(process.wait()), 10)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+
+async def run_subprocess_async(args, job=None, check=True, timeout=None, **fields):
+    if job is not None:
+        job.check_cancelled()
+    with Span(f"subprocess {command_label(args)}", args=[str(arg) for arg in args[1:]], **fields) as span:
+        async with get_async_primitive("processes", lambda: asyncio.Semaphore(MAX_PROCESSES)):
+            process = await asyncio.create_subprocess_exec(*args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+            try:
+                stdout_data, stderr_data = await asyncio.wait_for(process.communicate(), timeout)
+            except asyncio.TimeoutError:
+                await stop_process(process)
+                raise subprocess.TimeoutExpired(args, timeout)
+            except BaseException:
+                await stop_process(process)
+                raise
+        stdout, stderr = decode_output(stdout_data), decode_output(stderr_data)
+        span.set(exit_code=process.returncode, bytes=len(stdout) + len(stderr))
+    if check and process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, args, stdout, stderr)
+    return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+def run_subprocess(args, job=None, check=True, timeout=None, **fields):
+    return run_async(run_subprocess_async(args, job, check, timeout, **fields), job)
+
+PIP_RAW_PROGRESS_PATTERN = re.compile(r"^Progress (\d+) of (\d+)$")
+PIP_DOWNLOAD_PATTERN = re.compile(r"^\s*Downloading (\S+)")
+PIP_RAW_PROGRESS_MIN_VERSION = "24.1"
+
+class PipProgress:
+    PHASES = (
+        ("Collecting ", "Risoluzione dipendenze", 0.05),
+        ("Processing ", "Risoluzione dipendenze", 0.05),
+        ("Found existing installation", "Rimozione versione precedente", 0.5),
+        ("Uninstalling ", "Rimozione versione precedente", 0.5),
+        ("Building wheel", "Compilazione wheel", 0.7),
+        ("Installing collected packages", "Installazione", 0.8),
+        ("Successfully ", "Completato", 1.0),
+    )
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.phase = "Avvio"
+        self.fraction = 0.0
+        self.downloads = 0
+        self.completed_bytes = 0
+        self.current_bytes = 0
+        self.current_total = 0
+        self.current_file = ""
+    def feed(self, line):
+        match = PIP_RAW_PROGRESS_PATTERN.match(line)
+        if match:
+            self.current_bytes, self.current_total = int(match.group(1)), int(match.group(2))
+            if self.current_total:
+                self.fraction = max(self.fraction, 0.1 + 0.6 * self.current_bytes / self.current_total)
+            return
+        match = PIP_DOWNLOAD_PATTERN.match(line)
+        if match:
+            self.completed_bytes += self.current_bytes
+            self.current_bytes = self.current_total = 0
+            self.downloads += 1
+            self.current_file = match.group(1).rsplit("/", 1)[-1]
+            self.phase = "Download"
+            self.fraction = max(self.fraction, 0.1)
+            return
+        for prefix, phase, fraction in self.PHASES:
+            if line.lstrip().startswith(prefix):
+                self.phase = phase
+                self.fraction = max(self.fraction, fraction)
+                return
+    def snapshot(self):
+        elapsed = time.monotonic() - self.started_at
+        total_bytes = self.completed_bytes + self.current_bytes
+        return {
+            "phase": self.phase,
+            "fraction": self.fraction,
+            "file": self.current_file,
+            "downloads": self.downloads,
+            "bytes": total_bytes,
+            "current_bytes": self.current_bytes,
+            "current_total": self.current_total,
+            "rate": total_bytes / elapsed if elapsed > 0 else 0.0,
+            "elapsed": elapsed,
+        }
+
+def format_progress(progress):
+    parts = [progress["phase"]]
+    if progress["phase"] == "Download" and progress["file"]:
+        parts.append(progress["file"])
+    if progress["current_total"]:
+        parts.append(f"{format_size(progress['current_bytes'])} di {format_size(progress['current_total'])}")
+    if progress["bytes"]:
+        parts.append(f"{format_size(progress['rate'])}/s")
+    parts.append(f"{progress['elapsed']:.0f} s")
+    if progress.get("eta") is not None:
+        parts.append(f"ancora {progress['eta']:.0f} s")
+    return " — ".join(parts)
+
+def pip_supports_raw_progress(python_executable):
+    pip_distribution = scan_installed_distributions(python_executable).get("pip")
+    return pip_distribution is not None and parse_version(pip_distribution.version) >= parse_version(PIP_RAW_PROGRESS_MIN_VERSION)
+
+async def run_subprocess_streaming_async(args, job=None, check=True, progress=None):
+    if job is not None:
+        job.check_cancelled()
+    stdout_tail = deque(maxlen=SUBPROCESS_TAIL_LINES)
+    stderr_tail = deque(maxlen=SUBPROCESS_TAIL_LINES)
+    output_bytes = {"stdout": 0, "stderr": 0}
+    def on_stdout(line):
+        if progress is not None:
+            progress.feed(line)
+            if job is not None:
+                job.progress = progress.snapshot()
+        if PIP_RAW_PROGRESS_PATTERN.match(line):
+            return
+        stdout_tail.append(line)
+        if job is not None:
+            job.add_log(line)
+    def on_stderr(line):
+        stderr_tail.append(line)
+        if job is not None:
+            job.add_log(line)
+    async def read_lines(stream, key, on_line):
+        while True:
+            data = await stream.readline()
+            if not data:
+                break
+            output_bytes[key] += len(data)
+            on_line(decode_output(data).rstrip("\n"))
+    with Span(f"subprocess {command_label(args)}", args=[str(arg) for arg in args[1:]]) as span:
+        async with get_async_primitive("processes", lambda: asyncio.Semaphore(MAX_PROCESSES)):
+            process = await asyncio.create_subprocess_exec(*args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                                                           env=dict(os.environ, PYTHONUNBUFFERED="1"), limit=SUBPROCESS_LINE_LIMIT)
+            try:
+                await asyncio.gather(read_lines(process.stdout, "stdout", on_stdout), read_lines(process.stderr, "stderr", on_stderr))
+                await process.wait()
+            except BaseException:
+                await stop_process(process)
+                raise
+        span.set(exit_code=process.returncode, bytes=output_bytes["stdout"] + output_bytes["stderr"])
+        if progress is not None and (progress.completed_bytes or progress.current_bytes):
+            span.set(downloaded_bytes=progress.completed_bytes + progress.current_bytes)
+    stdout, stderr = "\n".join(stdout_tail), "\n".join(stderr_tail)
+    if check and process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, args, stdout, stderr)
+    return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+def run_subprocess_streaming(args, job=None, check=True, progress=None):
+    return run_async(run_subprocess_streaming_async(args, job, check, progress), job)
+
+def run_pip(python_executable, pip_args, job=None, check=True):
+    pip_args = list(pip_args)
+    if pip_args and pip_args[0] in ("install", "download", "wheel") and pip_supports_raw_progress(python_executable):
+        pip_args[1:1] = ["--progress-bar", "raw"]
+    if job is not None:
+        job.add_log(f"$ pip {' '.join(pip_args)}")
+    return run_subprocess_streaming([python_executable, "-m", "pip", *pip_args], job=job, check=check, progress=PipProgress())
+
+def hash_file(path, algorithm="sha256", buffer_size=1024 * 1024):
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(buffer_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class Wheelhouse:
+    def __init__(self, directory, max_size=WHEELHOUSE_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(directory, "wheelhouse.sqlite3"), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS wheels (filename TEXT PRIMARY KEY, sha256 TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS wheels_sha256 ON wheels (sha256)")
+        self.connection.commit()
+        self.reconcile()
+    def reconcile(self):
+        with self.lock:
+            known = {row[0] for row in self.connection.execute("SELECT filename FROM wheels")}
+            present = {entry.name for entry in os.scandir(self.directory) if entry.name.endswith(".whl")}
+            for filename in known - present:
+                self.connection.execute("DELETE FROM wheels WHERE filename = ?", (filename,))
+            self.connection.commit()
+        for filename in present - known:
+            path = os.path.join(self.directory, filename)
+            self.register(filename, hash_file(path), os.path.getsize(path))
+    def register(self, filename, sha256, size):
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO wheels (filename, sha256, size, last_used) VALUES (?, ?, ?, ?)", (filename, sha256, size, time.time()))
+            self.connection.commit()
+    def ingest(self, source_dir):
+        added = []
+        for entry in os.scandir(source_dir):
+            if not entry.name.endswith(".whl"):
+                continue
+            sha256 = hash_file(entry.path)
+            with self.lock:
+                existing = self.connection.execute("SELECT filename, sha256 FROM wheels WHERE filename = ? OR sha256 = ?", (entry.name, sha256)).fetchall()
+            target = os.path.join(self.directory, entry.name)
+            if any(filename == entry.name and digest == sha256 for filename, digest in existing):
+                self.touch([entry.name])
+                continue
+            same_content = [filename for filename, digest in existing if digest == sha256]
+            temporary_target = target + ".tmp"
+            try:
+                if same_content:
+                    os.link(os.path.join(self.directory, same_content[0]), temporary_target)
+                else:
+                    shutil.copyfile(entry.path, temporary_target)
+            except OSError:
+                shutil.copyfile(entry.path, temporary_target)
+            os.replace(temporary_target, target)
+            self.register(entry.name, sha256, entry.stat().st_size)
+            added.append(entry.name)
+        return added
+    def touch(self, filenames):
+        with self.lock:
+            self.connection.executemany("UPDATE wheels SET last_used = ? WHERE filename = ?", [(time.time(), filename) for filename in filenames])
+            self.connection.commit()
+    def total_size(self):
+        with self.lock:
+            return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM wheels").fetchone()[0]
+    def wheel_versions(self):
+        with self.lock:
+            filenames = [row[0] for row in self.connection.execute("SELECT filename FROM wheels")]
+        versions = set()
+        for filename in filenames:
+            parts = filename[:-len(".whl")].split("-")
+            if len(parts) >= 5:
+                versions.add((normalize_name(parts[0]), parts[1]))
+        return versions
+    def evict(self):
+        evicted = []
+        with self.lock:
+            rows = self.connection.execute("SELECT filename, size FROM wheels ORDER BY last_used").fetchall()
+            total = sum(size for filename, size in rows)
+            for filename, size in rows:
+                if total <= self.max_size:
+                    break
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logging.error(f"Errore durante la rimozione di {filename} dalla wheelhouse: {e}")
+                    continue
+                self.connection.execute("DELETE FROM wheels WHERE filename = ?", (filename,))
+                total -= size
+                evicted.append(filename)
+            self.connection.commit()
+        if evicted:
+            logging.info(f"Wheel rimosse dalla wheelhouse: {', '.join(evicted)}")
+        return evicted
+
+_wheelhouse = None
+_wheelhouse_lock = threading.Lock()
+
+def get_wheelhouse():
+    global _wheelhouse
+    with _wheelhouse_lock:
+        if _wheelhouse is None:
+            _wheelhouse = Wheelhouse(os.environ.get("PYLIBS_WHEELHOUSE") or os.path.join(get_cache_dir(), "wheelhouse"))
+        return _wheelhouse
+
+def used_wheel_files(output, directory):
+    filenames = []
+    for line in output.splitlines():
+        match = re.search(r"(?:Processing|Saved|File was already downloaded) (\S+\.whl)", line)
+        if match and os.path.dirname(os.path.abspath(match.group(1))) == os.path.abspath(directory):
+            filenames.append(os.path.basename(match.group(1)))
+    return filenames
+
+def installed_requirements(output):
+    requirements = []
+    for line in output.splitlines():
+        if line.startswith("Successfully installed "):
+            for item in line[len("Successfully installed "):].split():
+                name, _, version = item.rpartition("-")
+                if name and version:
+                    requirements.append(f"{name}=={version}")
+    return requirements
+
+def missing_from_wheelhouse(requirements, wheelhouse):
+    available = wheelhouse.wheel_versions()
+    missing = []
+    for requirement in requirements:
+        name, _, version = requirement.partition("==")
+        if not version or (normalize_name(name), version) not in available:
+            missing.append(requirement)
+    return missing
+
+def collect_wheels(python_executable, requirements, wheelhouse, job=None):
+    missing = missing_from_wheelhouse(requirements, wheelhouse)
+    if not missing:
+        return []
+    import tempfile
+    staging_dir = tempfile.mkdtemp(prefix="staging-", dir=os.path.dirname(wheelhouse.directory))
+    try:
+        run_pip(python_executable, ["wheel", "--no-deps", "--wheel-dir", staging_dir, "--find-links", wheelhouse.directory, *missing], job=job)
+        added = wheelhouse.ingest(staging_dir)
+        if job is not None and added:
+            job.add_log(f"Wheelhouse: aggiunte {len(added)} wheel")
+        return added
+    except subprocess.CalledProcessError as e:
+        logging.error(f"Impossibile salvare nella wheelhouse le wheel di {', '.join(missing)}: {e.stderr}")
+        return []
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+def run_pip_install(python_executable, requirements, job=None, upgrade=False, offline=None):
+    upgrade_args = ["--upgrade"] if upgrade else []
+    if not WHEELHOUSE_ENABLED:
+        return run_pip(python_executable, ["install", *upgrade_args, *requirements], job=job)
+    offline = OFFLINE_MODE if offline is None else offline
+    wheelhouse = get_wheelhouse()
+    offline_args = ["install", "--no-index", "--find-links", wheelhouse.directory, *upgrade_args, *requirements]
+    if offline:
+        result = run_pip(python_executable, offline_args, job=job)
+    else:
+        result = None
+        if not missing_from_wheelhouse(requirements, wheelhouse):
+            if job is not None:
+                job.add_log("Tutte le wheel richieste sono nella wheelhouse: installazione senza rete")
+            try:
+                result = run_pip(python_executable, offline_args, job=job)
+            except subprocess.CalledProcessError as e:
+                logging.error(f"Installazione dalla wheelhouse non riuscita, nuovo tentativo con l'indice: {e.stderr}")
+        if result is None:
+            result = run_pip(python_executable, ["install", "--find-links", wheelhouse.directory, *upgrade_args, *requirements], job=job)
+            collect_wheels(python_executable, installed_requirements(result.stdout), wheelhouse, job=job)
+    wheelhouse.touch(used_wheel_files(result.stdout, wheelhouse.directory))
+    wheelhouse.evict()
+    return result
+
+def update_pip(callback=None, disable_buttons=None, enable_buttons=None):
+    callback, disable_buttons, enable_buttons = ui_callback(callback), ui_callback(disable_buttons), ui_callback(enable_buttons)
+    python_executable = get_system_python()
+    def task(job):
+        if disable_buttons:
+            disable_buttons()
+        try:
+            run_pip_install(python_executable, ["pip"], job=job, upgrade=True)
+            logging.info("pip aggiornato con successo.")
+            if callback:
+                callback(success=True, message="pip aggiornato con successo.")
+        except JobCancelled:
+            if callback:
+                callback(success=False, message="Aggiornamento di pip annullato.")
+        except subprocess.CalledProcessError as e:
+            logging.error(f"Errore durante l'aggiornamento di pip: {e.stderr}")
+            if callback:
+                callback(success=False, message=f"Errore durante l'aggiornamento di pip:\n{e.stderr}")
+        except Exception as e:
+            logging.error(f"Errore generico durante l'aggiornamento di pip: {e}")
+            if callback:
+                callback(success=False, message=f"Errore durante l'aggiornamento di pip: {e}")
+        finally:
+            if enable_buttons:
+                enable_buttons()
+    return get_job_scheduler().submit("Aggiorna pip", task, environment=python_executable, mutating=True, on_cancel=enable_buttons)
+
+InstalledDistribution = namedtuple("InstalledDistribution", ["name", "version", "path"])
+
+def marker_environment():
+    import os, sys, platform
+    return {
+        "os_name": os.name,
+        "sys_platform": sys.platform,
+        "platform_machine": platform.machine(),
+        "platform_python_implementation": platform.python_implementation(),
+        "platform_release": platform.release(),
+        "platform_system": platform.system(),
+        "platform_version": platform.version(),
+        "python_version": ".".join(platform.python_version_tuple()[:2]),
+        "python_full_version": platform.python_version(),
+        "implementation_name": sys.implementation.name,
+        "implementation_version": ".".join(str(part) for part in sys.implementation.version[:3]),
+    }
+
+def interpreter_info():
+    import sys
+    return {"path": list(sys.path), "version": sys.version.split()[0], "prefix": sys.prefix, "markers": marker_environment()}
+
+def interpreter_info_script():
+    import inspect
+    return inspect.getsource(marker_environment) + inspect.getsource(interpreter_info) + "import json\nprint(json.dumps(interpreter_info()))\n"
+_interpreter_info = {}
+
+def normalize_name(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+def is_current_interpreter(python_executable):
+    return os.path.normcase(os.path.abspath(python_executable)) == os.path.normcase(os.path.abspath(sys.executable))
+
+async def get_interpreter_info_async(python_executable, refresh=False):
+    if not refresh and python_executable in _interpreter_info:
+        return _interpreter_info[python_executable]
+    if is_current_interpreter(python_executable):
+        info = interpreter_info()
+    else:
+        result = await run_subprocess_async([python_executable, "-c", interpreter_info_script()], timeout=30, purpose="interpreter info")
+        info = json.loads(result.stdout)
+    info["path"] = [path for path in info["path"] if path and os.path.isdir(path)]
+    _interpreter_info[python_executable] = info
+    return info
+
+def get_interpreter_info(python_executable, refresh=False):
+    if not refresh and python_executable in _interpreter_info:
+        return _interpreter_info[python_executable]
+    return run_async(get_interpreter_info_async(python_executable, refresh))
+
+def get_interpreter_paths(python_executable, refresh=False):
+    return get_interpreter_info(python_executable, refresh)["path"]
+
+def read_metadata_headers(metadata_path):
+    headers = {}
+    try:
+        with open(metadata_path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.rstrip("\r\n")
+                if not line:
+                    break
+                key, sep, value = line.partition(":")
+                if sep and key in ("Name", "Version") and key not in headers:
+                    headers[key] = value.strip()
+                    if len(headers) == 2:
+                        break
+    except OSError as e:
+        logging.error(f"Errore durante la lettura dei metadati {metadata_path}: {e}")
+    return headers
+
+def parse_distribution_entry(entry):
+    if entry.name.endswith(".dist-info"):
+        stem = entry.name[:-len(".dist-info")]
+        metadata_path = os.path.join(entry.path, "METADATA")
+    elif entry.name.endswith(".egg-info"):
+        stem = entry.name[:-len(".egg-info")]
+        metadata_path = os.path.join(entry.path, "PKG-INFO") if entry.is_dir() else entry.path
+    else:
+        return None
+    parts = stem.split("-")
+    name = parts[0]
+    version = parts[1] if len(parts) > 1 else ""
+    if not version:
+        headers = read_metadata_headers(metadata_path)
+        name = headers.get("Name", name)
+        version = headers.get("Version", "")
+        if not version:
+            return None
+    return InstalledDistribution(normalize_name(name), version, entry.path)
+
+def scan_directory(directory):
+    distributions = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                distribution = parse_distribution_entry(entry)
+                if distribution and distribution.name not in distributions:
+                    distributions[distribution.name] = distribution
+    except OSError as e:
+        logging.error(f"Errore durante la scansione di {directory}: {e}")
+    return distributions
+
+def merge_distributions(directory_distributions):
+    distributions = {}
+    for directory_distribution in directory_distributions:
+        for name, distribution in directory_distribution.items():
+            if name not in distributions:
+                distributions[name] = distribution
+    return distributions
+
+def scan_installed_distributions(python_executable):
+    with Span("scansione librerie", python=python_executable) as span:
+        distributions = merge_distributions(scan_directory(directory) for directory in get_interpreter_paths(python_executable))
+        span.set(count=len(distributions))
+    return distributions
+
+def get_environments_config_path():
+    return os.path.join(get_cache_dir(), "environments.json")
+
+def load_user_environments():
+    try:
+        with open(get_environments_config_path(), encoding="utf-8") as f:
+            return [path for path in json.load(f) if isinstance(path, str)]
+    except FileNotFoundError:
+        return []
+    except (OSError, ValueError) as e:
+        logging.error(f"Errore durante la lettura degli ambienti aggiunti: {e}")
+        return []
+
+def save_user_environments(paths):
+    with open(get_environments_config_path(), "w", encoding="utf-8") as f:
+        json.dump(sorted(set(paths)), f, indent=2)
+
+def add_user_environment(path):
+    paths = load_user_environments()
+    if path not in paths:
+        paths.append(path)
+        save_user_environments(paths)
+
+def environment_python(environment_dir):
+    if os.name == 'nt':
+        candidates = [os.path.join(environment_dir, "python.exe"), os.path.join(environment_dir, "Scripts", "python.exe")]
+    else:
+        candidates = [os.path.join(environment_dir, "bin", "python3"), os.path.join(environment_dir, "bin", "python")]
+    for candidate in candidates:
+        if os.path.isfile(candidate) and os.access(candidate, os.X_OK):
+            return candidate
+    return None
+
+def environment_key(python_executable):
+    environment_dir = os.path.dirname(os.path.dirname(os.path.abspath(python_executable)))
+    if os.path.isfile(os.path.join(environment_dir, "pyvenv.cfg")) or os.path.isdir(os.path.join(environment_dir, "conda-meta")):
+        return os.path.normcase(environment_dir)
+    return os.path.normcase(os.path.realpath(python_executable))
+
+def discover_environments(extra_paths=None):
+    home = os.path.expanduser("~")
+    candidates = [get_system_python(), sys.executable]
+    executable_names = ("python.exe", "python3.exe") if os.name == 'nt' else ("python", "python3")
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        if not directory or os.path.basename(os.path.normpath(directory)) == "shims":
+            continue
+        for name in executable_names:
+            candidates.append(os.path.join(directory, name))
+        if os.name != 'nt':
+            candidates.extend(path for path in glob.glob(os.path.join(directory, "python3.*")) if re.search(r"python3\.\d+$", path))
+    environment_dirs = []
+    pyenv_root = os.environ.get("PYENV_ROOT") or os.path.join(home, ".pyenv")
+    environment_dirs.extend(glob.glob(os.path.join(pyenv_root, "versions", "*")))
+    conda_roots = [os.environ.get("CONDA_PREFIX", "")] + [os.path.join(home, name) for name in ("anaconda3", "miniconda3", "miniforge3", "mambaforge")] + ["/opt/conda"]
+    for conda_root in filter(None, conda_roots):
+        environment_dirs.append(conda_root)
+        environment_dirs.extend(glob.glob(os.path.join(conda_root, "envs", "*")))
+    venv_roots = [os.environ.get("WORKON_HOME", "")] + [os.path.join(home, name) for name in (".virtualenvs", ".venvs", "venvs", "envs")]
+    for venv_root in filter(None, venv_roots):
+        environment_dirs.extend(glob.glob(os.path.join(venv_root, "*")))
+    environment_dirs.extend(os.path.join(os.getcwd(), name) for name in (".venv", "venv"))
+    for path in list(extra_paths if extra_paths is not None else load_user_environments()):
+        if os.path.isdir(path):
+            environment_dirs.append(path)
+        else:
+            candidates.append(path)
+    candidates.extend(filter(None, (environment_python(directory) for directory in environment_dirs)))
+    environments = []
+    seen = set()
+    for candidate in candidates:
+        if not candidate or not os.path.isfile(candidate) or not os.access(candidate, os.X_OK):
+            continue
+        key = environment_key(candidate)
+        if key not in seen:
+            seen.add(key)
+            environments.append(os.path.abspath(candidate))
+    return environments
+
+def scan_environment(python_executable):
+    try:
+        info = get_interpreter_info(python_executable)
+        distributions = scan_installed_distributions(python_executable)
+        return {
+            "python": python_executable,
+            "version": info["version"],
+            "prefix": info["prefix"],
+            "libraries": {name: distribution.version for name, distribution in distributions.items()},
+            "error": None,
+        }
+    except Exception as e:
+        return {"python": python_executable, "version": "", "prefix": "", "libraries": {}, "error": str(e)}
+
+def scan_environments(python_executables, on_result=None, max_workers=None, job=None):
+    results = {}
+    if not python_executables:
+        return results
+    workers = max(1, min(max_workers or SCANNER_MAX_WORKERS, len(python_executables)))
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = {executor.submit(scan_environment, python): python for python in python_executables}
+        for future in as_completed(futures):
+            if job is not None and job.cancelled:
+                for pending_future in futures:
+                    pending_future.cancel()
+                raise JobCancelled()
+            python = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logging.error(f"Errore durante la scansione dell'ambiente {python}: {e}")
+                result = {"python": python, "version": "", "prefix": "", "libraries": {}, "error": str(e)}
+            results[python] = result
+            if result["error"]:
+                logging.error(f"Errore durante la scansione dell'ambiente {python}: {result['error']}")
+            if on_result:
+                on_result(result)
+    return results
+
+def environment_label(result):
+    version = f"Python {result['version']}" if result.get("version") else "Python ?"
+    return f"{version} — {result['python']}"
+
+async def probe_environments_async(python_executables, on_result=None):
+    results = {}
+    async def probe(python):
+        try:
+            info = await get_interpreter_info_async(python)
+            results[python] = {"python": python, "version": info["version"], "prefix": info["prefix"], "libraries": {}, "error": None}
+        except Exception as e:
+            results[python] = {"python": python, "version": "", "prefix": "", "libraries": {}, "error": str(e)}
+        if on_result:
+            on_result(results[python])
+    with Span("ricerca ambienti", count=len(python_executables)):
+        await asyncio.gather(*(probe(python) for python in python_executables))
+    return results
+
+def fetch_environments(callback, on_result=None, scan=True, extra_paths=None):
+    callback, on_result = ui_callback(callback), ui_callback(on_result)
+    def task(job):
+        environments = discover_environments(extra_paths)
+        if scan:
+            results = scan_environments(environments, on_result=on_result, job=job)
+        else:
+            results = run_async(probe_environments_async(environments, on_result), job)
+        if callback:
+            callback(environments=[results[python] for python in environments if python in results])
+    return get_job_scheduler().submit("Scansione ambienti" if scan else "Ricerca ambienti", task)
+
+VERSION_PATTERN = re.compile(
+    r"^\s*v?(?:(?P<epoch>\d+)!)?(?P<release>\d+(?:\.\d+)*)"
+    r"(?:[-_.]?(?P<pre_l>alpha|beta|preview|pre|rc|a|b|c)[-_.]?(?P<pre_n>\d+)?)?"
+    r"(?:-(?P<post_n1>\d+)|[-_.]?(?P<post_l>post|rev|r)[-_.]?(?P<post_n2>\d+)?)?"
+    r"(?:[-_.]?(?P<dev_l>dev)[-_.]?(?P<dev_n>\d+)?)?"
+    r"(?:\+(?P<local>[a-z0-9]+(?:[-_.][a-z0-9]+)*))?\s*$",
+    re.IGNORECASE,
+)
+PRE_RELEASE_ORDER = {"a": 0, "alpha": 0, "b": 1, "beta": 1, "c": 2, "rc": 2, "pre": 2, "preview": 2}
+
+def parse_version(version):
+    match = VERSION_PATTERN.match(version)
+    if not match:
+        return (0, version)
+    release = [int(part) for part in match.group("release").split(".")]
+    while len(release) > 1 and release[-1] == 0:
+        release.pop()
+    has_post = match.group("post_n1") is not None or match.group("post_l") is not None
+    if match.group("pre_l"):
+        pre = (PRE_RELEASE_ORDER[match.group("pre_l").lower()], int(match.group("pre_n") or 0))
+    elif match.group("dev_l") and not has_post:
+        pre = (-1, 0)
+    else:
+        pre = (3, 0)
+    post = int(match.group("post_n1") or match.group("post_n2") or 0) if has_post else -1
+    dev = int(match.group("dev_n") or 0) if match.group("dev_l") else float("inf")
+    local = ()
+    if match.group("local"):
+        local = tuple((1, int(part), "") if part.isdigit() else (0, 0, part.lower()) for part in re.split(r"[-_.]", match.group("local")))
+    return (1, int(match.group("epoch") or 0), tuple(release), pre, post, dev, local)
+
+SPECIFIER_PATTERN = re.compile(r"^\s*(===|==|!=|<=|>=|~=|<|>)\s*(\S+?)\s*$")
+
+def version_release(version):
+    match = VERSION_PATTERN.match(version)
+    if not match:
+        return None
+    return int(match.group("epoch") or 0), [int(part) for part in match.group("release").split(".")]
+
+def release_prefix_matches(version, prefix):
+    candidate, wanted = version_release(version), version_release(prefix)
+    if candidate is None or wanted is None:
+        return False
+    release = candidate[1] + [0] * (len(wanted[1]) - len(candidate[1]))
+    return candidate[0] == wanted[0] and release[:len(wanted[1])] == wanted[1]
+
+def is_prerelease_key(key):
+    return key[3] != (3, 0) or key[5] != float("inf")
+
+def version_satisfies(version, operator, spec_version):
+    if operator == "===":
+        return version.strip() == spec_version.strip()
+    if operator in ("==", "!=") and spec_version.endswith(".*"):
+        matched = release_prefix_matches(version, spec_version[:-2])
+        return matched if operator == "==" else not matched
+    key, spec_key = parse_version(version), parse_version(spec_version)
+    if key[0] != spec_key[0]:
+        return operator == "!="
+    public_key = key[:6] + ((),) if key[0] and not spec_key[6] else key
+    if operator == "==":
+        return public_key == spec_key
+    if operator == "!=":
+        return public_key != spec_key
+    if operator == "<=":
+        return public_key <= spec_key
+    if operator == ">=":
+        return public_key >= spec_key
+    if not key[0]:
+        return key < spec_key if operator == "<" else key > spec_key if operator == ">" else False
+    if operator == "<":
+        if is_prerelease_key(spec_key):
+            return key < spec_key
+        return key < spec_key[:3] + (spec_key[3] if spec_key[4] != -1 else (-1, 0), spec_key[4], 0, ())
+    if operator == ">":
+        if spec_key[5] != float("inf"):
+            return key >= spec_key[:5] + (spec_key[5] + 1, ())
+        if spec_key[4] != -1:
+            return key >= spec_key[:4] + (spec_key[4] + 1, 0, ())
+        return key > spec_key and key[:4] != spec_key[:4]
+    if operator == "~=":
+        release = version_release(spec_version)
+        if len(release[1]) < 2:
+            return False
+        prefix = f"{release[0]}!" + ".".join(str(part) for part in release[1][:-1])
+        return public_key >= spec_key and release_prefix_matches(version, prefix)
+    return False
+
+def specifier_matches(version, specifier):
+    for clause in specifier.strip().strip("()").split(","):
+        if not clause.strip():
+            continue
+        match = SPECIFIER_PATTERN.match(clause)
+        if match is None or not version_satisfies(version, match.group(1), match.group(2)):
+            return False
+    return True
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def get_http_session():
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            import requests
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=HTTP_HOST_CONNECTIONS, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+        return _http_session
+
+class AsyncHttpClient:
+    def __init__(self, max_connections=None, host_connections=None, retries=None, backoff=None):
+        self.max_connections = max_connections or HTTP_MAX_CONNECTIONS
+        self.host_connections = host_connections or HTTP_HOST_CONNECTIONS
+        self.retries = HTTP_RETRIES if retries is None else retries
+        self.backoff = HTTP_BACKOFF if backoff is None else backoff
+        self.semaphore = asyncio.Semaphore(self.max_connections)
+        self.host_semaphores = {}
+        self.executor = ThreadPoolExecutor(max_workers=self.max_connections, thread_name_prefix="http")
+    def host_semaphore(self, url):
+        from urllib.parse import urlsplit
+        host = urlsplit(url).netloc
+        semaphore = self.host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = self.host_semaphores[host] = asyncio.Semaphore(self.host_connections)
+        return semaphore
+    def retry_delay(self, attempt, retry_after=None):
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), HTTP_MAX_BACKOFF)
+        return min(self.backoff * 2 ** attempt, HTTP_MAX_BACKOFF) * random.uniform(0.5, 1.0)
+    def send(self, method, url, headers, timeout, consume, final):
+        session = get_http_session()
+        if consume is None:
+            response = session.request(method, url, headers=headers, timeout=timeout)
+            return response, response
+        with session.request(method, url, headers=headers, timeout=timeout, stream=True) as response:
+            if response.status_code in HTTP_RETRY_STATUSES and not final:
+                return response, None
+            return response, consume(response)
+    async def request(self, method, url, headers=None, timeout=10, consume=None, retries=None):
+        import requests
+        retries = self.retries if retries is None else retries
+        loop = asyncio.get_running_loop()
+        for attempt in range(retries + 1):
+            async with self.semaphore, self.host_semaphore(url):
+                try:
+                    response, result = await loop.run_in_executor(self.executor, self.send, method, url, headers, timeout, consume, attempt == retries)
+                except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                    if attempt == retries:
+                        raise
+                    delay = self.retry_delay(attempt)
+                    logging.error(f"Errore di rete per {url}, nuovo tentativo tra {delay:.1f} s: {e}")
+                else:
+                    if response.status_code not in HTTP_RETRY_STATUSES or attempt == retries:
+                        return result
+                    delay = self.retry_delay(attempt, response.headers.get("Retry-After"))
+                    logging.error(f"Risposta {response.status_code} da {url}, nuovo tentativo tra {delay:.1f} s")
+            await asyncio.sleep(delay)
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+def get_http_client():
+    return get_async_primitive("http", AsyncHttpClient)
+
+class IndexCache:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS index_cache ("
+            "index_url TEXT NOT NULL, name TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+            "data TEXT, fetched_at REAL NOT NULL, PRIMARY KEY (index_url, name))"
+        )
+        self.connection.commit()
+    def get(self, index_url, name):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT etag, last_modified, data, fetched_at FROM index_cache WHERE index_url = ? AND name = ?", (index_url, name)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, data, fetched_at = row
+        return {"etag": etag, "last_modified": last_modified, "data": json.loads(data), "fetched_at": fetched_at}
+    def put(self, index_url, name, data, etag=None, last_modified=None):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO index_cache (index_url, name, etag, last_modified, data, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (index_url, name, etag, last_modified, json.dumps(data, separators=(",", ":")), time.time()),
+            )
+            self.connection.commit()
+    def touch(self, index_url, name):
+        with self.lock:
+            self.connection.execute("UPDATE index_cache SET fetched_at = ? WHERE index_url = ? AND name = ?", (time.time(), index_url, name))
+            self.connection.commit()
+    def clear(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM index_cache")
+            self.connection.commit()
+
+_index_cache = None
+_index_cache_lock = threading.Lock()
+
+def get_index_cache():
+    global _index_cache
+    with _index_cache_lock:
+        if _index_cache is None:
+            _index_cache = IndexCache(os.path.join(get_cache_dir(), "index_cache.sqlite3"))
+        return _index_cache
+
+async def fetch_cached_async(index_url, name, url, extract, ttl=None, offline=None):
+    import requests
+    loop = asyncio.get_running_loop()
+    cache = await loop.run_in_executor(None, get_index_cache)
+    entry = await loop.run_in_executor(None, cache.get, index_url, name)
+    if offline is None:
+        offline = OFFLINE_MODE
+    ttl = CACHE_TTL if ttl is None else ttl
+    if entry and (offline or time.time() - entry["fetched_at"] < ttl):
+        return entry["data"]
+    if offline:
+        return None
+    if not await is_connected_async():
+        return entry["data"] if entry else None
+    headers = {}
+    if entry:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+    try:
+        with Span(http_span_name(url), url=url, conditional=bool(headers)) as span:
+            response = await get_http_client().get(url, headers=headers, timeout=10)
+            span.set(status_code=response.status_code, bytes=len(response.content))
+    except requests.RequestException as e:
+        if entry:
+            logging.error(f"Errore di rete per {url}, uso la voce in cache: {e}")
+            return entry["data"]
+        raise
+    if response.status_code == 304 and entry:
+        await loop.run_in_executor(None, cache.touch, index_url, name)
+        return entry["data"]
+    if response.status_code == 404:
+        await loop.run_in_executor(None, cache.put, index_url, name, None)
+        return None
+    response.raise_for_status()
+    data = await loop.run_in_executor(None, extract, response)
+    await loop.run_in_executor(None, cache.put, index_url, name, data, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    return data
+
+def fetch_cached(index_url, name, url, extract, ttl=None, offline=None):
+    return run_async(fetch_cached_async(index_url, name, url, extract, ttl, offline))
+
+def extract_index_metadata(response):
+    info = response.json()["info"]
+    return {"version": info["version"], "requires_dist": info.get("requires_dist") or [], "requires_python": info.get("requires_python")}
+
+async def fetch_index_metadata_async(library_name, index_url=None, offline=None):
+    index_url = (index_url or INDEX_URL).rstrip('/')
+    return await fetch_cached_async(index_url, library_name, f"{index_url}/{library_name}/json", extract_index_metadata, offline=offline)
+
+def fetch_index_metadata(library_name, index_url=None, offline=None):
+    return run_async(fetch_index_metadata_async(library_name, index_url, offline))
+
+async def fetch_latest_version_async(library_name, index_url=None, offline=None):
+    metadata = await fetch_index_metadata_async(library_name, index_url, offline)
+    return metadata["version"] if metadata else None
+
+def fetch_latest_version(library_name, index_url=None, offline=None):
+    return run_async(fetch_latest_version_async(library_name, index_url, offline))
+
+async def resolve_latest_versions_async(installed_libraries, on_result=None, index_url=None, max_workers=None, offline=None):
+    latest_versions = {}
+    if not installed_libraries:
+        return latest_versions
+    limit = asyncio.Semaphore(max(1, max_workers or RESOLVER_MAX_WORKERS))
+    async def resolve(name, version):
+        async with limit:
+            try:
+                latest_version = await fetch_latest_version_async(name, index_url, offline)
+            except Exception as e:
+                logging.error(f"Errore durante il recupero dell'ultima versione di {name}: {e}")
+                latest_version = None
+        if not latest_version or parse_version(latest_version) <= parse_version(version):
+            latest_version = version
+        latest_versions[name] = latest_version
+        if on_result:
+            on_result(name, version, latest_version)
+    with Span("risoluzione ultime versioni", count=len(installed_libraries)):
+        await asyncio.gather(*(resolve(name, version) for name, version in installed_libraries.items()))
+    return latest_versions
+
+def resolve_latest_versions(installed_libraries, on_result=None, index_url=None, max_workers=None, offline=None, job=None):
+    if not installed_libraries:
+        return {}
+    return run_async(resolve_latest_versions_async(installed_libraries, on_result, index_url, max_workers, offline), job)
+
+_inventory_snapshot_lock = threading.Lock()
+
+def get_inventory_snapshot_path():
+    return os.path.join(get_cache_dir(), "inventory.json")
+
+def read_inventory_snapshots():
+    try:
+        with open(get_inventory_snapshot_path(), encoding="utf-8") as f:
+            snapshots = json.load(f)
+        return snapshots if isinstance(snapshots, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.error(f"Errore durante la lettura dell'inventario salvato: {e}")
+        return {}
+
+def load_inventory_snapshot(python_executable):
+    return [tuple(library) for library in read_inventory_snapshots().get(python_executable, []) if len(library) == 3]
+
+def save_inventory_snapshot(python_executable, libraries):
+    path = get_inventory_snapshot_path()
+    with _inventory_snapshot_lock:
+        snapshots = read_inventory_snapshots()
+        snapshots[python_executable] = [list(library) for library in libraries]
+        try:
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(snapshots, f, separators=(",", ":"))
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logging.error(f"Errore durante il salvataggio dell'inventario: {e}")
+
+class AdvisoryDatabase:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.ranges = None
+        self.parsed = {}
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS advisories (id TEXT PRIMARY KEY, summary TEXT, aliases TEXT, modified TEXT)")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS affected (name TEXT NOT NULL, advisory_id TEXT NOT NULL, introduced TEXT, fixed TEXT, last_affected TEXT, version TEXT)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS affected_name ON affected (name)")
+        self.connection.commit()
+    def replace(self, records):
+        advisories = []
+        affected = []
+        for record in records:
+            rows = osv_affected_rows(record)
+            if rows:
+                advisories.append((record["id"], record.get("summary") or "", ",".join(record.get("aliases") or ()), record.get("modified")))
+                affected.extend(rows)
+        with self.lock:
+            self.connection.execute("DELETE FROM advisories")
+            self.connection.execute("DELETE FROM affected")
+            self.connection.executemany("INSERT OR REPLACE INTO advisories (id, summary, aliases, modified) VALUES (?, ?, ?, ?)", advisories)
+            self.connection.executemany("INSERT INTO affected (name, advisory_id, introduced, fixed, last_affected, version) VALUES (?, ?, ?, ?, ?, ?)", affected)
+            self.connection.commit()
+            self.connection.execute("VACUUM")
+            self.ranges = None
+            self.parsed = {}
+        return len(advisories), len({row[0] for row in affected})
+    def count(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM advisories").fetchone()[0]
+    def load_ranges(self):
+        with self.lock:
+            if self.ranges is None:
+                ranges = {}
+                rows = self.connection.execute(
+                    "SELECT affected.name, affected.introduced, affected.fixed, affected.last_affected, affected.version, "
+                    "advisories.id, advisories.summary, advisories.aliases FROM affected JOIN advisories ON advisories.id = affected.advisory_id"
+                )
+                for row in rows:
+                    ranges.setdefault(row[0], []).append(row[1:])
+                self.ranges = ranges
+            return self.ranges
+    def parsed_ranges(self, name):
+        parsed = self.parsed.get(name)
+        if parsed is None:
+            parsed = []
+            for introduced, fixed, last_affected, version, advisory_id, summary, aliases in self.load_ranges().get(name, ()):
+                advisory = {"id": advisory_id, "summary": summary, "aliases": aliases.split(",") if aliases else [], "fixed": fixed}
+                parsed.append((
+                    parse_version(introduced) if introduced and introduced != "0" else None,
+                    parse_version(fixed) if fixed else None,
+                    parse_version(last_affected) if last_affected else None,
+                    parse_version(version) if version else None,
+                    advisory,
+                ))
+            self.parsed[name] = parsed
+        return parsed
+    def match(self, installed):
+        ranges = self.load_ranges()
+        matches = {}
+        for name, version in installed.items():
+            if name not in ranges:
+                continue
+            key = parse_version(version)
+            found = {}
+            for introduced, fixed, last_affected, exact, advisory in self.parsed_ranges(name):
+                if exact is not None:
+                    affected = key == exact
+                else:
+                    affected = (introduced is None or key >= introduced) and (fixed is None or key < fixed) and (last_affected is None or key <= last_affected)
+                if affected and advisory["id"] not in found:
+                    found[advisory["id"]] = advisory
+            if found:
+                matches[name] = sorted(found.values(), key=lambda advisory: advisory["id"])
+        return matches
+
+def osv_affected_rows(record):
+    rows = []
+    if not isinstance(record, dict) or not record.get("id") or record.get("withdrawn"):
+        return rows
+    for affected in record.get("affected") or ():
+        package = affected.get("package") or {}
+        if package.get("ecosystem") != "PyPI" or not package.get("name"):
+            continue
+        name = normalize_name(package["name"])
+        ranges = [item for item in affected.get("ranges") or () if item.get("type") == "ECOSYSTEM"]
+        for item in ranges:
+            introduced = None
+            for event in item.get("events") or ():
+                if "introduced" in event:
+                    introduced = event["introduced"]
+                elif "fixed" in event and introduced is not None:
+                    rows.append((name, record["id"], introduced, event["fixed"], None, None))
+                    introduced = None
+                elif "last_affected" in event and introduced is not None:
+                    rows.append((name, record["id"], introduced, None, event["last_affected"], None))
+                    introduced = None
+            if introduced is not None:
+                rows.append((name, record["id"], introduced, None, None, None))
+        if not ranges:
+            rows.extend((name, record["id"], None, None, None, version) for version in affected.get("versions") or ())
+    return rows
+
+def read_osv_records(source):
+    import zipfile
+    def parse(data, origin):
+        try:
+            document = json.loads(data)
+        except ValueError as e:
+            logging.error(f"Avviso OSV non valido in {origin}: {e}")
+            return []
+        return document if isinstance(document, list) else [document]
+    if os.path.isdir(source):
+        for directory, _, filenames in os.walk(source):
+            for filename in sorted(filenames):
+                if filename.endswith(".json"):
+                    with open(os.path.join(directory, filename), "rb") as f:
+                        yield from parse(f.read(), filename)
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for filename in archive.namelist():
+                if filename.endswith(".json"):
+                    yield from parse(archive.read(filename), filename)
+    else:
+        with open(source, "rb") as f:
+            yield from parse(f.read(), source)
+
+_advisory_database = None
+_advisory_database_lock = threading.Lock()
+
+def get_advisory_database():
+    global _advisory_database
+    with _advisory_database_lock:
+        if _advisory_database is None:
+            _advisory_database = AdvisoryDatabase(os.path.join(get_cache_dir(), "advisories.sqlite3"))
+        return _advisory_database
+
+def import_advisory_database(source):
+    with Span("importazione vulnerabilità", source=source) as span:
+        advisories, packages = get_advisory_database().replace(read_osv_records(source))
+        span.set(advisories=advisories, packages=packages)
+    return advisories, packages
+
+def match_installed_advisories(installed_libraries):
+    with Span("verifica vulnerabilità", count=len(installed_libraries)) as span:
+        matches = get_advisory_database().match(installed_libraries)
+        span.set(vulnerable=len(matches))
+    return matches
+
+def format_advisories(advisories):
+    lines = []
+    for advisory in advisories:
+        aliases = f" ({', '.join(advisory['aliases'])})" if advisory["aliases"] else ""
+        fixed = f" - corretta in {advisory['fixed']}" if advisory["fixed"] else ""
+        lines.append(f"  {advisory['id']}{aliases}: {advisory['summary']}{fixed}")
+    return lines
+
+def import_advisories(source, callback=None, disable_buttons=None, enable_buttons=None):
+    callback, disable_buttons, enable_buttons = ui_callback(callback), ui_callback(disable_buttons), ui_callback(enable_buttons)
+    def task(job):
+        if disable_buttons:
+            disable_buttons()
+        try:
+            advisories, packages = import_advisory_database(source)
+            logging.info(f"Importati {advisories} avvisi di sicurezza da {source}")
+            if callback:
+                callback(success=True, message=f"Importati {advisories} avvisi di sicurezza relativi a {packages} librerie.")
+        except Exception as e:
+            logging.error(f"Errore durante l'importazione degli avvisi da {source}: {e}")
+            if callback:
+                callback(success=False, message=f"Errore durante l'importazione degli avvisi di sicurezza: {e}")
+        finally:
+            if enable_buttons:
+                enable_buttons()
+    return get_job_scheduler().submit("Importa avvisi di sicurezza", task, on_cancel=enable_buttons)
+
+def fetch_installed_libraries_with_latest(callback, disable_buttons=None, enable_buttons=None, on_installed=None, on_latest=None, index_url=None, previous=None, targets=(), on_error=None, on_dependencies=None, on_problems=None, on_vulnerabilities=None):
+    callback, disable_buttons, enable_buttons = ui_callback(callback), ui_callback(disable_buttons), ui_callback(enable_buttons)
+    on_installed, on_latest, on_error = ui_callback(on_installed), ui_callback(on_latest), ui_callback(on_error)
+    on_dependencies, on_problems, on_vulnerabilities = ui_callback(on_dependencies), ui_callback(on_problems), ui_callback(on_vulnerabilities)
+    python_executable = get_system_python()
+    def task(job):
+        if disable_buttons:
+            disable_buttons()
+        try:
+            with Span("elenco librerie", python=python_executable) as span:
+                distributions = scan_installed_distributions(python_executable)
+                installed_libraries = {name: distributions[name].version for name in sorted(distributions)}
+                previous_rows = previous or {}
+                target_names = {normalize_name(name) for name in targets}
+                known_latest = {}
+                to_resolve = {}
+                for name, version in installed_libraries.items():
+                    previous_row = previous_rows.get(name)
+                    if previous_row and previous_row[0] == version and previous_row[1] is not None and name not in target_names:
+                        known_latest[name] = previous_row[1]
+                    else:
+                        to_resolve[name] = version
+                if on_installed:
+                    on_installed([(name, version, known_latest.get(name)) for name, version in installed_libraries.items()])
+                if on_dependencies or on_problems:
+                    graph = get_dependency_graph(python_executable, distributions)
+                    if on_dependencies:
+                        on_dependencies(graph.required_by_map())
+                    if on_problems:
+                        on_problems(graph.check())
+                if on_vulnerabilities:
+                    on_vulnerabilities(match_installed_advisories(installed_libraries))
+                latest_versions = resolve_latest_versions(to_resolve, on_result=on_latest, index_url=index_url, job=job)
+                latest_versions.update(known_latest)
+                libraries = []
+                for name, version in installed_libraries.items():
+                    libraries.append((name, version, latest_versions.get(name, version)))
+                span.set(count=len(libraries), resolved=len(to_resolve))
+                save_inventory_snapshot(python_executable, libraries)
+                if callback:
+                    callback(libraries=libraries)
+        except JobCancelled:
+            logging.info("Recupero delle librerie annullato.")
+        except subprocess.CalledProcessError as e:
+            logging.error(f"Errore subprocess durante il recupero delle librerie: {e}")
+            logging.error(f"Stdout: {e.stdout}")
+            logging.error(f"Stderr: {e.stderr}")
+            if on_error:
+                on_error(message=f"Errore durante il recupero delle librerie:\n{e.stderr}")
+        except json.JSONDecodeError as e:
+            logging.error(f"Errore di parsing JSON: {e}")
+            if on_error:
+                on_error(message=f"Errore durante il parsing dei dati:\n{e}")
+        except Exception as e:
+            logging.error(f"Errore generico durante il recupero delle librerie: {e}")
+            if on_error:
+                on_error(message=f"Errore durante il recupero delle librerie: {e}")
+        finally:
+            if enable_buttons:
+                enable_buttons()
+    return get_job_scheduler().submit("Elenco librerie", task, environment=python_executable, on_cancel=enable_buttons)
+
+def diff_distributions(before, after):
+    added = {name: distribution.version for name, distribution in after.items() if name not in before}
+    changed = {name: distribution.version for name, distribution in after.items() if name in before and before[name] != distribution}
+    removed = sorted(name for name in before if name not in after)
+    return added, changed, removed
+
+class SitePackagesWatcher:
+    def __init__(self, interval=None):
+        self.interval = WATCH_INTERVAL if interval is None else interval
+        self.lock = threading.Lock()
+        self.environments = {}
+        self.wake_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+    def watch(self, python_executable, callback):
+        if self.interval <= 0:
+            return
+        with self.lock:
+            self.environments[python_executable] = {"callback": callback, "directories": None, "mutations": None}
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="site-packages-watcher", daemon=True)
+                self.thread.start()
+        self.wake_event.set()
+    def unwatch(self, python_executable):
+        with self.lock:
+            self.environments.pop(python_executable, None)
+    def stop(self):
+        self.stop_event.set()
+        self.wake_event.set()
+    def run(self):
+        while not self.stop_event.is_set():
+            with self.lock:
+                environments = list(self.environments.items())
+            for python_executable, environment in environments:
+                try:
+                    self.poll(python_executable, environment)
+                except Exception as e:
+                    logging.error(f"Errore durante il controllo delle modifiche in {python_executable}: {e}")
+            self.wake_event.wait(self.interval)
+            self.wake_event.clear()
+    def resync(self, python_executable, environment):
+        environment["mutations"] = get_job_scheduler().mutation_count(python_executable)
+        environment["directories"] = {directory: {"stamp": get_path_stamp(directory), "pending": False, "distributions": scan_directory(directory)}
+                                      for directory in get_interpreter_paths(python_executable)}
+    def poll(self, python_executable, environment):
+        if environment["directories"] is None:
+            self.resync(python_executable, environment)
+            return
+        scheduler = get_job_scheduler()
+        if scheduler.is_busy(python_executable):
+            return
+        if scheduler.mutation_count(python_executable) != environment["mutations"]:
+            self.resync(python_executable, environment)
+            return
+        settled = []
+        for directory, state in environment["directories"].items():
+            stamp = get_path_stamp(directory)
+            if stamp != state["stamp"]:
+                state["stamp"] = stamp
+                state["pending"] = True
+            elif state["pending"]:
+                state["pending"] = False
+                settled.append(directory)
+        if not settled:
+            return
+        with Span("modifiche librerie", python=python_executable, directories=len(settled)) as span:
+            before = merge_distributions(state["distributions"] for state in environment["directories"].values())
+            for directory in settled:
+                environment["directories"][directory]["distributions"] = scan_directory(directory)
+            after = merge_distributions(state["distributions"] for state in environment["directories"].values())
+            added, changed, removed = diff_distributions(before, after)
+            span.set(added=len(added), changed=len(changed), removed=len(removed))
+        if added or changed or removed:
+            logging.info(f"Modifiche rilevate in {python_executable}: {len(added)} aggiunte, {len(changed)} modificate, {len(removed)} rimosse")
+            environment["callback"]({"python": python_executable, "distributions": after, "added": added, "changed": changed, "removed": removed})
+
+_site_packages_watcher = None
+_site_packages_watcher_lock = threading.Lock()
+
+def get_site_packages_watcher():
+    global _site_packages_watcher
+    with _site_packages_watcher_lock:
+        if _site_packages_watcher is None:
+            _site_packages_watcher = SitePackagesWatcher()
+        return _site_packages_watcher
+
+def apply_library_changes(changes, on_latest=None, on_dependencies=None, on_problems=None, index_url=None, on_vulnerabilities=None):
+    on_latest, on_dependencies, on_problems, on_vulnerabilities = ui_callback(on_latest), ui_callback(on_dependencies), ui_callback(on_problems), ui_callback(on_vulnerabilities)
+    python_executable = changes["python"]
+    def task(job):
+        try:
+            distributions = changes["distributions"]
+            if on_dependencies or on_problems:
+                graph = get_dependency_graph(python_executable, distributions)
+                if on_dependencies:
+                    on_dependencies(graph.required_by_map())
+                if on_problems:
+                    on_problems(graph.check())
+            if on_vulnerabilities:
+                on_vulnerabilities(match_installed_advisories({name: distribution.version for name, distribution in distributions.items()}))
+            targets = dict(changes["added"], **changes["changed"])
+            latest_versions = resolve_latest_versions(targets, on_result=on_latest, index_url=index_url, job=job)
+            previous = {row[0]: row for row in load_inventory_snapshot(python_executable)}
+            libraries = []
+            for name in sorted(distributions):
+                version = distributions[name].version
+                previous_row = previous.get(name)
+                if name in latest_versions:
+                    latest_version = latest_versions[name]
+                elif previous_row and previous_row[1] == version and previous_row[2]:
+                    latest_version = previous_row[2]
+                else:
+                    latest_version = version
+                libraries.append((name, version, latest_version))
+            save_inventory_snapshot(python_executable, libraries)
+        except JobCancelled:
+            logging.info("Aggiornamento delle modifiche annullato.")
+        except Exception as e:
+            logging.error(f"Errore durante l'applicazione delle modifiche in {python_executable}: {e}")
+    return get_job_scheduler().submit("Modifiche esterne alle librerie", task, environment=python_executable)
+
+class LRUCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    def get(self, key, stamp):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != stamp:
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+    def put(self, key, stamp, value):
+        with self.lock:
+            self.entries[key] = (stamp, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+_details_cache = LRUCache(DETAILS_CACHE_SIZE)
+_requirements_cache = LRUCache(DETAILS_CACHE_SIZE * 16)
+
+def get_path_stamp(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def get_metadata_path(distribution_path):
+    if distribution_path.endswith(".dist-info"):
+        return os.path.join(distribution_path, "METADATA")
+    if os.path.isdir(distribution_path):
+        return os.path.join(distribution_path, "PKG-INFO")
+    return distribution_path
+
+def read_text_file(path):
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return f.read()
+    except OSError:
+        return None
+
+def read_distribution_requirements(distribution):
+    stamp = get_path_stamp(distribution.path)
+    requirements = _requirements_cache.get(distribution.path, stamp)
+    if requirements is not None:
+        return requirements
+    requirements = []
+    try:
+        with open(get_metadata_path(distribution.path), encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if line in ("\n", "\r\n"):
+                    break
+                if line.startswith("Requires-Dist:"):
+                    requirements.append(line[len("Requires-Dist:"):].strip())
+    except OSError as e:
+        logging.error(f"Errore durante la lettura delle dipendenze di {distribution.name}: {e}")
+    if not distribution.path.endswith(".dist-info") and os.path.isdir(distribution.path):
+        requires_txt = read_text_file(os.path.join(distribution.path, "requires.txt"))
+        if requires_txt:
+            for line in requires_txt.splitlines():
+                line = line.strip()
+                if line.startswith("["):
+                    break
+                if line:
+                    requirements.append(line)
+    requirements = tuple(requirements)
+    _requirements_cache.put(distribution.path, stamp, requirements)
+    return requirements
+
+def read_distribution_files(distribution):
+    base_dir = os.path.dirname(distribution.path)
+    files = []
+    if distribution.path.endswith(".dist-info"):
+        record_path = os.path.join(distribution.path, "RECORD")
+        try:
+            with open(record_path, encoding="utf-8", errors="replace", newline="") as f:
+                for row in csv.reader(f):
+                    if not row:
+                        continue
+                    size = int(row[2]) if len(row) > 2 and row[2].isdigit() else None
+                    files.append((row[0], size))
+        except OSError:
+            pass
+    elif os.path.isdir(distribution.path):
+        listing = read_text_file(os.path.join(distribution.path, "installed-files.txt"))
+        if listing:
+            files = [(os.path.normpath(os.path.join(os.path.basename(distribution.path), line.strip())), None) for line in listing.splitlines() if line.strip()]
+    missing_sizes = stat_file_sizes(base_dir, [relative_path for relative_path, size in files if size is None])
+    total_size = sum(missing_sizes.get(relative_path, 0) if size is None else size for relative_path, size in files)
+    return [relative_path for relative_path, size in files], total_size
+
+def stat_file_sizes(base_dir, relative_paths):
+    by_directory = {}
+    for relative_path in relative_paths:
+        directory, filename = os.path.split(os.path.normpath(os.path.join(base_dir, relative_path)))
+        by_directory.setdefault(directory, []).append((filename, relative_path))
+    sizes = {}
+    for directory, entries in by_directory.items():
+        if len(entries) == 1:
+            try:
+                sizes[entries[0][1]] = os.stat(os.path.join(directory, entries[0][0])).st_size
+            except OSError:
+                pass
+            continue
+        try:
+            with os.scandir(directory) as listing:
+                directory_sizes = {entry.name: entry.stat().st_size for entry in listing if entry.is_file()}
+        except OSError:
+            continue
+        for filename, relative_path in entries:
+            if filename in directory_sizes:
+                sizes[relative_path] = directory_sizes[filename]
+    return sizes
+
+_size_cache_lock = threading.Lock()
+_size_cache = None
+
+def get_size_cache_path():
+    return os.path.join(get_cache_dir(), "sizes.json")
+
+def load_size_cache():
+    global _size_cache
+    with _size_cache_lock:
+        if _size_cache is None:
+            try:
+                with open(get_size_cache_path(), encoding="utf-8") as f:
+                    _size_cache = {path: tuple(entry) for path, entry in json.load(f).items()}
+            except FileNotFoundError:
+                _size_cache = {}
+            except (OSError, ValueError, TypeError) as e:
+                logging.error(f"Errore durante la lettura della cache delle dimensioni: {e}")
+                _size_cache = {}
+        return _size_cache
+
+def save_size_cache():
+    path = get_size_cache_path()
+    with _size_cache_lock:
+        if _size_cache is None:
+            return
+        entries = {key: list(entry) for key, entry in _size_cache.items() if os.path.exists(key)}
+        try:
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(entries, f, separators=(",", ":"))
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logging.error(f"Errore durante il salvataggio della cache delle dimensioni: {e}")
+
+def distribution_size(distribution, stamp=None):
+    size = read_distribution_files(distribution)[1]
+    with _size_cache_lock:
+        _size_cache[distribution.path] = (stamp, size)
+    return size
+
+def compute_library_sizes(python_executable, distributions=None, max_workers=None, job=None):
+    if distributions is None:
+        distributions = scan_installed_distributions(python_executable)
+    cache = load_size_cache()
+    sizes = {}
+    missing = []
+    with Span("dimensioni librerie", python=python_executable, count=len(distributions)) as span:
+        for name, distribution in distributions.items():
+            stamp = get_path_stamp(distribution.path)
+            cached = cache.get(distribution.path)
+            if cached is not None and cached[0] == stamp:
+                sizes[name] = cached[1]
+            else:
+                missing.append((name, stamp))
+        if missing:
+            with ThreadPoolExecutor(max_workers=max(1, max_workers or SIZE_MAX_WORKERS)) as executor:
+                futures = {executor.submit(distribution_size, distributions[name], stamp): name for name, stamp in missing}
+                for future in as_completed(futures):
+                    if job is not None and job.cancelled:
+                        for pending in futures:
+                            pending.cancel()
+                        raise JobCancelled()
+                    sizes[futures[future]] = future.result()
+        span.set(computed=len(missing))
+    if missing:
+        save_size_cache()
+    return sizes
+
+def fetch_library_sizes(on_sizes, python_executable=None):
+    on_sizes = ui_callback(on_sizes)
+    python_executable = python_executable or get_system_python()
+    def task(job):
+        try:
+            on_sizes(compute_library_sizes(python_executable, job=job))
+        except JobCancelled:
+            logging.info("Calcolo delle dimensioni annullato.")
+        except Exception as e:
+            logging.error(f"Errore durante il calcolo delle dimensioni delle librerie in {python_executable}: {e}")
+    return get_job_scheduler().submit("Dimensioni librerie", task, environment=python_executable)
+
+def read_entry_points(distribution):
+    entry_points = {}
+    content = read_text_file(os.path.join(distribution.path, "entry_points.txt")) if os.path.isdir(distribution.path) else None
+    section = None
+    for line in (content or "").splitlines():
+        line = line.strip()
+        if not line or line.startswith(("#", ";")):
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            section = line[1:-1]
+            entry_points.setdefault(section, [])
+        elif section:
+            entry_points[section].append(line)
+    return entry_points
+
+def read_distribution_details(distribution):
+    stamp = get_path_stamp(distribution.path)
+    details = _details_cache.get(distribution.path, stamp)
+    if details is not None:
+        return details
+    import email.parser
+    message = email.parser.Parser().parsestr(read_text_file(get_metadata_path(distribution.path)) or "")
+    description = message.get_payload()
+    if not isinstance(description, str) or not description.strip():
+        description = message.get("Description", "")
+    files, total_size = read_distribution_files(distribution)
+    details = {
+        "name": message.get("Name", distribution.name),
+        "version": message.get("Version", distribution.version),
+        "summary": message.get("Summary", ""),
+        "home_page": message.get("Home-page", ""),
+        "author": message.get("Author", "") or message.get("Author-email", ""),
+        "license": message.get("License", ""),
+        "requires_python": message.get("Requires-Python", ""),
+        "project_urls": message.get_all("Project-URL") or [],
+        "requires": list(read_distribution_requirements(distribution)),
+        "entry_points": read_entry_points(distribution),
+        "files": files,
+        "size": total_size,
+        "location": os.path.dirname(distribution.path),
+        "description": description.strip(),
+    }
+    _details_cache.put(distribution.path, stamp, details)
+    return details
+
+REQUIREMENT_PATTERN = re.compile(r"^\s*(?P<name>[A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*(?P<specifier>[^;]*?)\s*(?:;\s*(?P<marker>.*?))?\s*$")
+MARKER_TOKEN_PATTERN = re.compile(r"\s*(?:(?P<string>'[^']*'|\"[^\"]*\")|(?P<op>===|==|!=|<=|>=|~=|<|>|\(|\))|(?P<word>[A-Za-z_][A-Za-z0-9_.]*))")
+MARKER_VERSION_VARIABLES = ("python_version", "python_full_version", "implementation_version")
+
+def parse_requirement(requirement):
+    match = REQUIREMENT_PATTERN.match(requirement)
+    if not match:
+        return None
+    specifier = match.group("specifier")
+    if specifier.startswith("@"):
+        specifier = ""
+    return normalize_name(match.group("name")), specifier.strip("() "), match.group("marker") or ""
+
+def tokenize_marker(marker):
+    tokens = []
+    marker = marker.strip()
+    position = 0
+    while position < len(marker):
+        match = MARKER_TOKEN_PATTERN.match(marker, position)
+        if not match:
+            raise ValueError(f"marker non valido: {marker}")
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        position = match.end()
+    return tokens
+
+def compare_marker_values(left, operator, right, version=False):
+    if operator == "in":
+        return left in right
+    if operator == "not in":
+        return left not in right
+    if version or VERSION_PATTERN.match(left) and VERSION_PATTERN.match(right):
+        return version_satisfies(left, operator, right)
+    if operator in ("==", "==="):
+        return left == right
+    if operator == "!=":
+        return left != right
+    if operator == "<":
+        return left < right
+    if operator == "<=":
+        return left <= right
+    if operator == ">":
+        return left > right
+    if operator == ">=":
+        return left >= right
+    return False
+
+class MarkerEvaluator:
+    KEYWORDS = ("and", "or", "not", "in")
+    def __init__(self, tokens, environment):
+        self.tokens = tokens
+        self.environment = environment
+        self.position = 0
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+    def evaluate(self):
+        result = self.parse_or()
+        if self.position != len(self.tokens):
+            raise ValueError(f"token inatteso nel marker: {self.peek()[1]}")
+        return result
+    def parse_or(self):
+        result = self.parse_and()
+        while self.peek() == ("word", "or"):
+            self.take()
+            result = self.parse_and() or result
+        return result
+    def parse_and(self):
+        result = self.parse_atom()
+        while self.peek() == ("word", "and"):
+            self.take()
+            result = self.parse_atom() and result
+        return result
+    def parse_atom(self):
+        if self.peek() == ("op", "("):
+            self.take()
+            result = self.parse_or()
+            if self.take() != ("op", ")"):
+                raise ValueError("parentesi non chiusa nel marker")
+            return result
+        left, left_variable = self.parse_value()
+        kind, operator = self.take()
+        if (kind, operator) == ("word", "not"):
+            if self.take() != ("word", "in"):
+                raise ValueError("atteso 'in' dopo 'not' nel marker")
+            operator = "not in"
+        elif (kind, operator) != ("word", "in") and (kind != "op" or operator in ("(", ")")):
+            raise ValueError(f"operatore non valido nel marker: {operator}")
+        right, right_variable = self.parse_value()
+        version = left_variable in MARKER_VERSION_VARIABLES or right_variable in MARKER_VERSION_VARIABLES
+        return compare_marker_values(left, operator, right, version)
+    def parse_value(self):
+        kind, value = self.take()
+        if kind == "string":
+            return value[1:-1], None
+        if kind == "word" and value not in self.KEYWORDS:
+            variable = value.replace(".", "_")
+            return str(self.environment.get(variable, "")), variable
+        raise ValueError(f"valore non valido nel marker: {value}")
+
+def evaluate_marker(marker, environment):
+    return MarkerEvaluator(tokenize_marker(marker), environment).evaluate()
+
+def is_requested(distribution):
+    if not distribution.path.endswith(".dist-info"):
+        return True
+    installer = (read_text_file(os.path.join(distribution.path, "INSTALLER")) or "").strip()
+    return installer != "pip" or os.path.exists(os.path.join(distribution.path, "REQUESTED"))
+
+def uninstall_impact(library_names, required_by):
+    removed = {normalize_name(name) for name in library_names}
+    impact = {}
+    for name in sorted(removed):
+        for dependent in required_by.get(name, ()):
+            if dependent not in removed:
+                impact.setdefault(dependent, []).append(name)
+    return impact
+
+def dependency_problem(name, dependency, specifier, installed_version, message):
+    return {"name": name, "dependency": dependency, "requirement": specifier, "installed": installed_version, "message": message}
+
+class DependencyGraph:
+    def __init__(self, environment):
+        self.environment = dict(environment, extra="")
+        self.distributions = {}
+        self.stamps = {}
+        self.requires = {}
+        self.required_by = {}
+        self.marker_cache = {}
+        self.lock = threading.RLock()
+    def marker_matches(self, marker):
+        result = self.marker_cache.get(marker)
+        if result is None:
+            try:
+                result = evaluate_marker(marker, self.environment)
+            except ValueError as e:
+                logging.error(f"Errore durante la valutazione del marker '{marker}': {e}")
+                result = True
+            self.marker_cache[marker] = result
+        return result
+    def active_requirements(self, requirements):
+        requires = {}
+        for requirement in requirements:
+            parsed = parse_requirement(requirement)
+            if parsed is None:
+                continue
+            name, specifier, marker = parsed
+            if marker and not self.marker_matches(marker):
+                continue
+            requires[name] = ",".join(filter(None, (requires.get(name), specifier)))
+        return requires
+    def add(self, distribution):
+        self.distributions[distribution.name] = distribution
+        self.stamps[distribution.name] = get_path_stamp(distribution.path)
+        requires = self.active_requirements(read_distribution_requirements(distribution))
+        self.requires[distribution.name] = requires
+        for dependency in requires:
+            self.required_by.setdefault(dependency, set()).add(distribution.name)
+    def remove(self, name):
+        self.distributions.pop(name, None)
+        self.stamps.pop(name, None)
+        for dependency in self.requires.pop(name, {}):
+            dependents = self.required_by.get(dependency)
+            if dependents is not None:
+                dependents.discard(name)
+                if not dependents:
+                    del self.required_by[dependency]
+    def sync(self, distributions):
+        with self.lock, Span("grafo dipendenze", count=len(distributions)) as span:
+            changed = [name for name in self.distributions if name not in distributions]
+            for name in changed:
+                self.remove(name)
+            for name, distribution in distributions.items():
+                if self.distributions.get(name) != distribution or self.stamps.get(name) != get_path_stamp(distribution.path):
+                    self.remove(name)
+                    self.add(distribution)
+                    changed.append(name)
+            span.set(changed=len(changed))
+            return changed
+    def dependents_of(self, library_name):
+        with self.lock:
+            return sorted(name for name in self.required_by.get(normalize_name(library_name), ()) if name in self.distributions)
+    def required_by_map(self):
+        with self.lock:
+            return {name: self.dependents_of(name) for name in self.distributions}
+    def uninstall_impact(self, library_names):
+        return uninstall_impact(library_names, self.required_by_map())
+    def orphans(self):
+        with self.lock:
+            return [name for name, distribution in sorted(self.distributions.items())
+                    if name not in PROTECTED_LIBRARIES and not self.dependents_of(name) and not is_requested(distribution)]
+    def check(self):
+        problems = []
+        with self.lock:
+            for name in sorted(self.requires):
+                for dependency, specifier in sorted(self.requires[name].items()):
+                    installed = self.distributions.get(dependency)
+                    if installed is None:
+                        problems.append(dependency_problem(name, dependency, specifier, None, f"{name} richiede {dependency}{specifier}, che non è installata"))
+                    elif specifier and not specifier_matches(installed.version, specifier):
+                        problems.append(dependency_problem(name, dependency, specifier, installed.version,
+                                                           f"{name} richiede {dependency}{specifier}, ma è installata la versione {installed.version}"))
+        return problems
+    def predict(self, candidates):
+        problems = []
+        python_version = self.environment.get("python_full_version", "")
+        with self.lock:
+            versions = {name: distribution.version for name, distribution in self.distributions.items()}
+            versions.update((name, metadata["version"]) for name, metadata in candidates.items())
+            for target, metadata in sorted(candidates.items()):
+                version = metadata["version"]
+                requires_python = metadata.get("requires_python")
+                if requires_python and python_version and not specifier_matches(python_version, requires_python):
+                    problems.append(dependency_problem(target, "python", requires_python, python_version,
+                                                       f"{target} {version} richiede Python {requires_python}, l'interprete è {python_version}"))
+                for dependent in sorted(self.required_by.get(target, ())):
+                    specifier = self.requires.get(dependent, {}).get(target)
+                    if dependent in candidates or dependent not in self.distributions or not specifier:
+                        continue
+                    if not specifier_matches(version, specifier):
+                        problems.append(dependency_problem(dependent, target, specifier, version,
+                                                           f"{dependent} richiede {target}{specifier}, ma verrebbe installata la versione {version}"))
+                for dependency, specifier in sorted(self.active_requirements(metadata.get("requires_dist") or []).items()):
+                    installed_version = versions.get(dependency)
+                    if installed_version is not None and specifier and not specifier_matches(installed_version, specifier):
+                        problems.append(dependency_problem(target, dependency, specifier, installed_version,
+                                                           f"{target} {version} richiede {dependency}{specifier}, pip cambierà la versione installata {installed_version}"))
+        return problems
+    def upgrade_order(self, library_names):
+        selected = {normalize_name(name): name for name in library_names}
+        order = []
+        visited = set()
+        with self.lock:
+            for root in sorted(selected):
+                if root in visited:
+                    continue
+                visited.add(root)
+                stack = [(root, iter(sorted(self.requires.get(root, ()))))]
+                while stack:
+                    name, dependencies = stack[-1]
+                    dependency = next(dependencies, None)
+                    if dependency is None:
+                        stack.pop()
+                        if name in selected:
+                            order.append(selected[name])
+                    elif dependency not in visited:
+                        visited.add(dependency)
+                        stack.append((dependency, iter(sorted(self.requires.get(dependency, ())))))
+        return order
+
+def predict_upgrade_problems(python_executable, library_names, index_url=None, offline=None, max_workers=None):
+    graph = get_dependency_graph(python_executable)
+    names = sorted({normalize_name(name) for name in library_names})
+    candidates = {}
+    if names:
+        for name, metadata in run_async(fetch_many_index_metadata_async(names, index_url, offline, max_workers)).items():
+            installed = graph.distributions.get(name)
+            if metadata and (installed is None or parse_version(metadata["version"]) > parse_version(installed.version)):
+                candidates[name] = metadata
+    return graph.predict(candidates)
+
+async def fetch_many_index_metadata_async(names, index_url=None, offline=None, max_workers=None):
+    limit = asyncio.Semaphore(max(1, max_workers or RESOLVER_MAX_WORKERS))
+    async def fetch(name):
+        async with limit:
+            try:
+                return name, await fetch_index_metadata_async(name, index_url, offline)
+            except Exception as e:
+                logging.error(f"Errore durante il recupero dei metadati di {name}: {e}")
+                return name, None
+    return dict(await asyncio.gather(*(fetch(name) for name in names)))
+
+_dependency_graphs = {}
+_dependency_graphs_lock = threading.Lock()
+
+def get_dependency_graph(python_executable, distributions=None):
+    with _dependency_graphs_lock:
+        graph = _dependency_graphs.get(python_executable)
+        if graph is None:
+            graph = DependencyGraph(get_interpreter_info(python_executable).get("markers") or {})
+            _dependency_graphs[python_executable] = graph
+    graph.sync(distributions if distributions is not None else scan_installed_distributions(python_executable))
+    return graph
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def format_library_details(details, required_by, max_files=200, advisories=()):
+    lines = [
+        f"Nome: {details['name']}",
+        f"Versione: {details['version']}",
+        f"Sommario: {details['summary']}",
+        f"Home page: {details['home_page']}",
+        f"Autore: {details['author']}",
+        f"Licenza: {details['license']}",
+        f"Requires-Python: {details['requires_python']}",
+        f"Percorso: {details['location']}",
+        f"Dimensione: {format_size(details['size'])} in {len(details['files'])} file",
+    ]
+    for project_url in details["project_urls"]:
+        lines.append(f"URL progetto: {project_url}")
+    lines.append("")
+    lines.append(f"Dipendenze ({len(details['requires'])}):")
+    lines.extend(f"  {requirement}" for requirement in details["requires"])
+    lines.append(f"Richiesto da ({len(required_by)}):")
+    lines.extend(f"  {name}" for name in required_by)
+    if advisories:
+        lines.append(f"Vulnerabilità note ({len(advisories)}):")
+        lines.extend(format_advisories(advisories))
+    if details["entry_points"]:
+        lines.append("Entry point:")
+        for section, entries in details["entry_points"].items():
+            lines.append(f"  [{section}]")
+            lines.extend(f"    {entry}" for entry in entries)
+    lines.append("")
+    lines.append(f"File ({len(details['files'])}):")
+    lines.extend(f"  {path}" for path in details["files"][:max_files])
+    if len(details["files"]) > max_files:
+        lines.append(f"  ... e altri {len(details['files']) - max_files} file")
+    if details["description"]:
+        lines.append("")
+        lines.append("Descrizione:")
+        lines.append(details["description"])
+    return "\n".join(lines)
+
+def fetch_library_description(library_name, callback, disable_buttons=None, enable_buttons=None):
+    callback, disable_buttons, enable_buttons = ui_callback(callback), ui_callback(disable_buttons), ui_callback(enable_buttons)
+    python_executable = get_system_python()
+    def task(job):
+        if disable_buttons:
+            disable_buttons()
+        try:
+            distributions = scan_installed_distributions(python_executable)
+            distribution = distributions.get(normalize_name(library_name))
+            if distribution is None:
+                callback(description="Nessuna descrizione disponibile o libreria non trovata.")
+                return
+            details = read_distribution_details(distribution)
+            graph = get_dependency_graph(python_executable, distributions)
+            advisories = match_installed_advisories({distribution.name: distribution.version}).get(distribution.name, ())
+            callback(description=format_library_details(details, graph.dependents_of(library_name), advisories=advisories))
+        except Exception as e:
+            logging.error(f"Errore generico durante il recupero della descrizione di {library_name}: {e}")
+            callback(description=f"Errore durante il recupero della descrizione: {e}")
+        finally:
+            if enable_buttons:
+                enable_buttons()
+    return get_job_scheduler().submit(f"Dettagli {library_name}", task, environment=python_executable, on_cancel=enable_buttons)
+
+def update_library(library_name, callback=None, disable_buttons=None, enable_buttons=None):
+    callback, disable_buttons, enable_buttons = ui_callback(callback), ui_callback(disable_buttons), ui_callback(enable_buttons)
+    python_executable = get_system_python()
+    def task(job):
+        if disable_buttons:
+            disable_buttons()
+        try:
+            run_pip_install(python_executable, [library_name], job=job, upgrade=True)
+            logging.info(f"Libreria {library_name} aggiornata con successo.")
+            if callback:
+                callback(success=True, message=f"Libreria {library_name} aggiornata con successo.")
+        except JobCancelled:
+            if callback:
+                callback(success=False, message=f"Operazione su {library_name} annullata.")
+        except subprocess.CalledProcessError as e:
+            logging.error(f"Errore subprocess durante l'aggiornamento di {library_name}: {e.stderr}")
+            if callback:
+                callback(success=False, message=f"Errore durante l'aggiornamento della libreria {library_name}:\n{e.stderr}")
+        except Exception as e:
+            logging.error(f"Errore generico durante l'aggiornamento di {library_name}: {e}")
+            if callback:
+                callback(success=False, message=f"Errore durante l'aggiornamento della libreria {library_name}: {e}")
+        finally:
+            if enable_buttons:
+                enable_buttons()
+    return get_job_scheduler().submit(f"Aggiorna {library_name}", task, environment=python_executable, mutating=True, on_cancel=enable_buttons)
+
+def uninstall_library(library_name, callback=None, disable_buttons=None, enable_buttons=None):
+    callback, disable_buttons, enable_buttons = ui_callback(callback), ui_callback(disable_buttons), ui_callback(enable_buttons)
+    python_executable = get_system_python()
+    def task(job):
+        if disable_buttons:
+            disable_buttons()
+        try:
+            if library_name.lower() in PROTECTED_LIBRARIES:
+                if callback:
+                    callback(success=False, message=f"Non è possibile disinstallare la libreria '{library_name}'.")
+                return
+            run_pip(python_executable, ["uninstall", "-y", library_name], job=job)
+            logging.info(f"Libreria {library_name} disinstallata con successo.")
+            if callback:
+                callback(success=True, message=f"Libreria {library_name} disinstallata con successo.")
+        except JobCancelled:
+            if callback:
+                callback(success=False, message=f"Operazione su {library_name} annullata.")
+        except subprocess.CalledProcessError as e:
+            logging.error(f"Errore subprocess durante la disinstallazione di {library_name}: {e.stderr}")
+            if callback:
+                callback(success=False, message=f"Errore durante la disinstallazione della libreria {library_name}:\n{e.stderr}")
+        except Exception as e:
+            logging.error(f"Errore generico durante la disinstallazione di {library_name}: {e}")
+            if callback:
+                callback(success=False, message=f"Errore durante la disinstallazione della libreria {library_name}: {e}")
+        finally:
+            if enable_buttons:
+                enable_buttons()
+    return get_job_scheduler().submit(f"Disinstalla {library_name}", task, environment=python_executable, mutating=True, on_cancel=enable_buttons)
+
+PROTECTED_LIBRARIES = ["pip", "setuptools", "wheel"]
+
+def summarize_batch(library_names, before, after, done_label, failed_label, removed=False):
+    done, failed = [], []
+    for library_name in library_names:
+        name = normalize_name(library_name)
+        old, new = before.get(name), after.get(name)
+        if removed and old and not new:
+            done.append(library_name)
+        elif not removed and old and new and old.version != new.version:
+            done.append(f"{library_name} ({old.version} → {new.version})")
+        else:
+            failed.append(library_name)
+    lines = []
+    if done:
+        lines.append(f"{done_label}: {', '.join(done)}")
+    if failed:
+        lines.append(f"{failed_label}: {', '.join(failed)}")
+    return done, failed, lines
+
+def update_libraries(library_names, callback=None, disable_buttons=None, enable_buttons=None):
+    callback, disable_buttons, enable_buttons = ui_callback(callback), ui_callback(disable_buttons), ui_callback(enable_buttons)
+    python_executable = get_system_python()
+    library_names = list(library_names)
+    def task(job):
+        if disable_buttons:
+            disable_buttons()
+        try:
+            before = scan_installed_distributions(python_executable)
+            library_names[:] = get_dependency_graph(python_executable, before).upgrade_order(library_names)
+            save_automatic_snapshot(python_executable, "prima dell'aggiornamento", before)
+            error = None
+            try:
+                run_pip_install(python_executable, library_names, job=job, upgrade=True)
+                logging.info(f"Librerie aggiornate: {', '.join(library_names)}")
+            except JobCancelled:
+                error = "Operazione annullata."
+            except subprocess.CalledProcessError as e:
+                logging.error(f"Errore subprocess durante l'aggiornamento di {', '.join(library_names)}: {e.stderr}")
+                error = e.stderr
+            after = scan_installed_distributions(python_executable)
+            failed_label = "Già aggiornate" if error is None else "Non aggiornate"
+            done, failed, lines = summarize_batch(library_names, before, after, "Aggiornate", failed_label)
+            if error:
+                lines.append(f"\nErrore durante l'aggiornamento:\n{error}")
+            if callback:
+                callback(success=error is None, message="\n".join(lines))
+        except Exception as e:
+            logging.error(f"Errore generico durante l'aggiornamento di {', '.join(library_names)}: {e}")
+            if callback:
+                callback(success=False, message=f"Errore durante l'aggiornamento delle librerie: {e}")
+        finally:
+            if enable_buttons:
+                enable_buttons()
+    return get_job_scheduler().submit(f"Aggiorna {len(library_names)} librerie", task, environment=python_executable, mutating=True, on_cancel=enable_buttons)
+
+def uninstall_libraries(library_names, callback=None, disable_buttons=None, enable_buttons=None):
+    callback, disable_buttons, enable_buttons = ui_callback(callback), ui_callback(disable_buttons), ui_callback(enable_buttons)
+    python_executable = get_system_python()
+    protected = [name for name in library_names if name.lower() in PROTECTED_LIBRARIES]
+    library_names = [name for name in library_names if name.lower() not in PROTECTED_LIBRARIES]
+    def task(job):
+        if disable_buttons:
+            disable_buttons()
+        try:
+            lines = []
+            error = None
+            if library_names:
+                before = scan_installed_distributions(python_executable)
+                try:
+                    run_pip(python_executable, ["uninstall", "-y", *library_names], job=job)
+                    logging.info(f"Librerie disinstallate: {', '.join(library_names)}")
+                except JobCancelled:
+                    error = "Operazione annullata."
+                except subprocess.CalledProcessError as e:
+                    logging.error(f"Errore subprocess durante la disinstallazione di {', '.join(library_names)}: {e.stderr}")
+                    error = e.stderr
+                after = scan_installed_distributions(python_executable)
+                done, failed, lines = summarize_batch(library_names, before, after, "Disinstallate", "Non disinstallate", removed=True)
+            if protected:
+                lines.append(f"Non è possibile disinstallare: {', '.join(protected)}")
+            if error:
+                lines.append(f"\nErrore durante la disinstallazione:\n{error}")
+            if callback:
+                callback(success=error is None and not protected, message="\n".join(lines))
+        except Exception as e:
+            logging.error(f"Errore generico durante la disinstallazione di {', '.join(library_names)}: {e}")
+            if callback:
+                callback(success=False, message=f"Errore durante la disinstallazione delle librerie: {e}")
+        finally:
+            if enable_buttons:
+                enable_buttons()
+    return get_job_scheduler().submit(f"Disinstalla {len(library_names)} librerie", task, environment=python_executable, mutating=True, on_cancel=enable_buttons)
+
+def read_installer(distribution):
+    if not distribution.path.endswith(".dist-info"):
+        return None
+    return (read_text_file(os.path.join(distribution.path, "INSTALLER")) or "").strip() or None
+
+def record_content_hash(distribution):
+    if not distribution.path.endswith(".dist-info"):
+        return None
+    dist_info = os.path.basename(distribution.path) + "/"
+    entries = []
+    try:
+        with open(os.path.join(distribution.path, "RECORD"), encoding="utf-8", errors="replace", newline="") as f:
+            for row in csv.reader(f):
+                path = row[0] if row else ""
+                if len(row) < 2 or not row[1] or path.startswith("..") or "__pycache__" in path:
+                    continue
+                if path.startswith(dist_info) and path != dist_info + "METADATA":
+                    continue
+                entries.append(f"{path},{row[1]}")
+    except OSError:
+        return None
+    return "sha256:" + hashlib.sha256("\n".join(sorted(entries)).encode("utf-8")).hexdigest()
+
+def snapshot_entry(distribution):
+    return {
+        "name": distribution.name,
+        "version": distribution.version,
+        "installer": read_installer(distribution),
+        "requested": os.path.exists(os.path.join(distribution.path, "REQUESTED")) if distribution.path.endswith(".dist-info") else None,
+        "content_hash": record_content_hash(distribution),
+    }
+
+def create_environment_snapshot(python_executable, distributions=None, max_workers=None):
+    info = get_interpreter_info(python_executable)
+    if distributions is None:
+        distributions = scan_installed_distributions(python_executable)
+    with Span("snapshot ambiente", python=python_executable, count=len(distributions)), \
+            ThreadPoolExecutor(max_workers=max(1, max_workers or SNAPSHOT_MAX_WORKERS)) as executor:
+        libraries = list(executor.map(snapshot_entry, [distributions[name] for name in sorted(distributions)]))
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "python": python_executable,
+        "version": info["version"],
+        "prefix": info["prefix"],
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "libraries": libraries,
+    }
+
+def distributions_snapshot(distributions):
+    return {"libraries": [{"name": name, "version": distributions[name].version} for name in sorted(distributions)]}
+
+def save_environment_snapshot(snapshot, path):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+def load_environment_snapshot(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except OSError as e:
+        raise ValueError(f"Impossibile leggere lo snapshot {path}: {e}")
+    except ValueError:
+        snapshot = None
+    if not isinstance(snapshot, dict) or not isinstance(snapshot.get("libraries"), list):
+        raise ValueError(f"{path} non è uno snapshot valido.")
+    return snapshot
+
+def get_snapshots_dir():
+    directory = os.path.join(get_cache_dir(), "snapshots")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+_snapshot_stamp_lock = threading.Lock()
+_last_snapshot_stamp = 0
+
+def save_automatic_snapshot(python_executable, reason, distributions=None):
+    try:
+        snapshot = create_environment_snapshot(python_executable, distributions)
+        snapshot["reason"] = reason
+        directory = get_snapshots_dir()
+        suffix = hashlib.sha1(environment_key(python_executable).encode("utf-8")).hexdigest()[:10]
+        global _last_snapshot_stamp
+        with _snapshot_stamp_lock:
+            stamp = max(time.time_ns() // 1000, _last_snapshot_stamp + 1)
+            path = None
+            while path is None or os.path.exists(path):
+                path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(stamp // 1000000))}-{stamp % 1000000:06d}-{suffix}.json")
+                stamp += 1
+            _last_snapshot_stamp = stamp - 1
+            save_environment_snapshot(snapshot, path)
+        for old_path in sorted(glob.glob(os.path.join(directory, f"*-{suffix}.json")))[:-SNAPSHOT_KEEP]:
+            os.remove(old_path)
+        logging.info(f"Snapshot automatico di {python_executable} salvato in {path}")
+        return path
+    except Exception as e:
+        logging.error(f"Errore durante il salvataggio dello snapshot automatico di {python_executable}: {e}")
+        return None
+
+def index_snapshot(snapshot):
+    return {normalize_name(library["name"]): library for library in snapshot["libraries"]}
+
+def diff_snapshots(old, new):
+    old_libraries, new_libraries = index_snapshot(old), index_snapshot(new)
+    changes = []
+    for name in sorted(old_libraries.keys() | new_libraries.keys()):
+        before, after = old_libraries.get(name), new_libraries.get(name)
+        if before is None:
+            change = "added"
+        elif after is None:
+            change = "removed"
+        elif before["version"] != after["version"]:
+            change = "upgraded" if parse_version(after["version"]) > parse_version(before["version"]) else "downgraded"
+        elif before.get("content_hash") and after.get("content_hash") and before["content_hash"] != after["content_hash"]:
+            change = "modified"
+        else:
+            continue
+        changes.append({"name": name, "change": change, "before": before["version"] if before else None, "after": after["version"] if after else None})
+    return changes
+
+SNAPSHOT_CHANGE_LABELS = {"added": "Aggiunte", "removed": "Rimosse", "upgraded": "Aggiornate", "downgraded": "Retrocesse", "modified": "Modificate (stessa versione)"}
+
+def format_snapshot_changes(changes, limit=50):
+    if not changes:
+        return "Nessuna differenza."
+    lines = []
+    for change, label in SNAPSHOT_CHANGE_LABELS.items():
+        selected = [item for item in changes if item["change"] == change]
+        if not selected:
+            continue
+        lines.append(f"{label} ({len(selected)}):")
+        for item in selected[:limit]:
+            if change in ("upgraded", "downgraded"):
+                lines.append(f"  {item['name']} {item['before']} → {item['after']}")
+            else:
+                lines.append(f"  {item['name']} {item['after'] or item['before']}")
+        if len(selected) > limit:
+            lines.append(f"  ... e altre {len(selected) - limit}")
+    return "\n".join(lines)
+
+def restore_plan(current, target):
+    changes = diff_snapshots(current, target)
+    return {
+        "install": [f"{item['name']}=={item['after']}" for item in changes if item["change"] in ("added", "upgraded", "downgraded")],
+        "uninstall": [item["name"] for item in changes if item["change"] == "removed" and item["name"] not in PROTECTED_LIBRARIES],
+        "changes": changes,
+    }
+
+def format_restore_plan(plan, limit=50):
+    if not plan["install"] and not plan["uninstall"]:
+        return "L'ambiente corrisponde già allo snapshot."
+    lines = []
+    if plan["install"]:
+        lines.append(f"Da installare ({len(plan['install'])}): {format_short_list(plan['install'], limit)}")
+    if plan["uninstall"]:
+        lines.append(f"Da disinstallare ({len(plan['uninstall'])}): {format_short_list(plan['uninstall'], limit)}")
+    return "\n".join(lines)
+
+def format_short_list(items, limit):
+    return ", ".join(items[:limit]) + (f" e altre {len(items) - limit}" if len(items) > limit else "")
+
+def apply_restore_plan(python_executable, target, job=None):
+    plan = restore_plan(distributions_snapshot(scan_installed_distributions(python_executable)), target)
+    if plan["install"]:
+        run_pip_install(python_executable, plan["install"], job=job)
+    target_names = set(index_snapshot(target))
+    plan["uninstall"] = [name for name in sorted(scan_installed_distributions(python_executable)) if name not in target_names and name not in PROTECTED_LIBRARIES]
+    if plan["uninstall"]:
+        run_pip(python_executable, ["uninstall", "-y", *plan["uninstall"]], job=job)
+    return plan
+
+def export_environment_snapshot(path, callback=None, disable_buttons=None, enable_buttons=None):
+    callback, disable_buttons, enable_buttons = ui_callback(callback), ui_callback(disable_buttons), ui_callback(enable_buttons)
+    python_executable = get_system_python()
+    def task(job):
+        if disable_buttons:
+            disable_buttons()
+        try:
+            snapshot = create_environment_snapshot(python_executable)
+            save_environment_snapshot(snapshot, path)
+            logging.info(f"Snapshot salvato in {path}")
+            if callback:
+                callback(success=True, message=f"Snapshot di {len(snapshot['libraries'])} librerie salvato in {path}.")
+        except Exception as e:
+            logging.error(f"Errore durante l'esportazione dello snapshot in {path}: {e}")
+            if callback:
+                callback(success=False, message=f"Errore durante l'esportazione dello snapshot: {e}")
+        finally:
+            if enable_buttons:
+                enable_buttons()
+    return get_job_scheduler().submit("Esporta snapshot", task, environment=python_executable, on_cancel=enable_buttons)
+
+def compare_environment_snapshot(path, callback=None, disable_buttons=None, enable_buttons=None):
+    callback, disable_buttons, enable_buttons = ui_callback(callback), ui_callback(disable_buttons), ui_callback(enable_buttons)
+    python_executable = get_system_python()
+    def task(job):
+        if disable_buttons:
+            disable_buttons()
+        try:
+            changes = diff_snapshots(load_environment_snapshot(path), create_environment_snapshot(python_executable))
+            if callback:
+                callback(success=True, message=f"Differenze tra lo snapshot e l'ambiente attuale:\n\n{format_snapshot_changes(changes)}")
+        except Exception as e:
+            logging.error(f"Errore durante il confronto con lo snapshot {path}: {e}")
+            if callback:
+                callback(success=False, message=f"Errore durante il confronto con lo snapshot: {e}")
+        finally:
+            if enable_buttons:
+                enable_buttons()
+    return get_job_scheduler().submit("Confronta snapshot", task, environment=python_executable, on_cancel=enable_buttons)
+
+def plan_snapshot_restore(path, callback):
+    callback = ui_callback(callback)
+    python_executable = get_system_python()
+    def task(job):
+        try:
+            snapshot = load_environment_snapshot(path)
+            plan = restore_plan(distributions_snapshot(scan_installed_distributions(python_executable)), snapshot)
+            callback(success=True, message=format_restore_plan(plan), snapshot=snapshot, plan=plan)
+        except Exception as e:
+            logging.error(f"Errore durante la lettura dello snapshot {path}: {e}")
+            callback(success=False, message=f"Errore durante la lettura dello snapshot: {e}")
+    return get_job_scheduler().submit("Piano di ripristino", task, environment=python_executable)
+
+def restore_snapshot(snapshot, callback=None, disable_buttons=None, enable_buttons=None):
+    callback, disable_buttons, enable_buttons = ui_callback(callback), ui_callback(disable_buttons), ui_callback(enable_buttons)
+    python_executable = get_system_python()
+    def task(job):
+        if disable_buttons:
+            disable_buttons()
+        try:
+            save_automatic_snapshot(python_executable, "prima del ripristino")
+            plan = apply_restore_plan(python_executable, snapshot, job=job)
+            logging.info(f"Snapshot ripristinato: {len(plan['install'])} installate, {len(plan['uninstall'])} disinstallate")
+            if callback:
+                callback(success=True, message=f"Snapshot ripristinato.\n\n{format_restore_plan(plan)}")
+        except JobCancelled:
+            if callback:
+                callback(success=False, message="Ripristino annullato.")
+        except subprocess.CalledProcessError as e:
+            logging.error(f"Errore subprocess durante il ripristino dello snapshot: {e.stderr}")
+            if callback:
+                callback(success=False, message=f"Errore durante il ripristino dello snapshot:\n{e.stderr}")
+        except Exception as e:
+            logging.error(f"Errore generico durante il ripristino dello snapshot: {e}")
+            if callback:
+                callback(success=False, message=f"Errore durante il ripristino dello snapshot: {e}")
+        finally:
+            if enable_buttons:
+                enable_buttons()
+    return get_job_scheduler().submit("Ripristina snapshot", task, environment=python_executable, mutating=True, on_cancel=enable_buttons)
+
+def install_library(library_name, callback=None, disable_buttons=None, enable_buttons=None):
+    callback, disable_buttons, enable_buttons = ui_callback(callback), ui_callback(disable_buttons), ui_callback(enable_buttons)
+    python_executable = get_system_python()
+    def task(job):
+        if disable_buttons:
+            disable_buttons()
+        try:
+            run_pip_install(python_executable, [library_name], job=job)
+            logging.info(f"Libreria {library_name} installata con successo.")
+            if callback:
+                callback(success=True, message=f"Libreria {library_name} installata con successo.")
+        except JobCancelled:
+            if callback:
+                callback(success=False, message=f"Installazione di {library_name} annullata.")
+        except subprocess.CalledProcessError as e:
+            logging.error(f"Errore subprocess durante l'installazione di {library_name}: {e.stderr}")
+            if callback:
+                callback(success=False, message=f"Errore durante l'installazione della libreria {library_name}:\n{e.stderr}")
+        except Exception as e:
+            logging.error(f"Errore generico durante l'installazione di {library_name}: {e}")
+            if callback:
+                callback(success=False, message=f"Errore durante l'installazione della libreria: {e}")
+        finally:
+            if enable_buttons:
+                enable_buttons()
+    return get_job_scheduler().submit(f"Installa {library_name}", task, environment=python_executable, mutating=True, on_cancel=enable_buttons)
+
+def get_current_python_version():
+    return sys.version.split()[0]
+
+def extract_latest_python_version(response):
+    match = re.search(r'Python (\d+\.\d+\.\d+)', response.text)
+    if not match:
+        raise ValueError("versione di Python non trovata nella pagina dei download")
+    return match.group(1)
+
+async def get_latest_python_version_async():
+    try:
+        latest_version = await fetch_cached_async(PYTHON_DOWNLOADS_URL, "python", PYTHON_DOWNLOADS_URL, extract_latest_python_version)
+        if latest_version:
+            return latest_version
+        logging.error("Impossibile recuperare l'ultima versione di Python.")
+    except Exception as e:
+        logging.error(f"Errore durante il recupero dell'ultima versione di Python: {e}")
+    return None
+
+def get_latest_python_version():
+    return run_async(get_latest_python_version_async())
+
+def is_newer_version(current_version, latest_version):
+    def version_tuple(v):
+        return tuple(map(int, (v.split("."))))
+    return version_tuple(latest_version) > version_tuple(current_version)
+
+class DownloadProgress:
+    def __init__(self, filename, total, completed=0):
+        self.lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.filename = filename
+        self.total = total
+        self.completed = completed
+        self.transferred = 0
+    def add(self, count):
+        with self.lock:
+            self.completed += count
+            self.transferred += count
+    def snapshot(self):
+        with self.lock:
+            elapsed = time.monotonic() - self.started_at
+            rate = self.transferred / elapsed if elapsed > 0 else 0.0
+            remaining = max(0, self.total - self.completed)
+            return {
+                "phase": "Download",
+                "fraction": self.completed / self.total if self.total else 0.0,
+                "file": self.filename,
+                "downloads": 1,
+                "bytes": self.transferred,
+                "current_bytes": self.completed,
+                "current_total": self.total,
+                "rate": rate,
+                "elapsed": elapsed,
+                "eta": remaining / rate if rate > 0 and self.total else None,
+            }
+
+def read_download_state(state_path):
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_download_state(state_path, state):
+    with open(state_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(state_path + ".tmp", state_path)
+
+async def probe_download_async(url):
+    def consume(response):
+        response.raise_for_status()
+        validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+        if response.status_code == 206 and "/" in response.headers.get("Content-Range", ""):
+            total = response.headers["Content-Range"].rpartition("/")[2]
+            if total.isdigit():
+                return response.status_code, int(total), True, validator
+        return response.status_code, int(response.headers.get("Content-Length") or 0), False, validator
+    with Span(http_span_name(url), url=url, range="0-0") as span:
+        status_code, total, ranged, validator = await get_http_client().get(url, headers={"Range": "bytes=0-0"}, timeout=30, consume=consume)
+        span.set(status_code=status_code)
+    return total, ranged, validator
+
+async def download_file_async(url, destination, expected_hash=None, job=None, chunk_size=None, max_workers=None):
+    client = get_http_client()
+    chunk_size = chunk_size or DOWNLOAD_CHUNK_SIZE
+    partial_path = destination + ".part"
+    state_path = partial_path + ".json"
+    total, ranged, validator = await probe_download_async(url)
+    ranged = ranged and total > 0
+    chunks = [(index, start, min(start + chunk_size, total) - 1) for index, start in enumerate(range(0, total, chunk_size))] if ranged else []
+    state = read_download_state(state_path)
+    if ranged and state and state.get("url") == url and state.get("size") == total and state.get("validator") == validator \
+            and state.get("chunk_size") == chunk_size and os.path.exists(partial_path) and os.path.getsize(partial_path) == total:
+        done = set(state.get("done", []))
+        logging.info(f"Ripresa del download di {url}: {len(done)} di {len(chunks)} blocchi già scaricati")
+    else:
+        done = set()
+        state = {"url": url, "size": total, "validator": validator, "chunk_size": chunk_size, "done": []}
+        if ranged:
+            with open(partial_path, "wb") as f:
+                f.truncate(total)
+            write_download_state(state_path, state)
+    progress = DownloadProgress(url.rsplit("/", 1)[-1], total, sum(end - start + 1 for index, start, end in chunks if index in done))
+    abort = threading.Event()
+    def write_blocks(response, f, expected_length=None):
+        written = 0
+        try:
+            for block in response.iter_content(DOWNLOAD_BUFFER_SIZE):
+                if abort.is_set():
+                    raise JobCancelled()
+                if job is not None:
+                    job.check_cancelled()
+                f.write(block)
+                written += len(block)
+                progress.add(len(block))
+                if job is not None:
+                    job.progress = progress.snapshot()
+            if expected_length is not None and written != expected_length:
+                raise IOError(f"ricevuti {written} byte invece di {expected_length}")
+        except BaseException:
+            progress.add(-written)
+            raise
+    async def fetch_chunk(limit, index, start, end):
+        def consume(response):
+            if response.status_code != 206:
+                raise IOError(f"risposta {response.status_code} per l'intervallo {start}-{end} di {url}")
+            with open(partial_path, "r+b") as f:
+                f.seek(start)
+                write_blocks(response, f, end - start + 1)
+        async with limit:
+            if abort.is_set():
+                return
+            with Span("download blocco", logging.DEBUG, url=url, range=f"{start}-{end}", bytes=end - start + 1):
+                await client.get(url, headers={"Range": f"bytes={start}-{end}"}, timeout=30, consume=consume)
+        done.add(index)
+        state["done"] = sorted(done)
+        write_download_state(state_path, state)
+    def consume_whole(response):
+        response.raise_for_status()
+        with open(partial_path, "wb") as f:
+            write_blocks(response, f, total or None)
+    with Span("download", url=url, resumed_bytes=progress.completed, chunks=len(chunks), ranged=ranged) as span:
+        if ranged:
+            limit = asyncio.Semaphore(max(1, max_workers or DOWNLOAD_WORKERS))
+            tasks = [asyncio.ensure_future(fetch_chunk(limit, *chunk)) for chunk in chunks if chunk[0] not in done]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                abort.set()
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+        else:
+            await client.get(url, timeout=30, consume=consume_whole)
+        span.set(bytes=progress.transferred)
+    if expected_hash:
+        algorithm, digest = expected_hash
+        actual = await asyncio.get_running_loop().run_in_executor(None, hash_file, partial_path, algorithm)
+        if actual.lower() != digest.lower():
+            os.remove(partial_path)
+            if os.path.exists(state_path):
+                os.remove(state_path)
+            raise ValueError(f"hash {algorithm} non corrispondente per {url}: atteso {digest}, ottenuto {actual}")
+    os.replace(partial_path, destination)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    logging.info(f"Download completato: {url} -> {destination}")
+    return destination
+
+def download_file(url, destination, expected_hash=None, job=None, chunk_size=None, max_workers=None):
+    return run_async(download_file_async(url, destination, expected_hash, job, chunk_size, max_workers), job)
+
+def extract_release_file_hashes(response):
+    hashes = {}
+    for entry in response.json():
+        digest = entry.get("sha256_sum") or entry.get("md5_sum")
+        if entry.get("url") and digest:
+            hashes[entry["url"]] = ["sha256" if entry.get("sha256_sum") else "md5", digest]
+    return hashes
+
+async def fetch_published_hash_async(url):
+    import requests
+    try:
+        with Span(http_span_name(url), url=url + ".sha256") as span:
+            response = await get_http_client().get(url + ".sha256", timeout=10)
+            span.set(status_code=response.status_code, bytes=len(response.content))
+        if response.status_code == 200:
+            match = re.match(r"\s*([0-9a-fA-F]{64})\b", response.text)
+            if match:
+                return ("sha256", match.group(1))
+    except requests.RequestException as e:
+        logging.error(f"Errore durante il recupero di {url}.sha256: {e}")
+    if url.startswith("https://www.python.org/ftp/"):
+        try:
+            hashes = await fetch_cached_async(PYTHON_RELEASE_FILES_URL, "release_files", PYTHON_RELEASE_FILES_URL, extract_release_file_hashes)
+            if hashes and url in hashes:
+                return tuple(hashes[url])
+        except Exception as e:
+            logging.error(f"Errore durante il recupero degli hash pubblicati da python.org: {e}")
+    return None
+
+def fetch_published_hash(url):
+    return run_async(fetch_published_hash_async(url))
+
+def installer_path_for(download_url, directory=None):
+    filename = download_url.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1] or "python-installer"
+    return os.path.join(directory or os.path.expanduser("~"), filename)
+
+async def download_python_installer_async(download_url, download_path, job=None):
+    try:
+        expected_hash = await fetch_published_hash_async(download_url)
+        if expected_hash is None:
+            logging.error(f"Nessun hash pubblicato trovato per {download_url}")
+        await download_file_async(download_url, download_path, expected_hash=expected_hash, job=job)
+        if expected_hash is None:
+            return {"success": True, "verified": False, "message": "Download completato, ma non è stato trovato un hash pubblicato per verificarne l'integrità."}
+        return {"success": True, "verified": True, "message": f"Download completato e verificato ({expected_hash[0]})."}
+    except JobCancelled:
+        raise
+    except Exception as e:
+        logging.error(f"Errore durante il download dell'installer di Python: {e}")
+        return {"success": False, "verified": False, "message": f"Impossibile scaricare l'installer di Python: {e}"}
+
+def download_python_installer(download_url, download_path, job=None):
+    return run_async(download_python_installer_async(download_url, download_path, job), job)
+
+def run_installer(installer_path):
+    try:
+        with Span("installer", path=installer_path) as span:
+            if os.name == 'nt':
+                process = subprocess.Popen([installer_path], shell=True)
+            elif sys.platform == 'darwin':
+                process = subprocess.Popen(['open', installer_path])
+            else:
+                os.chmod(installer_path, os.stat(installer_path).st_mode | 0o111)
+                process = subprocess.Popen([installer_path])
+            span.set(pid=process.pid)
+        logging.info(f"Installer avviato: {installer_path}")
+        return True
+    except Exception as e:
+        logging.error(f"Errore durante l'esecuzione dell'installer: {e}")
+    return False